@@ -48,6 +48,18 @@ DEFAULT_PROCESS_LIMIT = 0
 MEDIUM_PROCESS_LIMIT = 16
 MAX_PROCESS_LIMIT = 150
 
+# The upper bound on the number of test cases from a single suite
+# that can be run simultaneously in the same sandbox.
+MAX_CONCURRENT_TEST_CASES = 16
+
+# The upper bound on the number of a mutation test suite's buggy
+# implementations that can be graded simultaneously in the same sandbox.
+MAX_CONCURRENT_BUGGY_IMPLS = 16
+
+# The upper bound on the number of a mutation test suite's student
+# test validity checks that can be run simultaneously in the same sandbox.
+MAX_CONCURRENT_VALIDITY_CHECKS = 16
+
 
 # DO NOT USE. This will be removed soon.
 class SupportedImages(enum.Enum):
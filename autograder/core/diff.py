@@ -0,0 +1,599 @@
+"""
+An in-process line diff used to compare expected and actual output.
+
+This module produces the same output format as the GNU diff invocation
+that get_diff() used to make (every line prefixed with one of '  ',
+'- ', or '+ ', unchanged lines taken from the first file), and
+supports the same ignore options. It has no dependencies outside the
+standard library so that it can be used (and benchmarked) anywhere.
+The one exception is described in compute_diff().
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import itertools
+import json
+import os
+import re
+import subprocess
+import tempfile
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+class DiffResult:
+    def __init__(self, diff_pass: bool, diff_content: List[str]):
+        self.diff_pass = diff_pass
+        self.diff_content = diff_content
+
+
+# Bail out of searching for a minimal diff of a region once the edit
+# distance in that region exceeds this. The region is then reported as
+# deleted and re-inserted in its entirety. This bounds the running time
+# for very different inputs. It can only affect how a failing diff is
+# displayed, never whether the diff passes.
+_MAX_EDIT_COST = 1000
+
+# The number of bytes files_equivalent() reads from each file at a time.
+_CHUNK_SIZE = 64 * 1024
+
+
+def compute_diff(first_filename: str, second_filename: str,
+                 ignore_case: bool = False,
+                 ignore_whitespace: bool = False,
+                 ignore_whitespace_changes: bool = False,
+                 ignore_blank_lines: bool = False) -> DiffResult:
+    r"""
+    Diffs the contents of first_filename and second_filename.
+    Files are compared as bytes, and lines are split on '\n' only.
+
+    ignore_case, ignore_whitespace, and ignore_whitespace_changes
+    behave like GNU diff's --ignore-case, --ignore-all-space, and
+    --ignore-space-change.
+    ignore_blank_lines behaves like GNU diff's --ignore-blank-lines:
+    a group of changed lines is ignored only if every line in it is
+    blank (empty after applying the other ignore options). As in GNU
+    diff's output, the blank lines of an ignored group are displayed
+    as unchanged lines from the first file, and the blank lines from
+    the second file are omitted.
+
+    How changed lines are grouped depends on how ties between equally
+    short diffs are broken, which differs between this module and GNU
+    diff. When ignore_blank_lines is True and the files differ only in
+    blank lines, that can decide whether the diff passes, so GNU diff
+    is run to compute the diff in that case.
+    """
+    with open(first_filename, 'rb') as f:
+        old_lines = _split_lines(f.read())
+    with open(second_filename, 'rb') as f:
+        new_lines = _split_lines(f.read())
+
+    normalize = get_line_normalizer(
+        ignore_case=ignore_case,
+        ignore_whitespace=ignore_whitespace,
+        ignore_whitespace_changes=ignore_whitespace_changes)
+
+    old_keys = _get_keys(old_lines, normalize)
+    new_keys = _get_keys(new_lines, normalize)
+
+    # Fast path: the (normalized) files are equivalent, so every line
+    # of the first file is unchanged.
+    if old_keys == new_keys:
+        return DiffResult(True, ['  ' + _decode(line) for line in old_lines])
+
+    # If the non-blank lines differ, some non-blank line is part of a
+    # group of changes no matter how they're grouped.
+    if ignore_blank_lines and _non_blank(old_keys) == _non_blank(new_keys):
+        return _run_gnu_diff(
+            first_filename, second_filename,
+            ignore_case=ignore_case,
+            ignore_whitespace=ignore_whitespace,
+            ignore_whitespace_changes=ignore_whitespace_changes,
+            ignore_blank_lines=ignore_blank_lines)
+
+    matching_blocks: List[Tuple[int, int, int]] = []
+    _find_matching_blocks(old_keys, new_keys, 0, 0, matching_blocks)
+
+    content: List[str] = []
+    diff_pass = True
+    old_pos = new_pos = 0
+    sentinel = (len(old_keys), len(new_keys), 0)
+    for old_start, new_start, length in itertools.chain(matching_blocks, [sentinel]):
+        if ignore_blank_lines and _all_blank(old_keys, old_pos, old_start) \
+                and _all_blank(new_keys, new_pos, new_start):
+            # An ignored group of changes
+            content.extend(['  ' + _decode(line) for line in old_lines[old_pos:old_start]])
+        else:
+            diff_pass = False
+            content.extend(['- ' + _decode(line) for line in old_lines[old_pos:old_start]])
+            content.extend(['+ ' + _decode(line) for line in new_lines[new_pos:new_start]])
+
+        content.extend(
+            ['  ' + _decode(line) for line in old_lines[old_start:old_start + length]])
+
+        old_pos = old_start + length
+        new_pos = new_start + length
+
+    return DiffResult(diff_pass, content)
+
+
+_GNU_DIFF_LINE_REGEX = re.compile(r'^(?:  |\+ |- ).*\n+'.encode(), flags=re.MULTILINE)
+
+
+def _run_gnu_diff(first_filename: str, second_filename: str,
+                  ignore_case: bool = False,
+                  ignore_whitespace: bool = False,
+                  ignore_whitespace_changes: bool = False,
+                  ignore_blank_lines: bool = False) -> DiffResult:
+    # We're adding newlines at the beginning of each formatted line
+    # because GNU diff will otherwise handle missing trailing
+    # newlines in a way that the client can't reliably parse.
+    diff_cmd = ['diff',
+                '--text',  # Consider all files to be text
+                '--new-line-format', '+ %L\n',
+                '--old-line-format', '- %L\n',
+                '--unchanged-line-format', '  %L\n']
+    if ignore_case:
+        diff_cmd.append('--ignore-case')
+    if ignore_whitespace:
+        diff_cmd.append('--ignore-all-space')
+    if ignore_whitespace_changes:
+        diff_cmd.append('--ignore-space-change')
+    if ignore_blank_lines:
+        diff_cmd.append('--ignore-blank-lines')
+
+    diff_cmd += [first_filename, second_filename]
+
+    diff_result = subprocess.run(diff_cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    diff_list = [match.group()[:-1].decode('utf-8', 'surrogateescape')
+                 for match in _GNU_DIFF_LINE_REGEX.finditer(diff_result.stdout)]
+    return DiffResult(diff_result.returncode == 0, diff_list)
+
+
+def files_equivalent(first_filename: str, second_filename: str,
+                     ignore_case: bool = False,
+                     ignore_whitespace: bool = False,
+                     ignore_whitespace_changes: bool = False,
+                     ignore_blank_lines: bool = False) -> bool:
+    """
+    Returns True if compute_diff() would report first_filename and
+    second_filename as equivalent with the same options.
+
+    Unlike compute_diff(), this reads the files in fixed-size chunks,
+    stops at the first difference, and doesn't build any diff content.
+    The exception is when ignore_blank_lines is True and the files
+    differ only in blank lines, in which case the diff has to be
+    computed (see compute_diff()).
+    """
+    normalize = get_line_normalizer(
+        ignore_case=ignore_case,
+        ignore_whitespace=ignore_whitespace,
+        ignore_whitespace_changes=ignore_whitespace_changes)
+
+    if normalize is None and not ignore_blank_lines:
+        if os.path.getsize(first_filename) != os.path.getsize(second_filename):
+            return False
+
+        with open(first_filename, 'rb') as first, open(second_filename, 'rb') as second:
+            while True:
+                first_chunk = first.read(_CHUNK_SIZE)
+                if first_chunk != second.read(_CHUNK_SIZE):
+                    return False
+                if not first_chunk:
+                    return True
+
+    if not _keys_equal(first_filename, second_filename, normalize, skip_blank_lines=False):
+        if not ignore_blank_lines:
+            return False
+
+        if not _keys_equal(first_filename, second_filename, normalize,
+                           skip_blank_lines=True):
+            return False
+
+        return compute_diff(
+            first_filename, second_filename,
+            ignore_case=ignore_case,
+            ignore_whitespace=ignore_whitespace,
+            ignore_whitespace_changes=ignore_whitespace_changes,
+            ignore_blank_lines=ignore_blank_lines).diff_pass
+
+    return True
+
+
+def _keys_equal(first_filename: str, second_filename: str,
+                normalize: Optional[Callable[[bytes], bytes]],
+                skip_blank_lines: bool) -> bool:
+    with open(first_filename, 'rb') as first, open(second_filename, 'rb') as second:
+        first_keys = _iter_keys(first, normalize, skip_blank_lines)
+        second_keys = _iter_keys(second, normalize, skip_blank_lines)
+        sentinel = object()
+        return all(
+            first_key == second_key
+            for first_key, second_key in itertools.zip_longest(
+                first_keys, second_keys, fillvalue=sentinel))
+
+
+def get_cached_diff(first_filename: str, second_filename: str, cache_filename: str,
+                    ignore_case: bool = False,
+                    ignore_whitespace: bool = False,
+                    ignore_whitespace_changes: bool = False,
+                    ignore_blank_lines: bool = False) -> DiffResult:
+    """
+    Returns the same result as compute_diff(), reusing the result stored
+    in cache_filename if there is one for the same file contents and
+    options. Otherwise, computes the diff and stores it in cache_filename.
+    """
+    options = {
+        'ignore_case': ignore_case,
+        'ignore_whitespace': ignore_whitespace,
+        'ignore_whitespace_changes': ignore_whitespace_changes,
+        'ignore_blank_lines': ignore_blank_lines,
+    }
+    key = _get_diff_cache_key(first_filename, second_filename, options)
+    try:
+        with open(cache_filename) as f:
+            if _header_matches(f.readline(), key):
+                header = json.loads(f.readline())
+                return DiffResult(header['diff_pass'], json.loads(f.readline()))
+    except (OSError, ValueError, KeyError):
+        pass
+
+    diff = compute_diff(first_filename, second_filename, **options)
+    _write_diff_cache(cache_filename, key, diff)
+    return diff
+
+
+def get_cached_diff_size(first_filename: str, second_filename: str, cache_filename: str,
+                         ignore_case: bool = False,
+                         ignore_whitespace: bool = False,
+                         ignore_whitespace_changes: bool = False,
+                         ignore_blank_lines: bool = False) -> int:
+    """
+    Returns the total length of the lines in the diff content that
+    get_cached_diff() would return, without loading the diff content
+    if it is already cached.
+    """
+    options = {
+        'ignore_case': ignore_case,
+        'ignore_whitespace': ignore_whitespace,
+        'ignore_whitespace_changes': ignore_whitespace_changes,
+        'ignore_blank_lines': ignore_blank_lines,
+    }
+    key = _get_diff_cache_key(first_filename, second_filename, options)
+    try:
+        with open(cache_filename) as f:
+            if _header_matches(f.readline(), key):
+                return int(json.loads(f.readline())['diff_size'])
+    except (OSError, ValueError, KeyError):
+        pass
+
+    diff = compute_diff(first_filename, second_filename, **options)
+    _write_diff_cache(cache_filename, key, diff)
+    return _get_diff_size(diff)
+
+
+def _get_diff_cache_key(first_filename: str, second_filename: str,
+                        options: Dict[str, bool]) -> str:
+    key = hashlib.sha256()
+    for filename in first_filename, second_filename:
+        with open(filename, 'rb') as f:
+            while chunk := f.read(_CHUNK_SIZE):
+                key.update(chunk)
+        # Separates the two files' contents.
+        key.update(key.digest())
+    key.update(json.dumps(options, sort_keys=True).encode())
+    return key.hexdigest()
+
+
+# Diff cache files contain three lines: the cache key, a JSON object
+# with diff_pass and diff_size, and the JSON-encoded diff content. This
+# lets the size be looked up without parsing the diff content.
+def _header_matches(line: str, key: str) -> bool:
+    return line.rstrip('\n') == key
+
+
+def _write_diff_cache(cache_filename: str, key: str, diff: DiffResult) -> None:
+    # Caching is best-effort, so failing to write the cache file isn't
+    # an error. We write to a temporary file first so that concurrent
+    # readers never see a partially written cache file.
+    try:
+        fd, tmp_filename = tempfile.mkstemp(dir=os.path.dirname(cache_filename))
+    except OSError:
+        return
+
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(key + '\n')
+            json.dump({'diff_pass': diff.diff_pass, 'diff_size': _get_diff_size(diff)}, f)
+            f.write('\n')
+            json.dump(diff.diff_content, f)
+            f.write('\n')
+        os.replace(tmp_filename, cache_filename)
+    except BaseException as e:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_filename)
+        if not isinstance(e, OSError):
+            raise
+
+
+def _get_diff_size(diff: DiffResult) -> int:
+    return sum(len(line) for line in diff.diff_content)
+
+
+def get_line_normalizer(*, ignore_case: bool = False,
+                        ignore_whitespace: bool = False,
+                        ignore_whitespace_changes: bool = False
+                        ) -> Optional[Callable[[bytes], bytes]]:
+    """
+    Returns a function that maps a line to the key it should be compared
+    by, or None if lines should be compared exactly.
+    """
+    if not (ignore_case or ignore_whitespace or ignore_whitespace_changes):
+        return None
+
+    def normalize(line: bytes) -> bytes:
+        if ignore_case:
+            line = line.lower()
+
+        if ignore_whitespace:
+            return b''.join(line.split())
+
+        if ignore_whitespace_changes:
+            # Changes in the amount of whitespace are ignored, as is
+            # trailing whitespace (including a missing newline).
+            # Leading whitespace still has to be present in both lines.
+            words = line.split()
+            if words and line[:1].isspace():
+                return b' ' + b' '.join(words)
+            return b' '.join(words)
+
+        return line
+
+    return normalize
+
+
+def _split_lines(data: bytes) -> List[bytes]:
+    lines = data.split(b'\n')
+    # Re-attach the newlines. The last element holds whatever came after
+    # the last newline, which is empty if the data ends in a newline.
+    last = lines.pop()
+    result = [line + b'\n' for line in lines]
+    if last:
+        result.append(last)
+    return result
+
+
+def _iter_lines(file_: BinaryIO) -> Iterator[bytes]:
+    """
+    Yields the lines of file_ (with their newlines), reading it in chunks.
+    """
+    # Chunks that haven't ended in a newline yet. We avoid repeatedly
+    # concatenating to one buffer so that very long lines stay linear.
+    pieces: List[bytes] = []
+    while True:
+        chunk = file_.read(_CHUNK_SIZE)
+        if not chunk:
+            break
+
+        lines = chunk.split(b'\n')
+        if len(lines) == 1:
+            pieces.append(chunk)
+            continue
+
+        pieces.append(lines[0])
+        yield b''.join(pieces) + b'\n'
+        for line in itertools.islice(lines, 1, len(lines) - 1):
+            yield line + b'\n'
+        pieces = [lines[-1]]
+
+    last = b''.join(pieces)
+    if last:
+        yield last
+
+
+def _iter_keys(file_: BinaryIO,
+               normalize: Optional[Callable[[bytes], bytes]],
+               skip_blank_lines: bool) -> Iterator[bytes]:
+    keys = _iter_lines(file_)
+    if normalize is not None:
+        keys = map(normalize, keys)
+    if skip_blank_lines:
+        keys = itertools.filterfalse(_is_blank, keys)
+    return keys
+
+
+def _is_blank(key: bytes) -> bool:
+    # Note that when whitespace is ignored, a line containing only
+    # whitespace normalizes to an empty key.
+    return key == b'' or key == b'\n'
+
+
+def _non_blank(keys: Sequence[bytes]) -> List[bytes]:
+    return [key for key in keys if not _is_blank(key)]
+
+
+def _all_blank(keys: Sequence[bytes], start: int, stop: int) -> bool:
+    return all(_is_blank(keys[index]) for index in range(start, stop))
+
+
+def _get_keys(lines: List[bytes],
+              normalize: Optional[Callable[[bytes], bytes]]) -> List[bytes]:
+    if normalize is None:
+        return lines
+
+    return [normalize(line) for line in lines]
+
+
+def _decode(line: bytes) -> str:
+    return line.decode('utf-8', 'surrogateescape')
+
+
+def _find_matching_blocks(old: Sequence[bytes], new: Sequence[bytes],
+                          old_offset: int, new_offset: int,
+                          matching_blocks: List[Tuple[int, int, int]]) -> None:
+    """
+    Appends to matching_blocks, in order, (old start, new start, length)
+    triples that describe runs of lines making up a longest common
+    subsequence of old and new.
+    old_offset and new_offset are added to the start indices appended.
+
+    Uses the linear space variant of the algorithm in
+    "An O(ND) Difference Algorithm and Its Variations" (Myers, 1986).
+    """
+    max_prefix_len = min(len(old), len(new))
+    prefix_len = _common_prefix_length(old, 0, new, 0, max_prefix_len)
+    if prefix_len:
+        matching_blocks.append((old_offset, new_offset, prefix_len))
+
+    suffix_len = _common_suffix_length(
+        old, len(old), new, len(new), max_prefix_len - prefix_len)
+
+    old_middle = old[prefix_len:len(old) - suffix_len]
+    new_middle = new[prefix_len:len(new) - suffix_len]
+    if old_middle and new_middle:
+        split = _find_middle_snake(old_middle, new_middle)
+        if split is not None:
+            old_split, new_split = split
+            _find_matching_blocks(
+                old_middle[:old_split], new_middle[:new_split],
+                old_offset + prefix_len, new_offset + prefix_len, matching_blocks)
+            _find_matching_blocks(
+                old_middle[old_split:], new_middle[new_split:],
+                old_offset + prefix_len + old_split,
+                new_offset + prefix_len + new_split, matching_blocks)
+
+    if suffix_len:
+        matching_blocks.append(
+            (old_offset + len(old) - suffix_len, new_offset + len(new) - suffix_len, suffix_len))
+
+
+def _find_middle_snake(old: Sequence[bytes], new: Sequence[bytes]) -> Optional[Tuple[int, int]]:
+    """
+    Returns a point on a shortest edit path from the start of old and
+    new to their ends, or None if old and new have nothing in common
+    or the edit distance exceeds _MAX_EDIT_COST.
+    old and new must be non-empty and must differ in their first and
+    last elements.
+    """
+    old_len = len(old)
+    new_len = len(new)
+    max_d = min((old_len + new_len + 1) // 2, _MAX_EDIT_COST)
+    v_offset = max_d + 1
+    v_length = 2 * v_offset + 1
+    # forward[k] and backward[k] hold the furthest x reached on diagonal k,
+    # measured from the start and the end respectively.
+    forward = [-1] * v_length
+    forward[v_offset + 1] = 0
+    backward = [-1] * v_length
+    backward[v_offset + 1] = 0
+    delta = old_len - new_len
+    # When delta is odd, the forward and backward paths can only
+    # overlap while extending the forward path, and vice versa.
+    check_forward = delta % 2 != 0
+
+    # Diagonals that run off the edit graph are trimmed from the search.
+    forward_start = forward_end = backward_start = backward_end = 0
+    for d in range(max_d):
+        for k in range(-d + forward_start, d + 1 - forward_end, 2):
+            k_offset = v_offset + k
+            if k == -d or (k != d and forward[k_offset - 1] < forward[k_offset + 1]):
+                x = forward[k_offset + 1]
+            else:
+                x = forward[k_offset - 1] + 1
+            y = x - k
+            snake_len = _common_prefix_length(old, x, new, y, min(old_len - x, new_len - y))
+            x += snake_len
+            y += snake_len
+            forward[k_offset] = x
+            if x > old_len:
+                forward_end += 2
+            elif y > new_len:
+                forward_start += 2
+            elif check_forward:
+                other_offset = v_offset + delta - k
+                if 0 <= other_offset < v_length and backward[other_offset] != -1:
+                    if x >= old_len - backward[other_offset]:
+                        return x, y
+
+        for k in range(-d + backward_start, d + 1 - backward_end, 2):
+            k_offset = v_offset + k
+            if k == -d or (k != d and backward[k_offset - 1] < backward[k_offset + 1]):
+                x = backward[k_offset + 1]
+            else:
+                x = backward[k_offset - 1] + 1
+            y = x - k
+            snake_len = _common_suffix_length(
+                old, old_len - x, new, new_len - y, min(old_len - x, new_len - y))
+            x += snake_len
+            y += snake_len
+            backward[k_offset] = x
+            if x > old_len:
+                backward_end += 2
+            elif y > new_len:
+                backward_start += 2
+            elif not check_forward:
+                other_offset = v_offset + delta - k
+                if 0 <= other_offset < v_length and forward[other_offset] != -1:
+                    forward_x = forward[other_offset]
+                    forward_y = v_offset + forward_x - other_offset
+                    if forward_x >= old_len - x:
+                        return forward_x, forward_y
+
+    return None
+
+
+# The two functions below compare progressively larger slices rather than
+# one element at a time so that long runs of equal lines are skipped over
+# at C speed.
+
+def _common_prefix_length(old: Sequence[bytes], old_start: int,
+                          new: Sequence[bytes], new_start: int,
+                          limit: int) -> int:
+    """
+    Returns the number of equal elements (at most limit) in old and new
+    starting at old_start and new_start, respectively.
+    """
+    if limit <= 0 or old[old_start] != new[new_start]:
+        return 0
+
+    length = 1
+    step = 1
+    while length < limit:
+        size = min(step, limit - length)
+        if (old[old_start + length:old_start + length + size]
+                == new[new_start + length:new_start + length + size]):
+            length += size
+            step *= 2
+        elif size == 1:
+            break
+        else:
+            step = size // 2
+
+    return length
+
+
+def _common_suffix_length(old: Sequence[bytes], old_end: int,
+                          new: Sequence[bytes], new_end: int,
+                          limit: int) -> int:
+    """
+    Returns the number of equal elements (at most limit) in old and new
+    ending just before old_end and new_end, respectively.
+    """
+    if limit <= 0 or old[old_end - 1] != new[new_end - 1]:
+        return 0
+
+    length = 1
+    step = 1
+    while length < limit:
+        size = min(step, limit - length)
+        if (old[old_end - length - size:old_end - length]
+                == new[new_end - length - size:new_end - length]):
+            length += size
+            step *= 2
+        elif size == 1:
+            break
+        else:
+            step = size // 2
+
+    return length
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.2 on 2026-10-18 12:00
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0102_alter_project_submission_limit_reset_timezone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agtestsuite',
+            name='max_concurrent_test_cases',
+            field=models.IntegerField(default=1, help_text="The maximum number of this suite's test cases that may be run\n                      at the same time inside the suite's sandbox. Test cases are\n                      run one at a time when this value is 1. Only increase this\n                      value if the suite's test cases are independent of each other\n                      (i.e., they do not read or write the same files).\n                      Must be between 1 and 16\n                      inclusive.", validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(16)]),
+        ),
+    ]
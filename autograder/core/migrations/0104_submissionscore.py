@@ -0,0 +1,32 @@
+# Generated by Django 3.2.2 on 2026-10-18 12:00
+
+import autograder.core.models.ag_model_base
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0103_agtestsuite_max_concurrent_test_cases'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionScore',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_modified', models.DateTimeField(auto_now=True)),
+                ('fdbk_category', models.TextField(choices=[('normal', 'normal'), ('ultimate_submission', 'ultimate_submission'), ('past_limit_submission', 'past_limit_submission'), ('staff_viewer', 'staff_viewer'), ('max', 'max')], help_text='The FeedbackCategory the points were computed with.')),
+                ('scoring_config_fingerprint', models.TextField(help_text="A hash of the project's test configuration at the time the\n                     points were computed. A score whose fingerprint doesn't\n                     match the project's current fingerprint is out of date.")),
+                ('total_points', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('total_points_possible', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('points_data', models.JSONField(default=dict, help_text='The exact point totals (as strings) for the submission\n        and for each of its suites.\n\n        Data format:\n        {\n            "total_points": <str>,\n            "total_points_possible": <str>,\n            "ag_test_suites": {\n                "<ag_test_suite_pk>": {\n                    "total_points": <str>,\n                    "total_points_possible": <str>\n                },\n                ...\n            },\n            "mutation_test_suites": {\n                "<mutation_test_suite_pk>": {\n                    "total_points": <str>,\n                    "total_points_possible": <str>\n                },\n                ...\n            }\n        }')),
+                ('submission', models.ForeignKey(help_text='The Submission this score belongs to.', on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='core.submission')),
+            ],
+            options={
+                'unique_together': {('submission', 'fdbk_category')},
+            },
+            bases=(autograder.core.models.ag_model_base.ToDictMixin, models.Model),
+        ),
+    ]
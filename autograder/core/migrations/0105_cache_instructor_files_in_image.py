@@ -0,0 +1,23 @@
+# Generated by Django 3.2.2 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0104_submissionscore'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agtestsuite',
+            name='cache_instructor_files_in_image',
+            field=models.BooleanField(default=False, help_text="When True, the instructor files needed for this suite are added\n                     to a docker image derived from sandbox_docker_image, and that\n                     image is used to grade the suite. The derived image is built\n                     the first time it's needed and again whenever the suite's\n                     instructor files change. This saves copying the instructor\n                     files into the sandbox for every submission, which can take\n                     a while for suites with large instructor files."),
+        ),
+        migrations.AddField(
+            model_name='mutationtestsuite',
+            name='cache_instructor_files_in_image',
+            field=models.BooleanField(default=False, help_text="When True, the instructor files needed for this suite are added\n                     to a docker image derived from sandbox_docker_image, and that\n                     image is used to grade the suite. The derived image is built\n                     the first time it's needed and again whenever the suite's\n                     instructor files change. This saves copying the instructor\n                     files into the sandbox for every submission, which can take\n                     a while for suites with large instructor files."),
+        ),
+    ]
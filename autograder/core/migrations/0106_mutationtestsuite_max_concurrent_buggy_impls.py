@@ -0,0 +1,19 @@
+# Generated by Django 3.2.2 on 2026-10-18 12:00
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0105_cache_instructor_files_in_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mutationtestsuite',
+            name='max_concurrent_buggy_impls',
+            field=models.IntegerField(default=1, help_text="The maximum number of buggy implementations that the student\n                      tests may be run against at the same time inside the suite's\n                      sandbox. Buggy implementations are graded one at a time when\n                      this value is 1. Only increase this value if running\n                      grade_buggy_impl_command for different buggy implementations\n                      at the same time is safe (i.e., the commands do not write\n                      the same files). The output of the buggy implementations is\n                      always recorded in the order of buggy_impl_names.\n                      Must be between 1 and 16\n                      inclusive.", validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(16)]),
+        ),
+    ]
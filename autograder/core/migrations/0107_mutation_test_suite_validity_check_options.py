@@ -0,0 +1,27 @@
+# Generated by Django 3.2.2 on 2026-10-18 12:00
+
+import autograder.core.fields
+import autograder.core.models.ag_command.command
+import autograder.core.models.mutation_test_suite.mutation_test_suite
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0106_mutationtestsuite_max_concurrent_buggy_impls'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mutationtestsuite',
+            name='max_concurrent_validity_checks',
+            field=models.IntegerField(default=1, help_text="The maximum number of student test cases whose validity may be\n                      checked at the same time inside the suite's sandbox when\n                      student_test_validity_check_command is run once per test case.\n                      Only increase this value if running the validity check\n                      command for different test cases at the same time is safe\n                      (i.e., the commands do not write the same files).\n                      The output of the validity checks is always recorded in the\n                      order that the test cases were detected in.\n                      Must be between 1 and 16\n                      inclusive.", validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(16)]),
+        ),
+        migrations.AlterField(
+            model_name='mutationtestsuite',
+            name='student_test_validity_check_command',
+            field=autograder.core.fields.ValidatedJSONField(default=autograder.core.models.mutation_test_suite.mutation_test_suite.new_make_default_validity_check_command, help_text="This command must contain one of the placeholders ${student_test_name}\n            or ${all_discovered_test_names}.\n            If the placeholder ${student_test_name} is present, this command\n            will be run once for each detected student test case, and the placeholder\n            will be replaced with the name of the student test case that is to be\n            checked for validity. An exit status of zero indicates that a student test\n            case is valid, whereas a nonzero exit status indicates that a student test\n            case is invalid.\n            If the placeholder ${all_discovered_test_names} is present, this\n            command will be run once, and the placeholder will be replaced with the\n            individually-quoted names of all the detected student test cases.\n            The command should print the name of each valid test case on its own line\n            to stdout. Test cases whose names aren't printed are invalid, and if the\n            command times out, they are also considered to have timed out.\n            As with grade_buggy_impl_command, you may need to specify a higher time\n            limit with this strategy.", serializable_class=autograder.core.models.ag_command.command.Command),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.2 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0107_mutation_test_suite_validity_check_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mutationtestsuiteresult',
+            name='kill_matrix',
+            field=models.JSONField(blank=True, default=dict, help_text="A mapping of buggy impl names to dictionaries that map valid\n                     student test names to the MutantTestOutcome of running that\n                     test against that buggy impl.\n                     Once a buggy impl is exposed, the remaining tests aren't run\n                     against it, so those tests are absent from its dictionary.\n                     This is only recorded when the suite's grade_buggy_impl_command\n                     runs one student test at a time, and it is empty otherwise."),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.2 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0108_mutationtestsuiteresult_kill_matrix'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(condition=models.Q(('status', 'queued')), fields=['project', 'id'], name='core_submission_queued_idx'),
+        ),
+    ]
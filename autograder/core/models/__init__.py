@@ -24,6 +24,7 @@ from .course import Semester as Semester
 from .group import Group as Group
 from .group import GroupInvitation as GroupInvitation
 from .mutation_test_suite import BugsExposedFeedbackLevel as BugsExposedFeedbackLevel
+from .mutation_test_suite import MutantTestOutcome as MutantTestOutcome
 from .mutation_test_suite import MutationTestSuite as MutationTestSuite
 from .mutation_test_suite import MutationTestSuiteFeedbackConfig as MutationTestSuiteFeedbackConfig
 from .mutation_test_suite import MutationTestSuiteResult as MutationTestSuiteResult
@@ -42,4 +43,5 @@ from .submission import \
     get_mutation_test_suite_results_queryset as get_mutation_test_suite_results_queryset
 from .submission import \
     get_submissions_with_results_queryset as get_submissions_with_results_queryset
+from .submission_score import SubmissionScore as SubmissionScore
 from .task import Task as Task
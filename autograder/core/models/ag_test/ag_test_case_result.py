@@ -1,9 +1,26 @@
-from typing import Dict
+from typing import Dict, Iterator, List, Mapping, Sequence
 
+from django.conf import settings
 from django.db import models
 
 from ..ag_model_base import AutograderModel, AutograderModelManager
 from .ag_test_case import AGTestCase
+from .ag_test_command_result import AGTestCommandResult
+
+# When settings.COMPACT_DENORMALIZED_AG_TEST_RESULTS is True, the
+# command results of a denormalized AGTestCaseResult are stored under
+# this key (instead of 'ag_test_command_results') as a dictionary
+# mapping each field in COMPACT_AG_TEST_COMMAND_RESULT_FIELDS to a list
+# of that field's values, one per command result. Storing the results
+# column-wise avoids repeating every field name for every command.
+COMPACT_AG_TEST_COMMAND_RESULTS_KEY = 'compact_ag_test_command_results'
+
+# ag_test_case_result_id is left out because it's the same for every
+# command result of a test case result.
+COMPACT_AG_TEST_COMMAND_RESULT_FIELDS = tuple(
+    field for field in AGTestCommandResult.SERIALIZABLE_FIELDS
+    if field != 'ag_test_case_result_id'
+)
 
 
 class AGTestCaseResult(AutograderModel):
@@ -34,9 +51,62 @@ class AGTestCaseResult(AutograderModel):
 
     def to_dict(self) -> Dict[str, object]:
         result = super().to_dict()
-        result['ag_test_command_results'] = {
-            str(cmd_res.ag_test_command_id): cmd_res.to_dict()
-            for cmd_res in self.ag_test_command_results.all()
-        }
+        cmd_results = [cmd_res.to_dict() for cmd_res in self.ag_test_command_results.all()]
+        if settings.COMPACT_DENORMALIZED_AG_TEST_RESULTS:
+            result[COMPACT_AG_TEST_COMMAND_RESULTS_KEY] = {
+                field: [cmd_res[field] for cmd_res in cmd_results]
+                for field in COMPACT_AG_TEST_COMMAND_RESULT_FIELDS
+            }
+        else:
+            result['ag_test_command_results'] = {
+                str(cmd_res['ag_test_command_id']): cmd_res for cmd_res in cmd_results
+            }
 
         return result
+
+
+def get_denormalized_ag_test_command_results(
+    case_result_dict: Mapping[str, object]
+) -> Sequence[Mapping[str, object]]:
+    """
+    Returns the command results of the given denormalized
+    AGTestCaseResult, which can be stored in either form written by
+    AGTestCaseResult.to_dict(). Each command result is a mapping from
+    AGTestCommandResult.SERIALIZABLE_FIELDS to their values.
+    """
+    compact_results = case_result_dict.get(COMPACT_AG_TEST_COMMAND_RESULTS_KEY)
+    if compact_results is None:
+        return list(
+            case_result_dict['ag_test_command_results'].values()  # type: ignore
+        )
+
+    columns: Mapping[str, List[object]] = compact_results  # type: ignore
+    return [
+        CompactAGTestCommandResultRow(columns, index, case_result_dict['pk'])  # type: ignore
+        for index in range(len(columns['pk']))
+    ]
+
+
+class CompactAGTestCommandResultRow(Mapping[str, object]):
+    """
+    A read-only view of one command result stored in compact form.
+    Values are read directly from the columns they're stored in.
+    """
+
+    def __init__(self, columns: Mapping[str, List[object]], index: int,
+                 ag_test_case_result_id: int):
+        self._columns = columns
+        self._index = index
+        self._ag_test_case_result_id = ag_test_case_result_id
+
+    def __getitem__(self, field: str) -> object:
+        if field == 'ag_test_case_result_id':
+            return self._ag_test_case_result_id
+
+        return self._columns[field][self._index]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(AGTestCommandResult.SERIALIZABLE_FIELDS)
+
+    def __len__(self) -> int:
+        return len(AGTestCommandResult.SERIALIZABLE_FIELDS)
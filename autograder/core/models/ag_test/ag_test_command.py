@@ -380,6 +380,10 @@ class AGTestCommand(AutograderModel):
 
     @transaction.atomic()
     def delete(self, *args: Any, **kwargs: Any) -> Tuple[int, Dict[str, int]]:
+        # Results stored in compact form (see AGTestCaseResult.to_dict())
+        # aren't removed here. They're skipped when read, the same as
+        # results of commands deleted while their submission was
+        # being graded.
         with connection.cursor() as cursor:
             cursor.execute(
                 '''UPDATE core_submission
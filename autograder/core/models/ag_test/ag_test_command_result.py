@@ -1,4 +1,5 @@
 import os
+from typing import TYPE_CHECKING
 
 from django.db import models
 
@@ -8,6 +9,9 @@ import autograder.core.utils as core_ut
 from ..ag_command import AGCommandResultBase
 from .ag_test_command import AGTestCommand
 
+if TYPE_CHECKING:
+    from ..submission import Submission
+
 
 class AGTestCommandResult(AGCommandResultBase):
     """
@@ -38,15 +42,41 @@ class AGTestCommandResult(AGCommandResultBase):
 
     @property
     def stdout_filename(self) -> str:
-        result_output_dir = core_ut.get_result_output_dir(
-            self.ag_test_case_result.ag_test_suite_result.submission)
-        return os.path.join(result_output_dir, 'cmd_result_{}_stdout'.format(self.pk))
+        return self.get_stdout_filename(
+            self.ag_test_case_result.ag_test_suite_result.submission, self.pk)
 
     @property
     def stderr_filename(self) -> str:
-        result_output_dir = core_ut.get_result_output_dir(
-            self.ag_test_case_result.ag_test_suite_result.submission)
-        return os.path.join(result_output_dir, 'cmd_result_{}_stderr'.format(self.pk))
+        return self.get_stderr_filename(
+            self.ag_test_case_result.ag_test_suite_result.submission, self.pk)
+
+    # These let the output filenames of a result be computed from its
+    # primary key alone (e.g., from denormalized results) without
+    # loading the result from the database.
+    @staticmethod
+    def get_stdout_filename(submission: 'Submission', cmd_result_pk: int) -> str:
+        return os.path.join(core_ut.get_result_output_dir(submission),
+                            'cmd_result_{}_stdout'.format(cmd_result_pk))
+
+    @staticmethod
+    def get_stderr_filename(submission: 'Submission', cmd_result_pk: int) -> str:
+        return os.path.join(core_ut.get_result_output_dir(submission),
+                            'cmd_result_{}_stderr'.format(cmd_result_pk))
+
+    # Computed diffs of the output against the expected output are cached
+    # in these files (see autograder.core.diff.get_cached_diff).
+    @property
+    def stdout_diff_cache_filename(self) -> str:
+        return self.stdout_filename + '_diff'
+
+    @property
+    def stderr_diff_cache_filename(self) -> str:
+        return self.stderr_filename + '_diff'
+
+    def clear_cached_diffs(self) -> None:
+        for filename in self.stdout_diff_cache_filename, self.stderr_diff_cache_filename:
+            if os.path.exists(filename):
+                os.remove(filename)
 
     # Serializing AGTestCommandResults should be used for DENORMALIZATION
     # ONLY.
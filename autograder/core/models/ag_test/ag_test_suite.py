@@ -4,6 +4,7 @@ from typing import Any, Dict, List, Tuple
 
 from django.core import exceptions
 from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import connection, models, transaction
 
 import autograder.core.fields as ag_fields
@@ -98,6 +99,16 @@ class AGTestSuite(AutograderModel):
         help_text="""When True, project files needed for this suite will be read-only when this
                      suite is run.""")
 
+    cache_instructor_files_in_image = models.BooleanField(
+        default=False,
+        help_text="""When True, the instructor files needed for this suite are added
+                     to a docker image derived from sandbox_docker_image, and that
+                     image is used to grade the suite. The derived image is built
+                     the first time it's needed and again whenever the suite's
+                     instructor files change. This saves copying the instructor
+                     files into the sandbox for every submission, which can take
+                     a while for suites with large instructor files.""")
+
     student_files_needed = models.ManyToManyField(
         ExpectedStudentFile,
         help_text='''Student-submitted files matching these patterns will be copied into the
@@ -152,6 +163,19 @@ class AGTestSuite(AutograderModel):
                      have yet to be graded do not prevent members of a group from submitting
                      again.''')
 
+    max_concurrent_test_cases = models.IntegerField(
+        default=1,
+        validators=[
+            MinValueValidator(1), MaxValueValidator(constants.MAX_CONCURRENT_TEST_CASES)
+        ],
+        help_text=f'''The maximum number of this suite's test cases that may be run
+                      at the same time inside the suite's sandbox. Test cases are
+                      run one at a time when this value is 1. Only increase this
+                      value if the suite's test cases are independent of each other
+                      (i.e., they do not read or write the same files).
+                      Must be between 1 and {constants.MAX_CONCURRENT_TEST_CASES}
+                      inclusive.''')
+
     normal_fdbk_config = ag_fields.ValidatedJSONField(
         AGTestSuiteFeedbackConfig, default=AGTestSuiteFeedbackConfig)
     ultimate_submission_fdbk_config = ag_fields.ValidatedJSONField(
@@ -238,6 +262,7 @@ class AGTestSuite(AutograderModel):
 
         'instructor_files_needed',
         'read_only_instructor_files',
+        'cache_instructor_files_in_image',
         'student_files_needed',
 
         'ag_test_cases',
@@ -249,6 +274,7 @@ class AGTestSuite(AutograderModel):
         'sandbox_docker_image',
         'allow_network_access',
         'deferred',
+        'max_concurrent_test_cases',
 
         'normal_fdbk_config',
         'ultimate_submission_fdbk_config',
@@ -270,6 +296,7 @@ class AGTestSuite(AutograderModel):
 
         'instructor_files_needed',
         'read_only_instructor_files',
+        'cache_instructor_files_in_image',
         'student_files_needed',
 
         'setup_suite_cmd',
@@ -278,6 +305,7 @@ class AGTestSuite(AutograderModel):
 
         'allow_network_access',
         'deferred',
+        'max_concurrent_test_cases',
         'sandbox_docker_image',
 
         'normal_fdbk_config',
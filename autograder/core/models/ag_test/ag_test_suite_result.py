@@ -1,5 +1,5 @@
 import os
-from typing import Dict
+from typing import TYPE_CHECKING, Dict
 
 from django.db import models
 
@@ -8,6 +8,9 @@ import autograder.core.utils as core_ut
 from ..ag_model_base import AutograderModel, AutograderModelManager
 from .ag_test_suite import AGTestSuite
 
+if TYPE_CHECKING:
+    from ..submission import Submission
+
 
 class AGTestSuiteResult(AutograderModel):
     objects = AutograderModelManager['AGTestSuiteResult']()
@@ -39,13 +42,21 @@ class AGTestSuiteResult(AutograderModel):
 
     @property
     def setup_stdout_filename(self) -> str:
-        return os.path.join(core_ut.get_result_output_dir(self.submission),
-                            'suite_result_{}_setup_stdout'.format(self.pk))
+        return self.get_setup_stdout_filename(self.submission, self.pk)
 
     @property
     def setup_stderr_filename(self) -> str:
-        return os.path.join(core_ut.get_result_output_dir(self.submission),
-                            'suite_result_{}_setup_stderr'.format(self.pk))
+        return self.get_setup_stderr_filename(self.submission, self.pk)
+
+    @staticmethod
+    def get_setup_stdout_filename(submission: 'Submission', suite_result_pk: int) -> str:
+        return os.path.join(core_ut.get_result_output_dir(submission),
+                            'suite_result_{}_setup_stdout'.format(suite_result_pk))
+
+    @staticmethod
+    def get_setup_stderr_filename(submission: 'Submission', suite_result_pk: int) -> str:
+        return os.path.join(core_ut.get_result_output_dir(submission),
+                            'suite_result_{}_setup_stderr'.format(suite_result_pk))
 
     # Serializing AGTestSuiteResults should be used for DENORMALIZATION
     # ONLY.
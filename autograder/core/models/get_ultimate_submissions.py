@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import warnings
-from typing import Collection, Iterator, Optional
+from decimal import Decimal
+from typing import Any, Collection, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 from django.contrib.auth.models import User
 from django.db.models import Prefetch
@@ -10,36 +11,52 @@ from django.db.models.query import QuerySet
 from autograder.core.submission_feedback import (
     AGTestPreLoader, MutationTestSuitePreLoader, SubmissionResultFeedback
 )
+from autograder.core.submission_scores import get_submission_scores
 
 from .ag_test.feedback_category import FeedbackCategory
 from .group import Group
 from .project import Project, UltimateSubmissionPolicy
 from .submission import Submission, get_submissions_with_results_queryset
+from .submission_score import SubmissionScore
+
+
+class UltimateSubmissionResultFeedback(SubmissionResultFeedback):
+    """
+    Feedback for a group's ultimate submission, as returned by
+    get_ultimate_submissions(). Also contains feedback for the ultimate
+    submissions of the group members that this submission doesn't
+    count for (see Submission.does_not_count_for), which are selected
+    at the same time as the group's ultimate submission.
+    """
+
+    def __init__(
+        self, *args: Any,
+        user_ultimate_submissions: Dict[str, Optional[SubmissionResultFeedback]],
+        **kwargs: Any
+    ):
+        """
+        :param user_ultimate_submissions: A dictionary mapping each
+            username in the submission's does_not_count_for to feedback
+            for that user's ultimate submission, or None if none of the
+            group's submissions count for that user.
+        """
+        super().__init__(*args, **kwargs)
+        self.user_ultimate_submissions = user_ultimate_submissions
 
 
 def get_ultimate_submission(group: Group, user: Optional[User] = None) -> Optional[Submission]:
     project = group.project
-    [group] = _prefetch_submissions(project, [group])
+    username = user.username if user is not None else None
     if project.ultimate_submission_policy == UltimateSubmissionPolicy.most_recent:
-        return _get_most_recent_submission(group, user)
-    elif project.ultimate_submission_policy == UltimateSubmissionPolicy.best_with_normal_fdbk:
-        best = _get_best_submission(
-            group,
-            FeedbackCategory.normal,
-            ag_test_preloader=AGTestPreLoader(project),
-            mutation_test_suite_preloader=MutationTestSuitePreLoader(project),
-            user=user
-        )
-        return best.submission if best is not None else None
+        return _get_most_recent_submissions([group], username).get(group.pk)
+
+    [group] = _prefetch_submissions(project, [group])
+    if project.ultimate_submission_policy == UltimateSubmissionPolicy.best_with_normal_fdbk:
+        scores = _get_scores(project, [group], FeedbackCategory.normal, AGTestPreLoader(project))
+        return _get_best_submission(group, scores, username=username)
     elif project.ultimate_submission_policy == UltimateSubmissionPolicy.best:
-        best = _get_best_submission(
-            group,
-            FeedbackCategory.max,
-            ag_test_preloader=AGTestPreLoader(project),
-            mutation_test_suite_preloader=MutationTestSuitePreLoader(project),
-            user=user
-        )
-        return best.submission if best is not None else None
+        scores = _get_scores(project, [group], FeedbackCategory.max, AGTestPreLoader(project))
+        return _get_best_submission(group, scores, username=username)
     else:
         assert False, \
             f'Unexpected ultimate submission policy "{project.ultimate_submission_policy}"'
@@ -47,8 +64,9 @@ def get_ultimate_submission(group: Group, user: Optional[User] = None) -> Option
 
 def get_ultimate_submissions(
     project: Project,
-    *, filter_groups: Optional[Collection[Group]], ag_test_preloader: AGTestPreLoader
-) -> Iterator[SubmissionResultFeedback]:
+    *, filter_groups: Optional[Collection[Group]], ag_test_preloader: AGTestPreLoader,
+    defer_ag_test_results: bool = False
+) -> Iterator[UltimateSubmissionResultFeedback]:
     """
     :param project: The Project to load final graded submissions from.
     :param filter_groups: If not None, load only ultimate submissions
@@ -56,88 +74,223 @@ def get_ultimate_submissions(
         for all groups belonging to project.
     :param ag_test_preloader: An instance of AGTestPreloader that can be
         used to efficiently fetch test case data for project.
+    :param defer_ag_test_results: If True, the ultimate submissions'
+        (potentially very large) denormalized AG test results aren't
+        loaded, and the total_points and total_points_possible of the
+        returned feedback results are read from the submissions'
+        SubmissionScores. Pass True when only those totals are needed.
     :return: An iterator of feedback results for ultimate submissions
         belonging to project.
     """
-    filter_groups = _prefetch_submissions(project, filter_groups)
-
     mutation_test_suite_preloader = MutationTestSuitePreLoader(project)
 
+    ultimate_submissions: List[Submission] = []
+    # Keys are (group pk, username)
+    user_ultimate_submissions: Dict[Tuple[int, str], Optional[Submission]] = {}
+    max_fdbk_scores: Optional[Dict[int, SubmissionScore]] = None
     if project.ultimate_submission_policy == UltimateSubmissionPolicy.most_recent:
-        return (
-            SubmissionResultFeedback(
-                most_recent_submission,
-                FeedbackCategory.max,
-                ag_test_preloader,
-                mutation_test_suite_preloader
-            )
-            for group in filter_groups
-            if (most_recent_submission := group.submissions.first()) is not None
-        )
-    elif project.ultimate_submission_policy == UltimateSubmissionPolicy.best_with_normal_fdbk:
-        warnings.warn('best_with_normal_fdbk is currently untested and may be deprecated soon.',
-                      PendingDeprecationWarning)
-
-        # We need to generate best submissions with normal feedback
-        # but return SubmissionResultFeedbacks with max feedback.
-        best_submissions_fdbks = (
-            _get_best_submission(
-                group, FeedbackCategory.normal, ag_test_preloader, mutation_test_suite_preloader)
-            for group in filter_groups
-        )
-        best_submissions = (fdbk.submission for fdbk in best_submissions_fdbks
-                            if fdbk is not None)
-        return (
-            SubmissionResultFeedback(
-                submission, FeedbackCategory.max, ag_test_preloader, mutation_test_suite_preloader)
-            for submission in best_submissions)
-    elif project.ultimate_submission_policy == UltimateSubmissionPolicy.best:
-        best_submissions_fdbks = (
-            _get_best_submission(
-                group, FeedbackCategory.max, ag_test_preloader, mutation_test_suite_preloader)
-            for group in filter_groups
+        groups = list(_get_groups_queryset(project, filter_groups))
+        most_recent_submissions = _get_most_recent_submissions(groups)
+        ultimate_submissions = [
+            most_recent_submissions[group.pk] for group in groups
+            if group.pk in most_recent_submissions
+        ]
+
+        # Finding the ultimate submissions of members that a group's
+        # most recent submission doesn't count for requires the group's
+        # other submissions, which are loaded for all such groups at once.
+        split_groups = [
+            submission.group for submission in ultimate_submissions
+            if submission.does_not_count_for
+        ]
+        if split_groups:
+            for group in _prefetch_submissions(project, split_groups):
+                for username in most_recent_submissions[group.pk].does_not_count_for:
+                    user_ultimate_submissions[(group.pk, username)] = (
+                        _get_most_recent_submission(group, username))
+    else:
+        if project.ultimate_submission_policy == UltimateSubmissionPolicy.best_with_normal_fdbk:
+            warnings.warn(
+                'best_with_normal_fdbk is currently untested and may be deprecated soon.',
+                PendingDeprecationWarning)
+
+            # We need to generate best submissions with normal feedback
+            # but return SubmissionResultFeedbacks with max feedback.
+            fdbk_category = FeedbackCategory.normal
+        elif project.ultimate_submission_policy == UltimateSubmissionPolicy.best:
+            fdbk_category = FeedbackCategory.max
+        else:
+            assert False
+
+        groups = list(_prefetch_submissions(project, filter_groups))
+        scores = _get_scores(
+            project, groups, fdbk_category, ag_test_preloader, mutation_test_suite_preloader)
+        if fdbk_category == FeedbackCategory.max:
+            max_fdbk_scores = scores
+
+        for group in groups:
+            best_submission = _get_best_submission(group, scores)
+            if best_submission is None:
+                continue
+
+            ultimate_submissions.append(best_submission)
+            for username in best_submission.does_not_count_for:
+                user_ultimate_submissions[(group.pk, username)] = _get_best_submission(
+                    group, scores, username=username)
+
+    to_load = ultimate_submissions + [
+        submission for submission in user_ultimate_submissions.values()
+        if submission is not None
+    ]
+    # Keys are submission pks
+    fdbk_scores: Dict[int, SubmissionScore] = {}
+    if defer_ag_test_results:
+        fdbk_scores = (
+            max_fdbk_scores if max_fdbk_scores is not None
+            else get_submission_scores(
+                project, to_load, FeedbackCategory.max,
+                ag_test_preloader, mutation_test_suite_preloader)
         )
-        return (fdbk for fdbk in best_submissions_fdbks if fdbk is not None)
+    else:
+        Submission.load_denormalized_ag_test_results(to_load)
+
+    def _make_fdbk(submission: Submission) -> SubmissionResultFeedback:
+        return SubmissionResultFeedback(
+            submission, FeedbackCategory.max,
+            ag_test_preloader, mutation_test_suite_preloader,
+            score=fdbk_scores.get(submission.pk))
 
-    assert False
+    def _make_user_fdbk(group_pk: int, username: str) -> Optional[SubmissionResultFeedback]:
+        submission = user_ultimate_submissions[(group_pk, username)]
+        return _make_fdbk(submission) if submission is not None else None
+
+    return (
+        UltimateSubmissionResultFeedback(
+            submission, FeedbackCategory.max,
+            ag_test_preloader, mutation_test_suite_preloader,
+            score=fdbk_scores.get(submission.pk),
+            user_ultimate_submissions={
+                username: _make_user_fdbk(submission.group_id, username)
+                for username in submission.does_not_count_for
+            }
+        )
+        for submission in ultimate_submissions
+    )
 
 
 def _prefetch_submissions(
     project: Project,
     groups: Optional[Collection[Group]]
 ) -> QuerySet[Group]:
+    # Submissions' denormalized AG test results are only loaded once
+    # they're needed (see Submission.load_denormalized_ag_test_results).
     finished_submissions_queryset = Submission.objects.filter(
-        status=Submission.GradingStatus.finished_grading)
-
-    base_group_queryset = project.groups
-    if groups is not None:
-        base_group_queryset = base_group_queryset.filter(pk__in=[group.pk for group in groups])
+        status=Submission.GradingStatus.finished_grading
+    ).defer('denormalized_ag_test_results')
 
     submissions_queryset = get_submissions_with_results_queryset(
         base_manager=finished_submissions_queryset)
-    return base_group_queryset.prefetch_related(Prefetch('submissions', submissions_queryset))
+    return _get_groups_queryset(project, groups).prefetch_related(
+        Prefetch('submissions', submissions_queryset))
 
 
-def _get_most_recent_submission(group: Group, user: Optional[User] = None) -> Optional[Submission]:
+def _get_groups_queryset(
+    project: Project,
+    groups: Optional[Collection[Group]]
+) -> QuerySet[Group]:
+    if groups is None:
+        return project.groups.all()
+
+    return project.groups.filter(pk__in=[group.pk for group in groups])
+
+
+def _get_most_recent_submissions(
+    groups: Collection[Group],
+    username: Optional[str] = None
+) -> Dict[int, Submission]:
+    """
+    Returns a dictionary mapping the primary keys of groups to their
+    most recent finished submissions. Groups with no finished
+    submissions are omitted.
+
+    If username is not None, submissions that don't count for that
+    user are skipped.
+
+    Only the returned submissions are loaded from the database,
+    rather than every finished submission of each group.
+    """
+    submissions_queryset = Submission.objects.filter(
+        group__in=[group.pk for group in groups],
+        status=Submission.GradingStatus.finished_grading
+    ).defer('denormalized_ag_test_results')
+    if username is not None:
+        submissions_queryset = submissions_queryset.exclude(
+            does_not_count_for__contains=[username])
+
+    # DISTINCT ON (group_id) keeps the first row for each group, which
+    # is the group's submission with the highest pk.
+    submissions_queryset = submissions_queryset.order_by('group_id', '-pk').distinct('group_id')
+
+    groups_by_pk = {group.pk: group for group in groups}
+    most_recent_submissions = {}
+    for submission in get_submissions_with_results_queryset(base_manager=submissions_queryset):
+        submission.group = groups_by_pk[submission.group_id]
+        most_recent_submissions[submission.group_id] = submission
+
+    return most_recent_submissions
+
+
+def _get_most_recent_submission(
+    group: Group, username: Optional[str] = None
+) -> Optional[Submission]:
+    """
+    Like _get_most_recent_submissions, but for a single group whose
+    submissions have been prefetched.
+    """
     for submission in group.submissions.all():
-        if user is None or user.username not in submission.does_not_count_for:
+        if username is None or username not in submission.does_not_count_for:
             return submission
 
     return None
 
 
-def _get_best_submission(group: Group, fdbk_category: FeedbackCategory,
-                         ag_test_preloader: AGTestPreLoader,
-                         mutation_test_suite_preloader: MutationTestSuitePreLoader,
-                         user: Optional[User] = None) -> Optional[SubmissionResultFeedback]:
-    best: Optional[SubmissionResultFeedback] = None
+def _get_scores(
+    project: Project,
+    groups: Iterable[Group],
+    fdbk_category: FeedbackCategory,
+    ag_test_preloader: AGTestPreLoader,
+    mutation_test_suite_preloader: Optional[MutationTestSuitePreLoader] = None
+) -> Dict[int, SubmissionScore]:
+    """
+    Loads the scores of all the (prefetched) submissions belonging to groups.
+    """
+    if mutation_test_suite_preloader is None:
+        mutation_test_suite_preloader = MutationTestSuitePreLoader(project)
+
+    return get_submission_scores(
+        project,
+        (submission for group in groups for submission in group.submissions.all()),
+        fdbk_category,
+        ag_test_preloader,
+        mutation_test_suite_preloader,
+    )
+
+
+def _get_best_submission(group: Group, scores: Dict[int, SubmissionScore],
+                         username: Optional[str] = None) -> Optional[Submission]:
+    """
+    Returns the highest scoring of group's submissions, preferring the
+    most recent submission in the event of a tie.
+    """
+    best: Optional[Submission] = None
+    best_points: Union[int, Decimal] = 0
     for submission in group.submissions.all():
-        if user is not None and user.username in submission.does_not_count_for:
+        if username is not None and username in submission.does_not_count_for:
             continue
 
-        fdbk = SubmissionResultFeedback(
-            submission, fdbk_category, ag_test_preloader, mutation_test_suite_preloader)
-        if best is None or fdbk.total_points > best.total_points:
-            best = fdbk
+        points = scores[submission.pk].get_total_points()
+        if best is None or points > best_points:
+            best = submission
+            best_points = points
 
     return best
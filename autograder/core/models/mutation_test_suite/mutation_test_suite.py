@@ -169,6 +169,7 @@ class MutationTestSuite(AutograderModel):
 
     STUDENT_TEST_NAME_PLACEHOLDER = r'${student_test_name}'
     ALL_STUDENT_TEST_NAMES_PLACEHOLDER = r'${all_valid_test_names}'
+    ALL_DISCOVERED_TEST_NAMES_PLACEHOLDER = r'${all_discovered_test_names}'
     BUGGY_IMPL_NAME_PLACEHOLDER = r'${buggy_impl_name}'
 
     name = models.CharField(
@@ -190,6 +191,16 @@ class MutationTestSuite(AutograderModel):
         help_text="""When True, project files needed for this suite will be read-only when this
                      suite is graded.""")
 
+    cache_instructor_files_in_image = models.BooleanField(
+        default=False,
+        help_text="""When True, the instructor files needed for this suite are added
+                     to a docker image derived from sandbox_docker_image, and that
+                     image is used to grade the suite. The derived image is built
+                     the first time it's needed and again whenever the suite's
+                     instructor files change. This saves copying the instructor
+                     files into the sandbox for every submission, which can take
+                     a while for suites with large instructor files.""")
+
     student_files_needed = models.ManyToManyField(
         ExpectedStudentFile,
         help_text='''Student-submitted files matching these patterns will be copied into the
@@ -243,16 +254,42 @@ class MutationTestSuite(AutograderModel):
     student_test_validity_check_command = ag_fields.ValidatedJSONField(
         Command,
         default=new_make_default_validity_check_command,
-        help_text="""This command will be run once for each detected student test case.
-                     An exit status of zero indicates that a student test case is valid,
-                     whereas a nonzero exit status indicates that a student test case
-                     is invalid.
-                     This command must contain the placeholder {} at least once. That
-                     placeholder will be replaced with the name of the student test case
-                     that is to be checked for validity.
-                     """.format(STUDENT_TEST_NAME_PLACEHOLDER)
+        help_text=f"""
+            This command must contain one of the placeholders {STUDENT_TEST_NAME_PLACEHOLDER}
+            or {ALL_DISCOVERED_TEST_NAMES_PLACEHOLDER}.
+            If the placeholder {STUDENT_TEST_NAME_PLACEHOLDER} is present, this command
+            will be run once for each detected student test case, and the placeholder
+            will be replaced with the name of the student test case that is to be
+            checked for validity. An exit status of zero indicates that a student test
+            case is valid, whereas a nonzero exit status indicates that a student test
+            case is invalid.
+            If the placeholder {ALL_DISCOVERED_TEST_NAMES_PLACEHOLDER} is present, this
+            command will be run once, and the placeholder will be replaced with the
+            individually-quoted names of all the detected student test cases.
+            The command should print the name of each valid test case on its own line
+            to stdout. Test cases whose names aren't printed are invalid, and if the
+            command times out, they are also considered to have timed out.
+            As with grade_buggy_impl_command, you may need to specify a higher time
+            limit with this strategy.
+        """.strip()
     )
 
+    max_concurrent_validity_checks = models.IntegerField(
+        default=1,
+        validators=[
+            MinValueValidator(1), MaxValueValidator(constants.MAX_CONCURRENT_VALIDITY_CHECKS)
+        ],
+        help_text=f'''The maximum number of student test cases whose validity may be
+                      checked at the same time inside the suite's sandbox when
+                      student_test_validity_check_command is run once per test case.
+                      Only increase this value if running the validity check
+                      command for different test cases at the same time is safe
+                      (i.e., the commands do not write the same files).
+                      The output of the validity checks is always recorded in the
+                      order that the test cases were detected in.
+                      Must be between 1 and {constants.MAX_CONCURRENT_VALIDITY_CHECKS}
+                      inclusive.''')
+
     grade_buggy_impl_command = ag_fields.ValidatedJSONField(
         Command,
         default=new_make_default_grade_buggy_impl_command,
@@ -283,6 +320,22 @@ class MutationTestSuite(AutograderModel):
         """.strip()
     )
 
+    max_concurrent_buggy_impls = models.IntegerField(
+        default=1,
+        validators=[
+            MinValueValidator(1), MaxValueValidator(constants.MAX_CONCURRENT_BUGGY_IMPLS)
+        ],
+        help_text=f'''The maximum number of buggy implementations that the student
+                      tests may be run against at the same time inside the suite's
+                      sandbox. Buggy implementations are graded one at a time when
+                      this value is 1. Only increase this value if running
+                      grade_buggy_impl_command for different buggy implementations
+                      at the same time is safe (i.e., the commands do not write
+                      the same files). The output of the buggy implementations is
+                      always recorded in the order of buggy_impl_names.
+                      Must be between 1 and {constants.MAX_CONCURRENT_BUGGY_IMPLS}
+                      inclusive.''')
+
     points_per_exposed_bug = models.DecimalField(
         decimal_places=2, max_digits=4,
         default=0, validators=[MinValueValidator(0)],
@@ -377,10 +430,14 @@ class MutationTestSuite(AutograderModel):
             if cmd is None:
                 continue
 
-        if self.STUDENT_TEST_NAME_PLACEHOLDER not in self.student_test_validity_check_command.cmd:
+        validity_check_cmd = self.student_test_validity_check_command.cmd
+        if not (self.STUDENT_TEST_NAME_PLACEHOLDER in validity_check_cmd
+                or self.ALL_DISCOVERED_TEST_NAMES_PLACEHOLDER in validity_check_cmd):
             errors['student_test_validity_check_command'] = (
-                'Validity check command missing placeholder "{}"'.format(
-                    self.STUDENT_TEST_NAME_PLACEHOLDER))
+                'Validity check command must include one of the following placeholders: '
+                f'"{self.STUDENT_TEST_NAME_PLACEHOLDER}", '
+                f'"{self.ALL_DISCOVERED_TEST_NAMES_PLACEHOLDER}"'
+            )
 
         contains_one_test_placeholder = (
             self.STUDENT_TEST_NAME_PLACEHOLDER in self.grade_buggy_impl_command.cmd)
@@ -408,6 +465,7 @@ class MutationTestSuite(AutograderModel):
 
         'instructor_files_needed',
         'read_only_instructor_files',
+        'cache_instructor_files_in_image',
         'student_files_needed',
         'buggy_impl_names',
 
@@ -417,7 +475,9 @@ class MutationTestSuite(AutograderModel):
         'test_name_discovery_whitespace_handling',
         'max_num_student_tests',
         'student_test_validity_check_command',
+        'max_concurrent_validity_checks',
         'grade_buggy_impl_command',
+        'max_concurrent_buggy_impls',
 
         'points_per_exposed_bug',
         'max_points',
@@ -439,6 +499,7 @@ class MutationTestSuite(AutograderModel):
 
         'instructor_files_needed',
         'read_only_instructor_files',
+        'cache_instructor_files_in_image',
         'student_files_needed',
         'buggy_impl_names',
 
@@ -448,7 +509,9 @@ class MutationTestSuite(AutograderModel):
         'test_name_discovery_whitespace_handling',
         'max_num_student_tests',
         'student_test_validity_check_command',
+        'max_concurrent_validity_checks',
         'grade_buggy_impl_command',
+        'max_concurrent_buggy_impls',
 
         'points_per_exposed_bug',
         'max_points',
@@ -23,6 +23,16 @@ if TYPE_CHECKING:
     from autograder.core.submission_feedback import MutationTestSuitePreLoader
 
 
+class MutantTestOutcome(models.TextChoices):
+    # The student test failed when run against the buggy impl.
+    exposed = 'exposed'
+    # The student test timed out when run against the buggy impl.
+    # Like exposed, this counts as exposing the buggy impl.
+    timed_out = 'timed_out'
+    # The student test passed when run against the buggy impl.
+    not_exposed = 'not_exposed'
+
+
 def _make_get_test_names_result_default() -> int:
     return cast(int, AGCommandResult.objects.validate_and_create().pk)
 
@@ -62,6 +72,16 @@ class MutationTestSuiteResult(AutograderModel):
         help_text="""The names of instructor buggy implementations that were exposed
                      by the student's test cases.""")
 
+    kill_matrix = models.JSONField(
+        blank=True, default=dict,
+        help_text="""A mapping of buggy impl names to dictionaries that map valid
+                     student test names to the MutantTestOutcome of running that
+                     test against that buggy impl.
+                     Once a buggy impl is exposed, the remaining tests aren't run
+                     against it, so those tests are absent from its dictionary.
+                     This is only recorded when the suite's grade_buggy_impl_command
+                     runs one student test at a time, and it is empty otherwise.""")
+
     setup_result = models.OneToOneField(
         AGCommandResult,
         on_delete=models.PROTECT,
@@ -91,6 +111,28 @@ class MutationTestSuiteResult(AutograderModel):
         return os.path.join(core_ut.get_result_output_dir(self.submission),
                             'student_suite_result_{}_grade_buggy_impls_stderr'.format(self.pk))
 
+    def get_undetected_bugs(self) -> List[str]:
+        """
+        Returns the names of the suite's buggy impls that the student
+        tests were run against but didn't expose, in buggy_impl_names
+        order. When the kill matrix is available, buggy impls that
+        were added to the suite after this result was graded are
+        excluded, since the student tests were never run against them.
+        """
+        if self.kill_matrix:
+            return [
+                bug for bug in self.mutation_test_suite.buggy_impl_names
+                if bug in self.kill_matrix and not any(
+                    outcome != MutantTestOutcome.not_exposed
+                    for outcome in self.kill_matrix[bug].values()
+                )
+            ]
+
+        return [
+            bug for bug in self.mutation_test_suite.buggy_impl_names
+            if bug not in self.bugs_exposed
+        ]
+
     def save(self, *args: Any, **kwargs: Any) -> None:
         is_create = self.pk is None
         super().save(*args, **kwargs)
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+import bisect
 import datetime
 import fnmatch
 import os
+from collections import defaultdict
 from datetime import timedelta
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Final, Iterable, List, Optional, Sequence
+from typing import TYPE_CHECKING, Any, Dict, Final, Iterable, List, Optional, Sequence
 
 import django.contrib.postgres.fields as pg_fields
 from django.contrib.postgres import fields as pg_fields
@@ -13,7 +15,7 @@ from django.core import exceptions
 from django.core.files import File
 from django.core.files.uploadedfile import UploadedFile
 from django.db import models, transaction
-from django.db.models import Prefetch
+from django.db.models import Prefetch, Q
 from django.db.models.query import QuerySet
 from django.utils import timezone
 
@@ -127,6 +129,14 @@ class Submission(ag_model_base.AutograderModel):
 
     class Meta:
         ordering = ['-pk']
+        indexes = [
+            # Used to compute position_in_queue
+            models.Index(
+                fields=['project', 'id'],
+                name='core_submission_queued_idx',
+                condition=Q(status='queued'),
+            ),
+        ]
 
     class GradingStatus(models.TextChoices):
         # The submission has been accepted and saved to the database
@@ -312,12 +322,73 @@ class Submission(ag_model_base.AutograderModel):
         if self.status != Submission.GradingStatus.queued:
             return 0
 
+        if self._position_in_queue is not None:
+            return self._position_in_queue
+
         return Submission.objects.filter(
             status=Submission.GradingStatus.queued,
-            group__project=self.group.project,
+            project=self.project_id,
             pk__lte=self.pk
         ).count()
 
+    # Set by load_positions_in_queue()
+    _position_in_queue: Optional[int] = None
+
+    @staticmethod
+    def load_positions_in_queue(submissions: Iterable[Submission]) -> None:
+        """
+        Computes position_in_queue for each of the given submissions
+        with one query per project (rather than one query per queued
+        submission). Call this before serializing many submissions.
+
+        The loaded positions are stored on the submission objects and
+        aren't updated afterwards, so only call this on submissions
+        that are about to be serialized.
+        """
+        queued_by_project: Dict[int, List[Submission]] = defaultdict(list)
+        for submission in submissions:
+            if submission.status == Submission.GradingStatus.queued:
+                queued_by_project[submission.project_id].append(submission)
+
+        for project_pk, project_submissions in queued_by_project.items():
+            queued_pks = list(
+                Submission.objects.filter(
+                    status=Submission.GradingStatus.queued,
+                    project=project_pk,
+                    pk__lte=max(submission.pk for submission in project_submissions)
+                ).order_by('pk').values_list('pk', flat=True)
+            )
+            for submission in project_submissions:
+                submission._position_in_queue = bisect.bisect_right(queued_pks, submission.pk)
+
+    @staticmethod
+    def load_denormalized_ag_test_results(submissions: Iterable[Submission]) -> None:
+        """
+        Loads denormalized_ag_test_results for those of the given
+        submissions that were loaded with that field deferred, using
+        one query (rather than one query per submission).
+
+        denormalized_ag_test_results can be very large, so querysets
+        that usually only need submissions' point totals (which can be
+        loaded from SubmissionScores) should defer it and call this for
+        the submissions whose results turn out to be needed.
+        """
+        # A submission can appear more than once (possibly as different
+        # objects), so the values are lists.
+        to_load: Dict[int, List[Submission]] = defaultdict(list)
+        for submission in submissions:
+            if 'denormalized_ag_test_results' in submission.get_deferred_fields():
+                to_load[submission.pk].append(submission)
+
+        if not to_load:
+            return
+
+        for pk, results in Submission.objects.filter(
+            pk__in=to_load
+        ).values_list('pk', 'denormalized_ag_test_results'):
+            for submission in to_load[pk]:
+                submission.denormalized_ag_test_results = results
+
     @property
     def _time_spent_in_queue(self) -> Optional[timedelta]:
         if self.grading_start_time is None:
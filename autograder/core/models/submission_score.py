@@ -0,0 +1,103 @@
+from decimal import Decimal
+from typing import Dict, Union, cast
+
+from django.db import models
+
+from .ag_model_base import AutograderModel, AutograderModelManager
+from .ag_test.feedback_category import FeedbackCategory
+from .submission import Submission
+
+
+class SubmissionScore(AutograderModel):
+    """
+    The points a Submission earned with a particular FeedbackCategory.
+    These are computed when a submission finishes grading or is rerun
+    (see autograder.core.submission_scores) so that scores can be
+    compared and listed without evaluating submission feedback.
+    """
+    objects = AutograderModelManager['SubmissionScore']()
+
+    class Meta:
+        unique_together = ('submission', 'fdbk_category')
+
+    submission = models.ForeignKey(
+        Submission, related_name='scores', on_delete=models.CASCADE,
+        help_text='The Submission this score belongs to.')
+
+    fdbk_category = models.TextField(
+        choices=[(category.value, category.value) for category in FeedbackCategory],
+        help_text='The FeedbackCategory the points were computed with.')
+
+    scoring_config_fingerprint = models.TextField(
+        help_text="""A hash of the project's test configuration at the time the
+                     points were computed. A score whose fingerprint doesn't
+                     match the project's current fingerprint is out of date.""")
+
+    total_points = models.DecimalField(max_digits=12, decimal_places=2)
+    total_points_possible = models.DecimalField(max_digits=12, decimal_places=2)
+
+    points_data = models.JSONField(
+        default=dict,
+        help_text="""The exact point totals (as strings) for the submission
+        and for each of its suites.
+
+        Data format:
+        {
+            "total_points": <str>,
+            "total_points_possible": <str>,
+            "ag_test_suites": {
+                "<ag_test_suite_pk>": {
+                    "total_points": <str>,
+                    "total_points_possible": <str>
+                },
+                ...
+            },
+            "mutation_test_suites": {
+                "<mutation_test_suite_pk>": {
+                    "total_points": <str>,
+                    "total_points_possible": <str>
+                },
+                ...
+            }
+        }""")
+
+    def get_total_points(self) -> Union[int, Decimal]:
+        """
+        Returns the same value (and type) as the corresponding
+        SubmissionResultFeedback.total_points.
+        """
+        return _parse_points(cast(str, self.points_data['total_points']))
+
+    def get_total_points_possible(self) -> Union[int, Decimal]:
+        """
+        Returns the same value (and type) as the corresponding
+        SubmissionResultFeedback.total_points_possible.
+        """
+        return _parse_points(cast(str, self.points_data['total_points_possible']))
+
+    def get_ag_test_suite_points(self) -> Dict[int, Dict[str, Union[int, Decimal]]]:
+        return _parse_suite_points(
+            cast(Dict[str, Dict[str, str]], self.points_data['ag_test_suites']))
+
+    def get_mutation_test_suite_points(self) -> Dict[int, Dict[str, Union[int, Decimal]]]:
+        return _parse_suite_points(
+            cast(Dict[str, Dict[str, str]], self.points_data['mutation_test_suites']))
+
+
+def _parse_points(points: str) -> Union[int, Decimal]:
+    """
+    Inverse of str() for the int and Decimal point values produced by
+    submission feedback.
+    """
+    if '.' in points:
+        return Decimal(points)
+    return int(points)
+
+
+def _parse_suite_points(
+    suite_points: Dict[str, Dict[str, str]]
+) -> Dict[int, Dict[str, Union[int, Decimal]]]:
+    return {
+        int(suite_pk): {key: _parse_points(value) for key, value in points.items()}
+        for suite_pk, points in suite_points.items()
+    }
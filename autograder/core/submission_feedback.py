@@ -1,21 +1,27 @@
 from __future__ import annotations
 
+import json
 import os
 import tempfile
+from contextlib import contextmanager
 from decimal import Decimal
 from pathlib import Path
 from typing import (
-    BinaryIO, Dict, Iterable, List, Mapping, Optional, Protocol, Sequence, TypedDict, Union, cast
+    BinaryIO, Dict, Iterable, Iterator, List, Mapping, Optional, Protocol, Sequence, TypedDict,
+    Union, cast
 )
 
-from django.db import transaction
+from django.db import connection, transaction
 from django.db.models import Prefetch
+from django.utils import timezone
 from django.utils.functional import cached_property
 
-from autograder.core.models import AGTestCommandResult, MutationTestSuiteResult, Submission
+from autograder.core.models import (
+    AGTestCommandResult, MutationTestSuiteResult, Submission, SubmissionScore)
 from autograder.core.models.ag_model_base import ToDictMixin
 from autograder.core.models.ag_test.ag_test_case import AGTestCase, AGTestCaseFeedbackConfig
-from autograder.core.models.ag_test.ag_test_case_result import AGTestCaseResult
+from autograder.core.models.ag_test.ag_test_case_result import (
+    AGTestCaseResult, get_denormalized_ag_test_command_results)
 from autograder.core.models.ag_test.ag_test_command import (
     AGTestCommand, AGTestCommandFeedbackConfig, ExpectedOutputSource, ExpectedReturnCode,
     ValueFeedbackLevel
@@ -104,8 +110,10 @@ class AGTestSuiteResultDict(TypedDict):
     ag_test_case_results: Dict[PkStr, AGTestCaseResultDict]
 
 
-class AGTestCaseResultDict(TypedDict):
+class AGTestCaseResultDict(TypedDict, total=False):
     ag_test_command_results: Dict[PkStr, Dict[str, object]]
+    # See AGTestCaseResult.to_dict()
+    compact_ag_test_command_results: Dict[str, List[object]]
 
 
 class DenormalizedAGTestSuiteResult:
@@ -161,8 +169,13 @@ class AGTestSuiteResultProtocol(Protocol):
 
 
 class SerializedAGTestSuiteResultWrapper:
-    def __init__(self, suite_result_dict: Mapping[str, object]):
+    def __init__(self, suite_result_dict: Mapping[str, object], submission: Submission):
+        """
+        :param submission: The submission the result belongs to, used
+            to compute output filenames without loading the result.
+        """
         self._suite_result_dict = suite_result_dict
+        self._submission = submission
 
     @property
     def pk(self) -> int:
@@ -196,15 +209,11 @@ class SerializedAGTestSuiteResultWrapper:
 
     @property
     def setup_stdout_filename(self) -> str:
-        return self._ag_test_suite_result.setup_stdout_filename
+        return AGTestSuiteResult.get_setup_stdout_filename(self._submission, self.pk)
 
     @property
     def setup_stderr_filename(self) -> str:
-        return self._ag_test_suite_result.setup_stderr_filename
-
-    @cached_property
-    def _ag_test_suite_result(self) -> AGTestSuiteResult:
-        return AGTestSuiteResult.objects.get(pk=self.pk)
+        return AGTestSuiteResult.get_setup_stderr_filename(self._submission, self.pk)
 
 
 class AGTestCaseResultProtocol(Protocol):
@@ -287,10 +296,23 @@ class AGTestCommandResultProtocol(Protocol):
     def stderr_filename(self) -> str:
         ...
 
+    @property
+    def stdout_diff_cache_filename(self) -> str:
+        ...
+
+    @property
+    def stderr_diff_cache_filename(self) -> str:
+        ...
+
 
 class SerializedAGTestCommandResultWrapper:
-    def __init__(self, cmd_result_dict: Dict[str, object]):
+    def __init__(self, cmd_result_dict: Mapping[str, object], submission: Submission):
+        """
+        :param submission: The submission the result belongs to, used
+            to compute output filenames without loading the result.
+        """
         self._cmd_result_dict = cmd_result_dict
+        self._submission = submission
 
     @property
     def pk(self) -> int:
@@ -336,15 +358,19 @@ class SerializedAGTestCommandResultWrapper:
 
     @property
     def stdout_filename(self) -> str:
-        return self._ag_test_command_result.stdout_filename
+        return AGTestCommandResult.get_stdout_filename(self._submission, self.pk)
 
     @property
     def stderr_filename(self) -> str:
-        return self._ag_test_command_result.stderr_filename
+        return AGTestCommandResult.get_stderr_filename(self._submission, self.pk)
 
-    @cached_property
-    def _ag_test_command_result(self) -> AGTestCommandResult:
-        return AGTestCommandResult.objects.get(pk=self.pk)
+    @property
+    def stdout_diff_cache_filename(self) -> str:
+        return self.stdout_filename + '_diff'
+
+    @property
+    def stderr_diff_cache_filename(self) -> str:
+        return self.stderr_filename + '_diff'
 
 
 def _deserialize_denormed_ag_test_results(
@@ -353,10 +379,11 @@ def _deserialize_denormed_ag_test_results(
     result = []
     data = cast(Dict[PkStr, AGTestSuiteResultDict], submission.denormalized_ag_test_results)
     for serialized_suite_result in data.values():
-        deserialized_suite_result = SerializedAGTestSuiteResultWrapper(serialized_suite_result)
+        deserialized_suite_result = SerializedAGTestSuiteResultWrapper(
+            serialized_suite_result, submission)
 
         case_results = [
-            _deserialize_denormed_ag_test_case_result(case_result)
+            _deserialize_denormed_ag_test_case_result(case_result, submission)
             for case_result in serialized_suite_result['ag_test_case_results'].values()
         ]
 
@@ -366,22 +393,22 @@ def _deserialize_denormed_ag_test_results(
 
 
 def _deserialize_denormed_ag_test_case_result(
-    case_result: AGTestCaseResultDict
+    case_result: AGTestCaseResultDict, submission: Submission
 ) -> DenormalizedAGTestCaseResult:
     deserialized_case_result = SerializedAGTestCaseResultWrapper(case_result)
 
     cmd_results = [
-        _deserialize_denormed_ag_test_cmd_result(cmd_result)
-        for cmd_result in case_result['ag_test_command_results'].values()
+        _deserialize_denormed_ag_test_cmd_result(cmd_result, submission)
+        for cmd_result in get_denormalized_ag_test_command_results(case_result)
     ]
 
     return DenormalizedAGTestCaseResult(deserialized_case_result, cmd_results)
 
 
 def _deserialize_denormed_ag_test_cmd_result(
-    cmd_result: Dict[str, object]
+    cmd_result: Mapping[str, object], submission: Submission
 ) -> SerializedAGTestCommandResultWrapper:
-    return SerializedAGTestCommandResultWrapper(cmd_result)
+    return SerializedAGTestCommandResultWrapper(cmd_result, submission)
 
 
 @transaction.atomic()
@@ -416,21 +443,91 @@ def update_denormalized_ag_test_results(submission_pk: int) -> Submission:
     return submission
 
 
+def save_denormalized_ag_test_suite_result(
+    submission_pk: int,
+    ag_test_suite_result: AGTestSuiteResult
+) -> None:
+    """
+    Writes the denormalized form of ag_test_suite_result (including
+    its test case results) into the denormalized_ag_test_results field
+    of the submission with the given primary key.
+
+    This is done with a single UPDATE statement that patches only the
+    suite's entry, so the rest of the (potentially large) field is
+    neither loaded nor rewritten by Python code and no row lock is
+    held outside of that statement.
+    """
+    _patch_denormalized_ag_test_results(
+        submission_pk,
+        [str(ag_test_suite_result.ag_test_suite_id)],
+        ag_test_suite_result.to_dict()
+    )
+
+
+def save_denormalized_ag_test_case_result(
+    submission_pk: int,
+    ag_test_suite_pk: int,
+    ag_test_case_result: AGTestCaseResult
+) -> None:
+    """
+    Writes the denormalized form of ag_test_case_result into the
+    denormalized_ag_test_results field of the submission with the given
+    primary key. See save_denormalized_ag_test_suite_result for details.
+
+    The result of the AGTestSuite with primary key ag_test_suite_pk
+    must already have been saved with save_denormalized_ag_test_suite_result.
+    If it hasn't (e.g., because the suite was deleted), this function
+    does nothing.
+    """
+    _patch_denormalized_ag_test_results(
+        submission_pk,
+        [str(ag_test_suite_pk), 'ag_test_case_results', str(ag_test_case_result.ag_test_case_id)],
+        ag_test_case_result.to_dict()
+    )
+
+
+def _patch_denormalized_ag_test_results(
+    submission_pk: int, path: List[str], value: Dict[str, object]
+) -> None:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            '''UPDATE core_submission
+               SET denormalized_ag_test_results =
+                    jsonb_set(denormalized_ag_test_results, %s::text[], %s::jsonb, true),
+                   last_modified = %s
+               WHERE core_submission.id = %s
+            ''',
+            (path, json.dumps(value), timezone.now(), submission_pk)
+        )
+
+
 class SubmissionResultFeedback(ToDictMixin):
     def __init__(self, submission: Submission,
                  fdbk_category: FeedbackCategory,
                  ag_test_preloader: AGTestPreLoader,
-                 mutation_test_suite_preloader: Optional[MutationTestSuitePreLoader] = None):
+                 mutation_test_suite_preloader: Optional[MutationTestSuitePreLoader] = None,
+                 *, score: Optional[SubmissionScore] = None):
+        """
+        :param score: An up to date SubmissionScore of submission for
+            fdbk_category. If provided, total_points and
+            total_points_possible are read from it instead of being
+            computed from submission's results, so that submission can
+            be loaded with its denormalized_ag_test_results deferred
+            when only those totals are needed.
+        """
         self._submission = submission
         self._fdbk_category = fdbk_category
         self._project = self._submission.group.project
+        self._score = score
 
         self._ag_test_loader = ag_test_preloader
         self._mutation_test_suite_preloader = (
             mutation_test_suite_preloader if mutation_test_suite_preloader is not None
             else MutationTestSuitePreLoader(self._project))
 
-        self._ag_test_suite_results = _deserialize_denormed_ag_test_results(self._submission)
+    @cached_property
+    def _ag_test_suite_results(self) -> List[DenormalizedAGTestSuiteResult]:
+        return _deserialize_denormed_ag_test_results(self._submission)
 
     @property
     def ag_test_preloader(self) -> AGTestPreLoader:
@@ -450,6 +547,9 @@ class SubmissionResultFeedback(ToDictMixin):
 
     @cached_property
     def total_points(self) -> Union[int, Decimal]:
+        if self._score is not None:
+            return self._score.get_total_points()
+
         ag_suite_points = sum((
             ag_test_suite_result.total_points
             for ag_test_suite_result in self.ag_test_suite_results
@@ -463,6 +563,9 @@ class SubmissionResultFeedback(ToDictMixin):
 
     @cached_property
     def total_points_possible(self) -> Union[int, Decimal]:
+        if self._score is not None:
+            return self._score.get_total_points_possible()
+
         ag_suite_points = sum((
             ag_test_suite_result.total_points_possible
             for ag_test_suite_result in self.ag_test_suite_results
@@ -1007,41 +1110,46 @@ class AGTestCommandResultFeedback(ToDictMixin):
 
     @property
     def stdout_diff(self) -> Optional[core_ut.DiffResult]:
-        if (self._cmd.expected_stdout_source == ExpectedOutputSource.none
-                or self._fdbk.stdout_fdbk_level != ValueFeedbackLevel.expected_and_actual):
+        if not self._show_stdout_diff:
             return None
 
-        stdout_filename = self._ag_test_command_result.stdout_filename
-        diff_whitespace_kwargs = {
-            'ignore_blank_lines': self._cmd.ignore_blank_lines,
-            'ignore_case': self._cmd.ignore_case,
-            'ignore_whitespace': self._cmd.ignore_whitespace,
-            'ignore_whitespace_changes': self._cmd.ignore_whitespace_changes
-        }
+        with self._expected_stdout_filename() as expected_stdout_filename:
+            return core_ut.get_cached_diff(
+                expected_stdout_filename,
+                self._ag_test_command_result.stdout_filename,
+                self._ag_test_command_result.stdout_diff_cache_filename,
+                **self._diff_options)
+
+    def get_stdout_diff_size(self) -> Optional[int]:
+        if not self._show_stdout_diff:
+            return None
+
+        with self._expected_stdout_filename() as expected_stdout_filename:
+            return core_ut.get_cached_diff_size(
+                expected_stdout_filename,
+                self._ag_test_command_result.stdout_filename,
+                self._ag_test_command_result.stdout_diff_cache_filename,
+                **self._diff_options)
 
-        # check source and return diff
+    @property
+    def _show_stdout_diff(self) -> bool:
+        return (self._cmd.expected_stdout_source != ExpectedOutputSource.none
+                and self._fdbk.stdout_fdbk_level == ValueFeedbackLevel.expected_and_actual)
+
+    @contextmanager
+    def _expected_stdout_filename(self) -> Iterator[str]:
         if self._cmd.expected_stdout_source == ExpectedOutputSource.text:
             with tempfile.NamedTemporaryFile('w') as expected_stdout:
                 expected_stdout.write(self._cmd.expected_stdout_text)
                 expected_stdout.flush()
-                return core_ut.get_diff(expected_stdout.name, stdout_filename,
-                                        **diff_whitespace_kwargs)
+                yield expected_stdout.name
         elif self._cmd.expected_stdout_source == ExpectedOutputSource.instructor_file:
             assert self._cmd.expected_stdout_instructor_file is not None
-            return core_ut.get_diff(self._cmd.expected_stdout_instructor_file.abspath,
-                                    stdout_filename,
-                                    **diff_whitespace_kwargs)
+            yield self._cmd.expected_stdout_instructor_file.abspath
         else:
             raise ValueError(
                 'Invalid expected stdout source: {}'.format(self._cmd.expected_stdout_source))
 
-    def get_stdout_diff_size(self) -> Optional[int]:
-        diff = self.stdout_diff
-        if diff is None:
-            return None
-
-        return sum((len(line) for line in diff.diff_content))
-
     @property
     def stdout_points(self) -> int:
         if self.stdout_correct is None:
@@ -1101,39 +1209,54 @@ class AGTestCommandResultFeedback(ToDictMixin):
 
     @property
     def stderr_diff(self) -> Optional[core_ut.DiffResult]:
-        if (self._cmd.expected_stderr_source == ExpectedOutputSource.none
-                or self._fdbk.stderr_fdbk_level != ValueFeedbackLevel.expected_and_actual):
+        if not self._show_stderr_diff:
             return None
 
-        stderr_filename = self._ag_test_command_result.stderr_filename
-        diff_whitespace_kwargs = {
-            'ignore_blank_lines': self._cmd.ignore_blank_lines,
-            'ignore_case': self._cmd.ignore_case,
-            'ignore_whitespace': self._cmd.ignore_whitespace,
-            'ignore_whitespace_changes': self._cmd.ignore_whitespace_changes
-        }
+        with self._expected_stderr_filename() as expected_stderr_filename:
+            return core_ut.get_cached_diff(
+                expected_stderr_filename,
+                self._ag_test_command_result.stderr_filename,
+                self._ag_test_command_result.stderr_diff_cache_filename,
+                **self._diff_options)
+
+    def get_stderr_diff_size(self) -> Optional[int]:
+        if not self._show_stderr_diff:
+            return None
+
+        with self._expected_stderr_filename() as expected_stderr_filename:
+            return core_ut.get_cached_diff_size(
+                expected_stderr_filename,
+                self._ag_test_command_result.stderr_filename,
+                self._ag_test_command_result.stderr_diff_cache_filename,
+                **self._diff_options)
+
+    @property
+    def _show_stderr_diff(self) -> bool:
+        return (self._cmd.expected_stderr_source != ExpectedOutputSource.none
+                and self._fdbk.stderr_fdbk_level == ValueFeedbackLevel.expected_and_actual)
 
+    @contextmanager
+    def _expected_stderr_filename(self) -> Iterator[str]:
         if self._cmd.expected_stderr_source == ExpectedOutputSource.text:
             with tempfile.NamedTemporaryFile('w') as expected_stderr:
                 expected_stderr.write(self._cmd.expected_stderr_text)
                 expected_stderr.flush()
-                return core_ut.get_diff(expected_stderr.name, stderr_filename,
-                                        **diff_whitespace_kwargs)
+                yield expected_stderr.name
         elif self._cmd.expected_stderr_source == ExpectedOutputSource.instructor_file:
             assert self._cmd.expected_stderr_instructor_file is not None
-            return core_ut.get_diff(self._cmd.expected_stderr_instructor_file.abspath,
-                                    stderr_filename,
-                                    **diff_whitespace_kwargs)
+            yield self._cmd.expected_stderr_instructor_file.abspath
         else:
             raise ValueError(
-                'Invalid expected stderr source: {}'.format(self._cmd.expected_stdout_source))
+                'Invalid expected stderr source: {}'.format(self._cmd.expected_stderr_source))
 
-    def get_stderr_diff_size(self) -> Optional[int]:
-        diff = self.stderr_diff
-        if diff is None:
-            return None
-
-        return sum((len(line) for line in diff.diff_content))
+    @property
+    def _diff_options(self) -> Dict[str, bool]:
+        return {
+            'ignore_blank_lines': self._cmd.ignore_blank_lines,
+            'ignore_case': self._cmd.ignore_case,
+            'ignore_whitespace': self._cmd.ignore_whitespace,
+            'ignore_whitespace_changes': self._cmd.ignore_whitespace_changes
+        }
 
     @property
     def stderr_points(self) -> int:
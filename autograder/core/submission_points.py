@@ -0,0 +1,302 @@
+"""
+Computes the point totals that SubmissionResultFeedback would report
+for many submissions at once, without building a feedback object tree
+for each submission.
+"""
+
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union, cast
+
+from autograder.core.models import Submission
+from autograder.core.models.ag_test.ag_test_case import AGTestCase, AGTestCaseFeedbackConfig
+from autograder.core.models.ag_test.ag_test_case_result import (
+    get_denormalized_ag_test_command_results)
+from autograder.core.models.ag_test.ag_test_command import (
+    AGTestCommand, AGTestCommandFeedbackConfig, ExpectedOutputSource, ExpectedReturnCode,
+    ValueFeedbackLevel
+)
+from autograder.core.models.ag_test.ag_test_suite import AGTestSuite, AGTestSuiteFeedbackConfig
+from autograder.core.models.ag_test.feedback_category import FeedbackCategory
+
+from .submission_feedback import AGTestPreLoader, MutationTestSuitePreLoader, PkStr
+
+
+class AGTestCasePoints:
+    def __init__(self, ag_test_case_pk: int, total_points: int, total_points_possible: int):
+        self.ag_test_case_pk = ag_test_case_pk
+        self.total_points = total_points
+        self.total_points_possible = total_points_possible
+
+
+class AGTestSuitePoints:
+    def __init__(self, ag_test_suite_pk: int, total_points: int, total_points_possible: int,
+                 ag_test_case_points: List[AGTestCasePoints]):
+        self.ag_test_suite_pk = ag_test_suite_pk
+        self.total_points = total_points
+        self.total_points_possible = total_points_possible
+        # The points of the suite's visible test cases, in test case order.
+        self.ag_test_case_points = ag_test_case_points
+
+
+class MutationTestSuitePoints:
+    def __init__(self, mutation_test_suite_pk: int,
+                 total_points: Decimal, total_points_possible: Decimal):
+        self.mutation_test_suite_pk = mutation_test_suite_pk
+        self.total_points = total_points
+        self.total_points_possible = total_points_possible
+
+
+class SubmissionPoints:
+    def __init__(self, submission: Submission,
+                 total_points: Union[int, Decimal],
+                 total_points_possible: Union[int, Decimal],
+                 ag_test_suite_points: List[AGTestSuitePoints],
+                 mutation_test_suite_points: List[MutationTestSuitePoints]):
+        self.submission = submission
+        self.total_points = total_points
+        self.total_points_possible = total_points_possible
+        # The points of the submission's visible suites, in suite order.
+        self.ag_test_suite_points = ag_test_suite_points
+        self.mutation_test_suite_points = mutation_test_suite_points
+
+
+# The points a command result can earn, given its feedback config:
+# ((correctness field, points if correct, points if incorrect), ...).
+# None if the command result earns no points (it's hidden or its points aren't shown).
+_CommandPointsTable = Optional[Tuple[Tuple[str, int, int], ...]]
+
+
+class SubmissionPointsCalculator:
+    """
+    Computes the same point totals as SubmissionResultFeedback (and
+    its suite and test case feedback objects) directly from
+    submissions' denormalized AG test results.
+
+    The points each command can earn under fdbk_category are looked up
+    once per command and reused for every submission, so computing
+    totals for a large number of submissions is much cheaper than
+    evaluating SubmissionResultFeedback.total_points for each of them.
+    """
+
+    def __init__(self, fdbk_category: FeedbackCategory,
+                 ag_test_preloader: AGTestPreLoader,
+                 mutation_test_suite_preloader: MutationTestSuitePreLoader):
+        self._fdbk_category = fdbk_category
+        self._ag_test_preloader = ag_test_preloader
+        self._mutation_test_suite_preloader = mutation_test_suite_preloader
+
+        # Keys are (command pk, is in first failed test)
+        self._cmd_points_tables: Dict[Tuple[int, bool], _CommandPointsTable] = {}
+
+    @property
+    def fdbk_category(self) -> FeedbackCategory:
+        return self._fdbk_category
+
+    def get_points(self, submission: Submission) -> SubmissionPoints:
+        """
+        Computes the points for submission. submission's mutation test
+        suite results should be prefetched (see get_submissions_with_results_queryset).
+        """
+        data = cast(
+            Dict[PkStr, Mapping[str, object]], submission.denormalized_ag_test_results)
+        ag_test_suite_points: List[Tuple[int, AGTestSuitePoints]] = []
+        for suite_result in data.values():
+            try:
+                suite_order, suite_points = self._get_ag_test_suite_points(suite_result)
+            except KeyError:
+                # See SubmissionResultFeedback.ag_test_suite_results
+                continue
+
+            if suite_points is not None:
+                ag_test_suite_points.append((suite_order, suite_points))
+
+        ag_test_suite_points.sort(key=lambda item: item[0])
+
+        mutation_test_suite_points = []
+        for result in submission.mutation_test_suite_results.all():
+            fdbk = result.get_fdbk(self._fdbk_category, self._mutation_test_suite_preloader)
+            if fdbk.fdbk_conf.visible:
+                mutation_test_suite_points.append(MutationTestSuitePoints(
+                    fdbk.mutation_test_suite_pk, fdbk.total_points, fdbk.total_points_possible))
+
+        return SubmissionPoints(
+            submission,
+            (sum(points.total_points for _, points in ag_test_suite_points)
+             + sum(points.total_points for points in mutation_test_suite_points)),
+            (sum(points.total_points_possible for _, points in ag_test_suite_points)
+             + sum(points.total_points_possible for points in mutation_test_suite_points)),
+            [points for _, points in ag_test_suite_points],
+            mutation_test_suite_points
+        )
+
+    def get_points_for_submissions(
+        self, submissions: Iterable[Submission]
+    ) -> Dict[int, SubmissionPoints]:
+        """
+        Returns a dictionary mapping the primary keys of submissions to
+        their points.
+        """
+        return {submission.pk: self.get_points(submission) for submission in submissions}
+
+    def _get_ag_test_suite_points(
+        self, suite_result: Mapping[str, object]
+    ) -> Tuple[int, Optional[AGTestSuitePoints]]:
+        """
+        Returns the order of the suite and its points, or None in place
+        of the points if the suite isn't visible.
+        """
+        suite = self._ag_test_preloader.get_ag_test_suite(
+            cast(int, suite_result['ag_test_suite_id']))
+        suite_order = cast(int, suite._order)  # type: ignore
+        if not self._get_suite_fdbk_config(suite).visible:
+            return suite_order, None
+
+        case_points: List[Tuple[int, AGTestCasePoints]] = []
+        first_failure_found = False
+        case_results = cast(
+            Dict[PkStr, Mapping[str, object]], suite_result['ag_test_case_results'])
+        for case_result in case_results.values():
+            try:
+                case = self._ag_test_preloader.get_ag_test_case(
+                    cast(int, case_result['ag_test_case_id']))
+            except KeyError:
+                continue
+
+            points, points_possible = self._get_ag_test_case_points(case_result, False)
+            # See AGTestSuiteResultFeedback._visible_ag_test_case_results
+            if (self._fdbk_category == FeedbackCategory.normal
+                    and not first_failure_found
+                    and points < points_possible):
+                first_failure_found = True
+                points, points_possible = self._get_ag_test_case_points(case_result, True)
+
+            if self._get_case_fdbk_config(case).visible:
+                case_points.append((
+                    case._order,  # type: ignore
+                    AGTestCasePoints(case.pk, points, points_possible)
+                ))
+
+        case_points.sort(key=lambda item: item[0])
+        return suite_order, AGTestSuitePoints(
+            suite.pk,
+            sum(points.total_points for _, points in case_points),
+            sum(points.total_points_possible for _, points in case_points),
+            [points for _, points in case_points]
+        )
+
+    def _get_ag_test_case_points(
+        self, case_result: Mapping[str, object], is_in_first_failed_test: bool
+    ) -> Tuple[int, int]:
+        points = 0
+        points_possible = 0
+        for cmd_result in get_denormalized_ag_test_command_results(case_result):
+            try:
+                points_table = self._get_cmd_points_table(
+                    cast(int, cmd_result['ag_test_command_id']), is_in_first_failed_test)
+            except KeyError:
+                continue
+
+            if points_table is None:
+                continue
+
+            for field, points_if_correct, points_if_incorrect in points_table:
+                correct = cmd_result[field]
+                # E.g., the expected output was added after the command was
+                # graded. See AGTestCommandResultFeedback.return_code_points
+                if correct is None:
+                    continue
+
+                points_possible += points_if_correct
+                points += points_if_correct if correct else points_if_incorrect
+
+        return max(0, points), points_possible
+
+    def _get_cmd_points_table(
+        self, cmd_pk: int, is_in_first_failed_test: bool
+    ) -> _CommandPointsTable:
+        key = (cmd_pk, is_in_first_failed_test)
+        if key not in self._cmd_points_tables:
+            cmd = self._ag_test_preloader.get_ag_test_cmd(cmd_pk)
+            self._cmd_points_tables[key] = _make_cmd_points_table(
+                cmd, self._get_cmd_fdbk_config(cmd, is_in_first_failed_test))
+
+        return self._cmd_points_tables[key]
+
+    def _get_suite_fdbk_config(self, suite: AGTestSuite) -> AGTestSuiteFeedbackConfig:
+        if self._fdbk_category == FeedbackCategory.normal:
+            return suite.normal_fdbk_config
+        elif self._fdbk_category == FeedbackCategory.ultimate_submission:
+            return suite.ultimate_submission_fdbk_config
+        elif self._fdbk_category == FeedbackCategory.past_limit_submission:
+            return suite.past_limit_submission_fdbk_config
+        elif self._fdbk_category == FeedbackCategory.staff_viewer:
+            return suite.staff_viewer_fdbk_config
+        elif self._fdbk_category == FeedbackCategory.max:
+            return AGTestSuiteFeedbackConfig()
+        else:
+            assert False, f'Unexpected feedback category: {self._fdbk_category}'
+
+    def _get_case_fdbk_config(self, case: AGTestCase) -> AGTestCaseFeedbackConfig:
+        if self._fdbk_category == FeedbackCategory.normal:
+            return case.normal_fdbk_config
+        elif self._fdbk_category == FeedbackCategory.ultimate_submission:
+            return case.ultimate_submission_fdbk_config
+        elif self._fdbk_category == FeedbackCategory.past_limit_submission:
+            return case.past_limit_submission_fdbk_config
+        elif self._fdbk_category == FeedbackCategory.staff_viewer:
+            return case.staff_viewer_fdbk_config
+        elif self._fdbk_category == FeedbackCategory.max:
+            return AGTestCaseFeedbackConfig()
+        else:
+            assert False, f'Unexpected feedback category: {self._fdbk_category}'
+
+    def _get_cmd_fdbk_config(
+        self, cmd: AGTestCommand, is_in_first_failed_test: bool
+    ) -> AGTestCommandFeedbackConfig:
+        if self._fdbk_category == FeedbackCategory.normal:
+            if is_in_first_failed_test and cmd.first_failed_test_normal_fdbk_config is not None:
+                return cmd.first_failed_test_normal_fdbk_config
+            return cmd.normal_fdbk_config
+        elif self._fdbk_category == FeedbackCategory.ultimate_submission:
+            return cmd.ultimate_submission_fdbk_config
+        elif self._fdbk_category == FeedbackCategory.past_limit_submission:
+            return cmd.past_limit_submission_fdbk_config
+        elif self._fdbk_category == FeedbackCategory.staff_viewer:
+            return cmd.staff_viewer_fdbk_config
+        elif self._fdbk_category == FeedbackCategory.max:
+            return AGTestCommandFeedbackConfig.max_fdbk_config()
+        else:
+            assert False, f'Unexpected feedback category: {self._fdbk_category}'
+
+
+def _make_cmd_points_table(
+    cmd: AGTestCommand, fdbk: AGTestCommandFeedbackConfig
+) -> _CommandPointsTable:
+    """
+    Mirrors the points computations in AGTestCommandResultFeedback.
+    """
+    if not fdbk.visible or not fdbk.show_points:
+        return None
+
+    columns: List[Tuple[str, int, int]] = []
+    if (cmd.expected_return_code != ExpectedReturnCode.none
+            and fdbk.return_code_fdbk_level != ValueFeedbackLevel.no_feedback):
+        columns.append((
+            'return_code_correct',
+            cmd.points_for_correct_return_code,
+            cmd.deduction_for_wrong_return_code
+        ))
+
+    if (cmd.expected_stdout_source != ExpectedOutputSource.none
+            and fdbk.stdout_fdbk_level != ValueFeedbackLevel.no_feedback):
+        columns.append(
+            ('stdout_correct', cmd.points_for_correct_stdout, cmd.deduction_for_wrong_stdout))
+
+    if (cmd.expected_stderr_source != ExpectedOutputSource.none
+            and fdbk.stderr_fdbk_level != ValueFeedbackLevel.no_feedback):
+        columns.append(
+            ('stderr_correct', cmd.points_for_correct_stderr, cmd.deduction_for_wrong_stderr))
+
+    return tuple(columns)
@@ -0,0 +1,193 @@
+"""
+Functions for maintaining and loading precomputed SubmissionScores.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Dict, Iterable, List
+
+from django.db import transaction
+from django.utils import timezone
+
+from autograder.core.models import (
+    AGTestCase, AGTestCommand, AGTestSuite, FeedbackCategory, MutationTestSuite, Project,
+    Submission, SubmissionScore,
+    get_submissions_with_results_queryset
+)
+from autograder.core.submission_feedback import AGTestPreLoader, MutationTestSuitePreLoader
+from autograder.core.submission_points import SubmissionPointsCalculator
+
+# The feedback categories that scores are computed for as soon as a
+# submission finishes grading. Scores for other categories are computed
+# the first time they're requested.
+PRECOMPUTED_FEEDBACK_CATEGORIES = (FeedbackCategory.max, FeedbackCategory.normal)
+
+
+def get_scoring_config_fingerprint(project: Project) -> str:
+    """
+    Returns a hash that changes whenever a suite, test case, or command
+    that could affect the points awarded to project's submissions is
+    added, removed, edited, or reordered.
+    """
+    hasher = hashlib.sha256()
+    querysets = [
+        AGTestSuite.objects.filter(project=project),
+        AGTestCase.objects.filter(ag_test_suite__project=project),
+        AGTestCommand.objects.filter(ag_test_case__ag_test_suite__project=project),
+        MutationTestSuite.objects.filter(project=project),
+    ]
+    for queryset in querysets:
+        for pk, last_modified, order in queryset.order_by('pk').values_list(
+                'pk', 'last_modified', '_order'):
+            hasher.update(f'{pk},{last_modified.isoformat()},{order};'.encode())
+        hasher.update(b'|')
+
+    return hasher.hexdigest()
+
+
+def update_submission_scores(submission_pk: int) -> None:
+    """
+    Computes and saves the SubmissionScores of the specified submission
+    for PRECOMPUTED_FEEDBACK_CATEGORIES, replacing any existing scores.
+    This should be called whenever a submission finishes grading or
+    is rerun.
+    """
+    submission = get_submissions_with_results_queryset().select_related(
+        'group__project').get(pk=submission_pk)
+    project = submission.group.project
+    fingerprint = get_scoring_config_fingerprint(project)
+    ag_test_preloader = AGTestPreLoader(project)
+    mutation_test_suite_preloader = MutationTestSuitePreLoader(project)
+
+    scores = [
+        _compute_score(
+            submission,
+            SubmissionPointsCalculator(
+                fdbk_category, ag_test_preloader, mutation_test_suite_preloader),
+            fingerprint)
+        for fdbk_category in PRECOMPUTED_FEEDBACK_CATEGORIES
+    ]
+
+    with transaction.atomic():
+        # Serialize concurrent updates of the same submission's scores.
+        Submission.objects.select_for_update().filter(pk=submission_pk).exists()
+        SubmissionScore.objects.filter(submission=submission_pk).delete()
+        SubmissionScore.objects.bulk_create(scores)
+
+
+def clear_submission_scores(submission_pk: int) -> None:
+    """
+    Deletes the SubmissionScores of the specified submission. They will
+    be recomputed the next time they're requested.
+    """
+    SubmissionScore.objects.filter(submission=submission_pk).delete()
+
+
+def get_submission_scores(
+    project: Project,
+    submissions: Iterable[Submission],
+    fdbk_category: FeedbackCategory,
+    ag_test_preloader: AGTestPreLoader,
+    mutation_test_suite_preloader: MutationTestSuitePreLoader,
+) -> Dict[int, SubmissionScore]:
+    """
+    Returns a dictionary mapping the primary keys of submissions to
+    their SubmissionScores for fdbk_category.
+
+    Scores that are missing or out of date are computed and saved, so
+    submissions should be loaded using get_submissions_with_results_queryset.
+    The submissions' denormalized_ag_test_results may be deferred, in which
+    case they're loaded only for submissions whose scores need computing.
+    """
+    submissions = list(submissions)
+    if not submissions:
+        return {}
+
+    fingerprint = get_scoring_config_fingerprint(project)
+    existing_scores = {
+        score.submission_id: score
+        for score in SubmissionScore.objects.filter(
+            submission__in=[submission.pk for submission in submissions],
+            fdbk_category=fdbk_category.value
+        )
+    }
+
+    scores: Dict[int, SubmissionScore] = {}
+    to_compute: List[Submission] = []
+    for submission in submissions:
+        existing = existing_scores.get(submission.pk)
+        if existing is not None and existing.scoring_config_fingerprint == fingerprint:
+            scores[submission.pk] = existing
+        else:
+            to_compute.append(submission)
+
+    if not to_compute:
+        return scores
+
+    Submission.load_denormalized_ag_test_results(to_compute)
+    calculator = SubmissionPointsCalculator(
+        fdbk_category, ag_test_preloader, mutation_test_suite_preloader)
+    to_create: List[SubmissionScore] = []
+    to_update: List[SubmissionScore] = []
+    for submission in to_compute:
+        existing = existing_scores.get(submission.pk)
+        score = _compute_score(submission, calculator, fingerprint)
+        if existing is None:
+            to_create.append(score)
+        else:
+            score.pk = existing.pk
+            to_update.append(score)
+
+        scores[submission.pk] = score
+
+    if to_create:
+        # Another process may have computed the same scores in the meantime.
+        SubmissionScore.objects.bulk_create(to_create, ignore_conflicts=True)
+    if to_update:
+        SubmissionScore.objects.bulk_update(to_update, fields=_SCORE_FIELDS)
+
+    return scores
+
+
+_SCORE_FIELDS = [
+    'scoring_config_fingerprint',
+    'total_points',
+    'total_points_possible',
+    'points_data',
+    'last_modified',
+]
+
+
+def _compute_score(
+    submission: Submission,
+    calculator: SubmissionPointsCalculator,
+    fingerprint: str,
+) -> SubmissionScore:
+    points = calculator.get_points(submission)
+    return SubmissionScore(
+        submission=submission,
+        fdbk_category=calculator.fdbk_category.value,
+        scoring_config_fingerprint=fingerprint,
+        total_points=points.total_points,
+        total_points_possible=points.total_points_possible,
+        points_data={
+            'total_points': str(points.total_points),
+            'total_points_possible': str(points.total_points_possible),
+            'ag_test_suites': {
+                str(suite_points.ag_test_suite_pk): {
+                    'total_points': str(suite_points.total_points),
+                    'total_points_possible': str(suite_points.total_points_possible),
+                }
+                for suite_points in points.ag_test_suite_points
+            },
+            'mutation_test_suites': {
+                str(suite_points.mutation_test_suite_pk): {
+                    'total_points': str(suite_points.total_points),
+                    'total_points_possible': str(suite_points.total_points_possible),
+                }
+                for suite_points in points.mutation_test_suite_points
+            },
+        },
+        last_modified=timezone.now(),
+    )
@@ -0,0 +1,403 @@
+import itertools
+import os
+import random
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from typing import List, Tuple
+from unittest import mock, skipIf
+
+from django.test import SimpleTestCase, tag
+
+from autograder.core.diff import (
+    DiffResult, compute_diff, files_equivalent, get_cached_diff, get_cached_diff_size
+)
+
+_GNU_DIFF_LINE_REGEX = re.compile(r'^(?:  |\+ |- ).*\n+'.encode(), flags=re.MULTILINE)
+
+
+def _get_gnu_diff(first_filename: str, second_filename: str,
+                  ignore_case: bool = False,
+                  ignore_whitespace: bool = False,
+                  ignore_whitespace_changes: bool = False,
+                  ignore_blank_lines: bool = False) -> DiffResult:
+    """
+    The GNU diff subprocess implementation that compute_diff() replaced.
+    Used as a reference for behavior and performance.
+    """
+    diff_cmd = ['diff',
+                '--text',
+                '--new-line-format', '+ %L\n',
+                '--old-line-format', '- %L\n',
+                '--unchanged-line-format', '  %L\n']
+    if ignore_case:
+        diff_cmd.append('--ignore-case')
+    if ignore_whitespace:
+        diff_cmd.append('--ignore-all-space')
+    if ignore_whitespace_changes:
+        diff_cmd.append('--ignore-space-change')
+    if ignore_blank_lines:
+        diff_cmd.append('--ignore-blank-lines')
+
+    diff_cmd += [first_filename, second_filename]
+
+    diff_result = subprocess.run(diff_cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    diff_list = [match.group()[:-1].decode('utf-8', 'surrogateescape')
+                 for match in _GNU_DIFF_LINE_REGEX.finditer(diff_result.stdout)]
+    return DiffResult(diff_result.returncode == 0, diff_list)
+
+
+class _DiffTestBase(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.file1 = tempfile.NamedTemporaryFile()
+        self.file2 = tempfile.NamedTemporaryFile()
+
+    def tearDown(self):
+        super().tearDown()
+        self.file1.close()
+        self.file2.close()
+
+    def _write(self, file1_content: bytes, file2_content: bytes) -> None:
+        for file_, content in (self.file1, file1_content), (self.file2, file2_content):
+            file_.seek(0)
+            file_.truncate()
+            file_.write(content)
+            file_.flush()
+
+
+class ComputeDiffTestCase(_DiffTestBase):
+    def test_equal_files_all_lines_unchanged(self) -> None:
+        self._write(b'spam\negg', b'spam\negg')
+        result = compute_diff(self.file1.name, self.file2.name)
+        self.assertTrue(result.diff_pass)
+        self.assertEqual(['  spam\n', '  egg'], result.diff_content)
+
+    def test_empty_files(self) -> None:
+        self._write(b'', b'')
+        result = compute_diff(self.file1.name, self.file2.name)
+        self.assertTrue(result.diff_pass)
+        self.assertEqual([], result.diff_content)
+
+        self._write(b'', b'spam\n')
+        result = compute_diff(self.file1.name, self.file2.name)
+        self.assertFalse(result.diff_pass)
+        self.assertEqual(['+ spam\n'], result.diff_content)
+
+    def test_deletions_shown_before_insertions(self) -> None:
+        self._write(b'spam\negg\nsausage\n', b'spam\nbacon\nbaked beans\nsausage\n')
+        result = compute_diff(self.file1.name, self.file2.name)
+        self.assertFalse(result.diff_pass)
+        self.assertEqual(
+            ['  spam\n', '- egg\n', '+ bacon\n', '+ baked beans\n', '  sausage\n'],
+            result.diff_content)
+
+    def test_ignored_differences_shown_with_first_file_lines(self) -> None:
+        self._write(b'SPAM\negg\n', b'spam\nbacon\n')
+        result = compute_diff(self.file1.name, self.file2.name, ignore_case=True)
+        self.assertFalse(result.diff_pass)
+        self.assertEqual(['  SPAM\n', '- egg\n', '+ bacon\n'], result.diff_content)
+
+    def test_ignore_whitespace_changes_leading_whitespace_matters(self) -> None:
+        self._write(b'spam  egg \r\n', b'spam egg')
+        self.assertTrue(
+            compute_diff(self.file1.name, self.file2.name,
+                         ignore_whitespace_changes=True).diff_pass)
+
+        self._write(b'spam\n', b' spam\n')
+        self.assertFalse(
+            compute_diff(self.file1.name, self.file2.name,
+                         ignore_whitespace_changes=True).diff_pass)
+        self.assertTrue(
+            compute_diff(self.file1.name, self.file2.name, ignore_whitespace=True).diff_pass)
+
+    def test_ignore_blank_lines(self) -> None:
+        self._write(b'spam\n\negg\n', b'spam\negg\n\n')
+        result = compute_diff(self.file1.name, self.file2.name, ignore_blank_lines=True)
+        self.assertTrue(result.diff_pass)
+        self.assertEqual(['  spam\n', '  \n', '  egg\n'], result.diff_content)
+
+        self._write(b'spam\n\negg\n', b'spam\n\nbacon\n')
+        result = compute_diff(self.file1.name, self.file2.name, ignore_blank_lines=True)
+        self.assertFalse(result.diff_pass)
+        self.assertEqual(['  spam\n', '  \n', '- egg\n', '+ bacon\n'], result.diff_content)
+
+    def test_ignore_blank_lines_only_all_blank_groups_ignored(self) -> None:
+        # GNU diff matches up the blank lines here, so the changes
+        # around them aren't all blank.
+        self._write(b'a\n\n', b'\na\n')
+        result = compute_diff(self.file1.name, self.file2.name, ignore_blank_lines=True)
+        self.assertFalse(result.diff_pass)
+        self.assertEqual(['- a\n', '  \n', '+ a\n'], result.diff_content)
+
+    def test_ignore_blank_lines_blank_lines_in_changed_group_shown(self) -> None:
+        self._write(b' bb\n', b'\n\t')
+        result = compute_diff(self.file1.name, self.file2.name, ignore_blank_lines=True)
+        self.assertFalse(result.diff_pass)
+        self.assertEqual(['-  bb\n', '+ \n', '+ \t'], result.diff_content)
+
+    def test_ignore_blank_lines_whitespace_only_lines(self) -> None:
+        self._write(b'spam\n', b'spam\n \t\n')
+        self.assertFalse(
+            compute_diff(self.file1.name, self.file2.name, ignore_blank_lines=True).diff_pass)
+        self.assertTrue(
+            compute_diff(self.file1.name, self.file2.name,
+                         ignore_blank_lines=True, ignore_whitespace_changes=True).diff_pass)
+
+    @mock.patch('autograder.core.diff._MAX_EDIT_COST', new=2)
+    def test_edit_cost_limit_exceeded(self) -> None:
+        self._write(b'a\nb\nc\nd\ne\nf\n', b'b\nx\nd\ny\nf\nz\n')
+        result = compute_diff(self.file1.name, self.file2.name)
+        self.assertFalse(result.diff_pass)
+        # The diff isn't minimal, but it still has to describe both files.
+        self.assertEqual(
+            b'a\nb\nc\nd\ne\nf\n',
+            ''.join(line[2:] for line in result.diff_content
+                    if not line.startswith('+ ')).encode())
+        self.assertEqual(
+            b'b\nx\nd\ny\nf\nz\n',
+            ''.join(line[2:] for line in result.diff_content
+                    if not line.startswith('- ')).encode())
+
+
+class FilesEquivalentTestCase(_DiffTestBase):
+    def test_exact_comparison(self) -> None:
+        self._write(b'spam\negg\n', b'spam\negg\n')
+        self.assertTrue(files_equivalent(self.file1.name, self.file2.name))
+
+        self._write(b'spam\negg\n', b'spam\negg')
+        self.assertFalse(files_equivalent(self.file1.name, self.file2.name))
+
+        self._write(b'spam\negg\n', b'spam\nEgg\n')
+        self.assertFalse(files_equivalent(self.file1.name, self.file2.name))
+
+    def test_ignore_blank_lines_changes_around_blank_lines(self) -> None:
+        self._write(b'a\n\n', b'\na\n')
+        self.assertFalse(
+            files_equivalent(self.file1.name, self.file2.name, ignore_blank_lines=True))
+
+        self._write(b'a\n\nb\n', b'a\nb\n\n\n')
+        self.assertTrue(
+            files_equivalent(self.file1.name, self.file2.name, ignore_blank_lines=True))
+
+    def test_ignore_options(self) -> None:
+        self._write(b'SPAM  sausage\n\n\negg\n', b'spam sausage\negg \n\n')
+        self.assertFalse(
+            files_equivalent(self.file1.name, self.file2.name,
+                             ignore_case=True, ignore_whitespace_changes=True))
+        self.assertTrue(
+            files_equivalent(self.file1.name, self.file2.name,
+                             ignore_case=True, ignore_whitespace_changes=True,
+                             ignore_blank_lines=True))
+        self.assertFalse(
+            files_equivalent(self.file1.name, self.file2.name,
+                             ignore_whitespace_changes=True, ignore_blank_lines=True))
+
+    @mock.patch('autograder.core.diff._CHUNK_SIZE', new=4)
+    def test_lines_span_chunks(self) -> None:
+        self._write(b'spam spam spam\n\negg\nsausage', b'spam spam spam\negg\nsausage')
+        self.assertFalse(files_equivalent(self.file1.name, self.file2.name))
+        self.assertTrue(
+            files_equivalent(self.file1.name, self.file2.name, ignore_blank_lines=True))
+
+        self._write(b'spam spam spam\n', b'spam spam spam\n')
+        self.assertTrue(files_equivalent(self.file1.name, self.file2.name))
+        self.assertTrue(files_equivalent(self.file1.name, self.file2.name, ignore_case=True))
+
+        self._write(b'spam spam spam\n', b'spam spam spa\n')
+        self.assertFalse(files_equivalent(self.file1.name, self.file2.name))
+        self.assertFalse(files_equivalent(self.file1.name, self.file2.name, ignore_case=True))
+
+    @mock.patch('autograder.core.diff._CHUNK_SIZE', new=3)
+    def test_same_result_as_compute_diff(self) -> None:
+        rand = random.Random(42)
+        pieces = [b'a', b'A', b' ', b'\t', b'\r', b'\n', b'\n\n']
+        for _ in range(200):
+            self._write(
+                b''.join(rand.choice(pieces) for _ in range(rand.randint(0, 12))),
+                b''.join(rand.choice(pieces) for _ in range(rand.randint(0, 12))))
+            for flags in itertools.product([False, True], repeat=4):
+                self.assertEqual(
+                    compute_diff(self.file1.name, self.file2.name, *flags).diff_pass,
+                    files_equivalent(self.file1.name, self.file2.name, *flags))
+
+
+class GetCachedDiffTestCase(_DiffTestBase):
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.cache_filename = os.path.join(self.cache_dir.name, 'diff_cache')
+
+    def tearDown(self):
+        super().tearDown()
+        self.cache_dir.cleanup()
+
+    def test_diff_computed_once(self) -> None:
+        self._write(b'spam\negg\n', b'spam\nsausage\n')
+        expected = compute_diff(self.file1.name, self.file2.name)
+
+        with mock.patch('autograder.core.diff.compute_diff', wraps=compute_diff) as mock_diff:
+            for _ in range(3):
+                actual = get_cached_diff(self.file1.name, self.file2.name, self.cache_filename)
+                self.assertEqual(expected.diff_pass, actual.diff_pass)
+                self.assertEqual(expected.diff_content, actual.diff_content)
+
+            self.assertEqual(
+                sum(len(line) for line in expected.diff_content),
+                get_cached_diff_size(self.file1.name, self.file2.name, self.cache_filename))
+
+        mock_diff.assert_called_once()
+
+    def test_size_computed_before_diff(self) -> None:
+        self._write(b'spam\negg\n', b'spam\negg\n')
+        with mock.patch('autograder.core.diff.compute_diff', wraps=compute_diff) as mock_diff:
+            self.assertEqual(
+                len('  spam\n  egg\n'),
+                get_cached_diff_size(self.file1.name, self.file2.name, self.cache_filename))
+            diff = get_cached_diff(self.file1.name, self.file2.name, self.cache_filename)
+            self.assertTrue(diff.diff_pass)
+            self.assertEqual(['  spam\n', '  egg\n'], diff.diff_content)
+
+        mock_diff.assert_called_once()
+
+    def test_non_utf_chars_cached(self) -> None:
+        self._write(b'\x80spam\n', b'spam\n')
+        expected = compute_diff(self.file1.name, self.file2.name)
+        get_cached_diff(self.file1.name, self.file2.name, self.cache_filename)
+        actual = get_cached_diff(self.file1.name, self.file2.name, self.cache_filename)
+        self.assertEqual(expected.diff_content, actual.diff_content)
+
+    def test_diff_recomputed_when_output_changes(self) -> None:
+        self._write(b'spam\n', b'egg\n')
+        self.assertFalse(
+            get_cached_diff(self.file1.name, self.file2.name, self.cache_filename).diff_pass)
+
+        self._write(b'spam\n', b'spam\n')
+        diff = get_cached_diff(self.file1.name, self.file2.name, self.cache_filename)
+        self.assertTrue(diff.diff_pass)
+        self.assertEqual(['  spam\n'], diff.diff_content)
+
+    def test_diff_recomputed_when_options_change(self) -> None:
+        self._write(b'spam\n', b'SPAM\n')
+        self.assertFalse(
+            get_cached_diff(self.file1.name, self.file2.name, self.cache_filename).diff_pass)
+        self.assertTrue(
+            get_cached_diff(self.file1.name, self.file2.name, self.cache_filename,
+                            ignore_case=True).diff_pass)
+        self.assertEqual(
+            len('  spam\n'),
+            get_cached_diff_size(self.file1.name, self.file2.name, self.cache_filename,
+                                 ignore_case=True))
+
+    def test_corrupt_cache_file_ignored(self) -> None:
+        self._write(b'spam\n', b'egg\n')
+        get_cached_diff(self.file1.name, self.file2.name, self.cache_filename)
+        with open(self.cache_filename, 'r+') as f:
+            f.truncate(len(f.readline()) + 5)
+
+        diff = get_cached_diff(self.file1.name, self.file2.name, self.cache_filename)
+        self.assertEqual(['- spam\n', '+ egg\n'], diff.diff_content)
+
+    def test_cache_file_cannot_be_written(self) -> None:
+        self._write(b'spam\n', b'egg\n')
+        cache_filename = os.path.join(self.cache_dir.name, 'no_such_dir', 'diff_cache')
+        diff = get_cached_diff(self.file1.name, self.file2.name, cache_filename)
+        self.assertEqual(['- spam\n', '+ egg\n'], diff.diff_content)
+        self.assertFalse(os.path.exists(cache_filename))
+
+
+_GNU_DIFF_UNAVAILABLE = shutil.which('diff') is None
+
+
+@skipIf(_GNU_DIFF_UNAVAILABLE, 'GNU diff not installed')
+@tag('slow')
+class CompareWithGNUDiffTestCase(_DiffTestBase):
+    _LINE_PIECES = [b'a', b'A', b'b', b' ', b'  ', b'\t', b'\r', b'\x80', b'\x00']
+
+    def _random_content(self, rand: random.Random) -> bytes:
+        lines = [b''.join(rand.choice(self._LINE_PIECES) for _ in range(rand.randint(0, 3)))
+                 for _ in range(rand.randint(0, 8))]
+        content = b'\n'.join(lines)
+        if rand.random() < 0.6:
+            content += b'\n'
+        return content
+
+    def test_same_result_as_gnu_diff(self) -> None:
+        rand = random.Random(42)
+        for _ in range(200):
+            self._write(self._random_content(rand), self._random_content(rand))
+            for flags in itertools.product([False, True], repeat=4):
+                expected = _get_gnu_diff(self.file1.name, self.file2.name, *flags)
+                actual = compute_diff(self.file1.name, self.file2.name, *flags)
+                self.assertEqual(expected.diff_pass, actual.diff_pass)
+
+                # Ties between equally short diffs can be broken differently,
+                # so we only check that the diffs are the same size.
+                self.assertEqual(
+                    self._count_changes(expected.diff_content),
+                    self._count_changes(actual.diff_content))
+
+    def _count_changes(self, diff_content: List[str]) -> Tuple[int, int]:
+        return (sum(1 for line in diff_content if line.startswith('- ')),
+                sum(1 for line in diff_content if line.startswith('+ ')))
+
+
+@skipIf(_GNU_DIFF_UNAVAILABLE, 'GNU diff not installed')
+@tag('slow', 'benchmark')
+class DiffBenchmarkTestCase(_DiffTestBase):
+    """
+    Compares compute_diff() and files_equivalent() to the GNU diff
+    subprocess on large outputs.
+    Run with "./manage.py test --tag benchmark" to see timings.
+    """
+
+    def setUp(self):
+        super().setUp()
+        rand = random.Random(42)
+        self.lines = [
+            f'line {i}: {"x" * rand.randint(0, 60)}\n'.encode() for i in range(200000)]
+        self.rand = rand
+
+    def test_identical_outputs(self) -> None:
+        self._write(b''.join(self.lines), b''.join(self.lines))
+        self._benchmark('identical')
+
+    def test_identical_outputs_ignore_whitespace_changes(self) -> None:
+        self._write(b''.join(self.lines),
+                    b''.join(line.replace(b' ', b'   ') for line in self.lines))
+        self._benchmark('identical (ignore whitespace changes)',
+                        ignore_whitespace_changes=True)
+
+    def test_few_differences(self) -> None:
+        changed = list(self.lines)
+        for index in self.rand.sample(range(len(changed)), 50):
+            changed[index] = b'changed\n'
+        self._write(b''.join(self.lines), b''.join(changed))
+        self._benchmark('few differences')
+
+    def test_shuffled_outputs(self) -> None:
+        shuffled = list(self.lines)
+        self.rand.shuffle(shuffled)
+        self._write(b''.join(self.lines), b''.join(shuffled))
+        self._benchmark('shuffled')
+
+    def _benchmark(self, label: str, **kwargs: bool) -> None:
+        start = time.perf_counter()
+        expected = _get_gnu_diff(self.file1.name, self.file2.name, **kwargs)
+        gnu_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = compute_diff(self.file1.name, self.file2.name, **kwargs)
+        in_process_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        equivalent = files_equivalent(self.file1.name, self.file2.name, **kwargs)
+        equivalent_time = time.perf_counter() - start
+
+        self.assertEqual(expected.diff_pass, actual.diff_pass)
+        self.assertEqual(expected.diff_pass, equivalent)
+        print(f'\n{label}: GNU diff subprocess {gnu_time:.3f}s, '
+              f'compute_diff {in_process_time:.3f}s, '
+              f'files_equivalent {equivalent_time:.3f}s')
@@ -25,6 +25,7 @@ class AGTestSuiteTestCase(UnitTestBase):
 
         self.assertCountEqual([], suite.instructor_files_needed.all())
         self.assertTrue(suite.read_only_instructor_files)
+        self.assertFalse(suite.cache_instructor_files_in_image)
         self.assertCountEqual([], suite.student_files_needed.all())
 
         self.assertEqual('', suite.setup_suite_cmd_name)
@@ -34,6 +35,7 @@ class AGTestSuiteTestCase(UnitTestBase):
         self.assertEqual(ag_models.SandboxDockerImage.objects.get(name='default'),
                          suite.sandbox_docker_image)
         self.assertFalse(suite.deferred)
+        self.assertEqual(1, suite.max_concurrent_test_cases)
 
         self.assertIsNotNone(suite.normal_fdbk_config)
         self.assertIsNotNone(suite.ultimate_submission_fdbk_config)
@@ -90,11 +92,13 @@ class AGTestSuiteTestCase(UnitTestBase):
             project=project,
             instructor_files_needed=instructor_files_needed,
             read_only_instructor_files=False,
+            cache_instructor_files_in_image=True,
             student_files_needed=student_files_needed,
             setup_suite_cmd=setup_cmd,
             setup_suite_cmd_name='steve',
             allow_network_access=allow_network_access,
             deferred=deferred,
+            max_concurrent_test_cases=4,
             sandbox_docker_image=sandbox_image.to_dict(),
             normal_fdbk_config={
                 'visible': False,
@@ -111,9 +115,11 @@ class AGTestSuiteTestCase(UnitTestBase):
         self.assertEqual(project, suite.project)
         self.assertCountEqual(instructor_files_needed, suite.instructor_files_needed.all())
         self.assertFalse(suite.read_only_instructor_files)
+        self.assertTrue(suite.cache_instructor_files_in_image)
         self.assertCountEqual(student_files_needed, suite.student_files_needed.all())
         self.assertEqual(allow_network_access, suite.allow_network_access)
         self.assertEqual(deferred, suite.deferred)
+        self.assertEqual(4, suite.max_concurrent_test_cases)
         self.assertEqual(sandbox_image, suite.sandbox_docker_image)
         self.assertFalse(suite.normal_fdbk_config.visible)
 
@@ -131,6 +137,15 @@ class AGTestSuiteTestCase(UnitTestBase):
 
             self.assertIn('name', cm.exception.message_dict)
 
+    def test_error_max_concurrent_test_cases_out_of_range(self):
+        bad_values = [0, -1, constants.MAX_CONCURRENT_TEST_CASES + 1]
+        for value in bad_values:
+            with self.assertRaises(exceptions.ValidationError) as cm:
+                ag_models.AGTestSuite.objects.validate_and_create(
+                    name='suitey', project=self.project, max_concurrent_test_cases=value)
+
+            self.assertIn('max_concurrent_test_cases', cm.exception.message_dict)
+
     def test_error_instructor_and_student_files_dont_belong_to_same_project(self):
         other_project = obj_build.build_project()
         other_instructor_file = obj_build.make_instructor_file(other_project)
@@ -208,6 +223,7 @@ class AGTestSuiteTestCase(UnitTestBase):
 
             'instructor_files_needed',
             'read_only_instructor_files',
+            'cache_instructor_files_in_image',
             'student_files_needed',
 
             'ag_test_cases',
@@ -219,6 +235,7 @@ class AGTestSuiteTestCase(UnitTestBase):
             'sandbox_docker_image',
             'allow_network_access',
             'deferred',
+            'max_concurrent_test_cases',
 
             'normal_fdbk_config',
             'ultimate_submission_fdbk_config',
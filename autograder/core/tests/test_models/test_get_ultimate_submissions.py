@@ -212,6 +212,76 @@ class GetUltimateSubmissionsTestCase(_TestCase):
         self.assertSequenceEqual([group_with_finished_submissions_data.best_submission],
                                  ultimate_submissions)
 
+    def test_ag_test_results_loaded_for_ultimate_submissions(self):
+        data = self.prepare_data(self.project, num_groups=2, num_other_submissions=1)
+        for policy, expected_submissions in [
+            (ag_models.UltimateSubmissionPolicy.most_recent,
+             [datum.most_recent_submission for datum in data]),
+            (ag_models.UltimateSubmissionPolicy.best,
+             [datum.best_submission for datum in data]),
+        ]:
+            with self.subTest(policy=policy):
+                self.project.validate_and_update(ultimate_submission_policy=policy)
+                ultimate_submissions = list(get_ultimate_submissions(
+                    self.project, filter_groups=None,
+                    ag_test_preloader=AGTestPreLoader(self.project)))
+                self.assertCountEqual(
+                    expected_submissions, [fdbk.submission for fdbk in ultimate_submissions])
+
+                for fdbk in ultimate_submissions:
+                    self.assertNotIn(
+                        'denormalized_ag_test_results', fdbk.submission.get_deferred_fields())
+                    self.assertEqual(
+                        get_submission_fdbk(
+                            ag_models.Submission.objects.get(pk=fdbk.submission.pk),
+                            ag_models.FeedbackCategory.max
+                        ).to_dict(),
+                        fdbk.to_dict())
+
+    def test_defer_ag_test_results_totals_read_from_scores(self):
+        data = self.prepare_data(self.project, num_groups=2, num_other_submissions=1)
+        for policy, expected_submissions in [
+            (ag_models.UltimateSubmissionPolicy.most_recent,
+             [datum.most_recent_submission for datum in data]),
+            (ag_models.UltimateSubmissionPolicy.best,
+             [datum.best_submission for datum in data]),
+        ]:
+            with self.subTest(policy=policy):
+                self.project.validate_and_update(ultimate_submission_policy=policy)
+                ultimate_submissions = list(get_ultimate_submissions(
+                    self.project, filter_groups=None,
+                    ag_test_preloader=AGTestPreLoader(self.project),
+                    defer_ag_test_results=True))
+                self.assertCountEqual(
+                    expected_submissions, [fdbk.submission for fdbk in ultimate_submissions])
+
+                for fdbk in ultimate_submissions:
+                    expected = get_submission_fdbk(
+                        ag_models.Submission.objects.get(pk=fdbk.submission.pk),
+                        ag_models.FeedbackCategory.max)
+                    self.assertEqual(expected.total_points, fdbk.total_points)
+                    self.assertEqual(
+                        expected.total_points_possible, fdbk.total_points_possible)
+                    self.assertIn(
+                        'denormalized_ag_test_results', fdbk.submission.get_deferred_fields())
+
+    def test_most_recent_loads_one_submission_per_group(self):
+        data = self.prepare_data(self.project, num_groups=3, num_other_submissions=3)
+        self.assertEqual(ag_models.UltimateSubmissionPolicy.most_recent,
+                         self.project.ultimate_submission_policy)
+
+        # Groups, most recent submissions, their mutation test suite
+        # results, and their denormalized AG test results
+        with self.assertNumQueries(4):
+            ultimate_submissions = [
+                fdbk.submission for fdbk in get_ultimate_submissions(
+                    self.project, filter_groups=None,
+                    ag_test_preloader=AGTestPreLoader(self.project))
+            ]
+
+        self.assertCountEqual(
+            [datum.most_recent_submission for datum in data], ultimate_submissions)
+
 
 class GetUltimateSubmissionTestCase(_TestCase):
     def setUp(self):
@@ -418,6 +488,75 @@ class GetUltimateSubmissionForUserTestCase(UnitTestBase):
         )
         self.assertEqual(other_submission, does_not_count_for_user_ultimate_submission)
 
+    def test_get_ultimate_submissions_most_recent_user_ultimate_submissions(self):
+        self.project.validate_and_update(
+            ultimate_submission_policy=ag_models.UltimateSubmissionPolicy.most_recent)
+
+        oldest_submission = obj_build.make_finished_submission(self.group)
+        most_recent_submission = obj_build.make_finished_submission(
+            self.group, does_not_count_for=[self.does_not_count_for_user.username]
+        )
+
+        [fdbk] = get_ultimate_submissions(
+            self.project, filter_groups=None, ag_test_preloader=AGTestPreLoader(self.project))
+        self.assertEqual(most_recent_submission, fdbk.submission)
+        self.assertEqual(
+            [self.does_not_count_for_user.username], list(fdbk.user_ultimate_submissions))
+        self.assertEqual(
+            oldest_submission,
+            fdbk.user_ultimate_submissions[self.does_not_count_for_user.username].submission)
+
+    def test_get_ultimate_submissions_best_user_ultimate_submissions(self):
+        self.project.validate_and_update(
+            ultimate_submission_policy=ag_models.UltimateSubmissionPolicy.best)
+
+        suite = ag_models.MutationTestSuite.objects.validate_and_create(
+            name='suite', project=self.project, buggy_impl_names=[f'bug{i}' for i in range(3)],
+            points_per_exposed_bug=1
+        )
+
+        best_submission = obj_build.make_finished_submission(
+            self.group, does_not_count_for=[self.does_not_count_for_user.username])
+        ag_models.MutationTestSuiteResult.objects.validate_and_create(
+            mutation_test_suite=suite,
+            submission=best_submission, bugs_exposed=suite.buggy_impl_names
+        )
+        other_submission = obj_build.make_finished_submission(self.group)
+
+        for defer_ag_test_results in [False, True]:
+            with self.subTest(defer_ag_test_results=defer_ag_test_results):
+                [fdbk] = get_ultimate_submissions(
+                    self.project, filter_groups=None,
+                    ag_test_preloader=AGTestPreLoader(self.project),
+                    defer_ag_test_results=defer_ag_test_results)
+                self.assertEqual(best_submission, fdbk.submission)
+                self.assertEqual(3, fdbk.total_points)
+
+                user_fdbk = fdbk.user_ultimate_submissions[
+                    self.does_not_count_for_user.username]
+                self.assertEqual(other_submission, user_fdbk.submission)
+                self.assertEqual(0, user_fdbk.total_points)
+
+    def test_get_ultimate_submissions_no_submissions_count_for_user(self):
+        for policy in ag_models.UltimateSubmissionPolicy:
+            if policy == ag_models.UltimateSubmissionPolicy.best_with_normal_fdbk:
+                continue
+
+            with self.subTest(policy=policy):
+                self.project.validate_and_update(ultimate_submission_policy=policy)
+                self.group.submissions.all().delete()
+                most_recent_submission = obj_build.make_finished_submission(
+                    self.group, does_not_count_for=[self.does_not_count_for_user.username]
+                )
+
+                [fdbk] = get_ultimate_submissions(
+                    self.project, filter_groups=None,
+                    ag_test_preloader=AGTestPreLoader(self.project))
+                self.assertEqual(most_recent_submission, fdbk.submission)
+                self.assertEqual(
+                    {self.does_not_count_for_user.username: None},
+                    fdbk.user_ultimate_submissions)
+
     def test_no_submissions_count_for_user(self):
         oldest_submission = obj_build.make_finished_submission(
             self.group, does_not_count_for=[self.does_not_count_for_user.username]
@@ -4,6 +4,7 @@ from django.core import exceptions
 
 from autograder.utils.testing import TransactionUnitTestBase, UnitTestBase
 import autograder.core.models as ag_models
+from autograder.core import constants
 import autograder.utils.testing.model_obj_builders as obj_build
 
 
@@ -21,6 +22,7 @@ class MutationTestSuiteTestCase(UnitTestBase):
         self.assertEqual(self.project, mutation_suite.project)
         self.assertSequenceEqual([], mutation_suite.instructor_files_needed.all())
         self.assertTrue(mutation_suite.read_only_instructor_files)
+        self.assertFalse(mutation_suite.cache_instructor_files_in_image)
         self.assertSequenceEqual([], mutation_suite.student_files_needed.all())
         self.assertSequenceEqual([], mutation_suite.buggy_impl_names)
 
@@ -35,8 +37,10 @@ class MutationTestSuiteTestCase(UnitTestBase):
 
         self.assertIsInstance(mutation_suite.student_test_validity_check_command,
                               ag_models.Command)
+        self.assertEqual(1, mutation_suite.max_concurrent_validity_checks)
         self.assertIsInstance(mutation_suite.grade_buggy_impl_command,
                               ag_models.Command)
+        self.assertEqual(1, mutation_suite.max_concurrent_buggy_impls)
 
         self.assertEqual(0, mutation_suite.points_per_exposed_bug)
         self.assertIsNone(mutation_suite.max_points)
@@ -86,6 +90,7 @@ class MutationTestSuiteTestCase(UnitTestBase):
             'project': self.project,
             'instructor_files_needed': [instructor_file1.to_dict(), instructor_file2.to_dict()],
             'read_only_instructor_files': False,
+            'cache_instructor_files_in_image': True,
             'student_files_needed': [student_file.to_dict()],
             'buggy_impl_names': ['spam', 'egg', 'sausage', 'waaaaluigi'],
             'setup_command': {'cmd': 'g++ some_stuff.cpp'},
@@ -95,9 +100,11 @@ class MutationTestSuiteTestCase(UnitTestBase):
 
             'student_test_validity_check_command': {
                 'cmd': 'python3 validity_check.py ${student_test_name}'},
+            'max_concurrent_validity_checks': 8,
             'grade_buggy_impl_command': {
                 'cmd': 'python3 grade.py ${buggy_impl_name} ${student_test_name}'
             },
+            'max_concurrent_buggy_impls': 4,
             'points_per_exposed_bug': 42,
             'max_points': 462,
             'deferred': True,
@@ -211,6 +218,24 @@ class MutationTestSuiteTestCase(UnitTestBase):
             ag_models.MutationTestSuite.objects.validate_and_create(
                 name=name, project=self.project)
 
+    def test_error_max_concurrent_buggy_impls_out_of_range(self):
+        bad_values = [0, -1, constants.MAX_CONCURRENT_BUGGY_IMPLS + 1]
+        for value in bad_values:
+            with self.assertRaises(exceptions.ValidationError) as cm:
+                ag_models.MutationTestSuite.objects.validate_and_create(
+                    name=self.name, project=self.project, max_concurrent_buggy_impls=value)
+
+            self.assertIn('max_concurrent_buggy_impls', cm.exception.message_dict)
+
+    def test_error_max_concurrent_validity_checks_out_of_range(self):
+        bad_values = [0, -1, constants.MAX_CONCURRENT_VALIDITY_CHECKS + 1]
+        for value in bad_values:
+            with self.assertRaises(exceptions.ValidationError) as cm:
+                ag_models.MutationTestSuite.objects.validate_and_create(
+                    name=self.name, project=self.project, max_concurrent_validity_checks=value)
+
+            self.assertIn('max_concurrent_validity_checks', cm.exception.message_dict)
+
     def test_max_num_student_tests_out_of_range(self):
         with self.assertRaises(exceptions.ValidationError) as cm:
             ag_models.MutationTestSuite.objects.validate_and_create(
@@ -234,6 +259,18 @@ class MutationTestSuiteTestCase(UnitTestBase):
 
         self.assertIn('student_test_validity_check_command', cm.exception.message_dict)
 
+    def test_validity_check_cmd_with_all_discovered_test_names_placeholder(self):
+        suite = ag_models.MutationTestSuite.objects.validate_and_create(
+            name=self.name, project=self.project,
+            student_test_validity_check_command={
+                'cmd': 'python3 validity_check.py '
+                       + ag_models.MutationTestSuite.ALL_DISCOVERED_TEST_NAMES_PLACEHOLDER})
+
+        suite.refresh_from_db()
+        self.assertEqual(
+            'python3 validity_check.py ${all_discovered_test_names}',
+            suite.student_test_validity_check_command.cmd)
+
     def test_grade_buggy_impl_command_missing_placeholders(self):
         with self.assertRaises(exceptions.ValidationError) as cm:
             ag_models.MutationTestSuite.objects.validate_and_create(
@@ -306,6 +343,7 @@ class MutationTestSuiteTestCase(UnitTestBase):
             'project',
             'instructor_files_needed',
             'read_only_instructor_files',
+            'cache_instructor_files_in_image',
             'student_files_needed',
             'buggy_impl_names',
 
@@ -316,7 +354,9 @@ class MutationTestSuiteTestCase(UnitTestBase):
             'max_num_student_tests',
 
             'student_test_validity_check_command',
+            'max_concurrent_validity_checks',
             'grade_buggy_impl_command',
+            'max_concurrent_buggy_impls',
             'points_per_exposed_bug',
             'max_points',
             'deferred',
@@ -28,6 +28,7 @@ class MutationTestSuiteResultTestCase(UnitTestBase):
         self.assertSequenceEqual([], result.invalid_tests)
         self.assertSequenceEqual([], result.timed_out_tests)
         self.assertSequenceEqual([], result.bugs_exposed)
+        self.assertEqual({}, result.kill_matrix)
         self.assertIsNone(result.setup_result)
         self.assertIsInstance(result.get_test_names_result, ag_models.AGCommandResult)
 
@@ -52,6 +53,33 @@ class MutationTestSuiteResultTestCase(UnitTestBase):
                          'student_suite_result_{}_grade_buggy_impls_stderr'.format(result.pk)),
             result.grade_buggy_impls_stderr_filename)
 
+    def test_get_undetected_bugs_no_kill_matrix(self):
+        self.mutation_suite.validate_and_update(buggy_impl_names=['bug1', 'bug2', 'bug3'])
+        result = ag_models.MutationTestSuiteResult.objects.validate_and_create(
+            mutation_test_suite=self.mutation_suite, submission=self.submission,
+            bugs_exposed=['bug2'])
+
+        self.assertEqual(['bug1', 'bug3'], result.get_undetected_bugs())
+
+    def test_get_undetected_bugs_from_kill_matrix(self):
+        self.mutation_suite.validate_and_update(
+            buggy_impl_names=['bug1', 'bug2', 'bug3', 'bug4', 'added_after_grading'])
+        result = ag_models.MutationTestSuiteResult.objects.validate_and_create(
+            mutation_test_suite=self.mutation_suite, submission=self.submission,
+            bugs_exposed=['bug2', 'bug3'],
+            kill_matrix={
+                'bug1': {'test1': ag_models.MutantTestOutcome.not_exposed,
+                         'test2': ag_models.MutantTestOutcome.not_exposed},
+                'bug2': {'test1': ag_models.MutantTestOutcome.not_exposed,
+                         'test2': ag_models.MutantTestOutcome.exposed},
+                'bug3': {'test2': ag_models.MutantTestOutcome.timed_out},
+                'bug4': {'test1': ag_models.MutantTestOutcome.not_exposed,
+                         'test2': ag_models.MutantTestOutcome.not_exposed},
+            })
+
+        result.refresh_from_db()
+        self.assertEqual(['bug1', 'bug4'], result.get_undetected_bugs())
+
 
 class MutationTestSuiteResultFeedbackTestCase(UnitTestBase):
     def setUp(self):
@@ -250,6 +250,29 @@ class SubmissionTestCase(UnitTestBase):
         self.assertCountEqual(['count_towards_total_limit'],
                               ag_models.Submission.get_editable_fields())
 
+    def test_load_denormalized_ag_test_results(self):
+        group = obj_build.make_group()
+        results = [{'42': {'pk': i}} for i in range(3)]
+        for data in results:
+            submission = obj_build.make_submission(group=group)
+            ag_models.Submission.objects.filter(
+                pk=submission.pk).update(denormalized_ag_test_results=data)
+
+        submissions = list(
+            ag_models.Submission.objects.filter(
+                group=group
+            ).order_by('pk').defer('denormalized_ag_test_results'))
+        # Submissions whose results are already loaded are skipped.
+        submissions[0] = ag_models.Submission.objects.get(pk=submissions[0].pk)
+
+        with self.assertNumQueries(1):
+            ag_models.Submission.load_denormalized_ag_test_results(submissions)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                results, [submission.denormalized_ag_test_results for submission in submissions])
+            ag_models.Submission.load_denormalized_ag_test_results(submissions)
+
 
 class PositionInQueueTestCase(UnitTestBase):
     def test_position_in_queue_multiple_projects(self):
@@ -315,3 +338,33 @@ class PositionInQueueTestCase(UnitTestBase):
             submission.status = status
             submission.save()
             self.assertEqual(0, submission.position_in_queue)
+
+    def test_load_positions_in_queue(self):
+        project1 = obj_build.make_project()
+        project2 = obj_build.make_project()
+        queued = ag_models.Submission.GradingStatus.queued
+
+        project1_submissions = [
+            obj_build.make_submission(
+                group=obj_build.make_group(project=project1), status=queued)
+            for i in range(3)
+        ]
+        project2_submission = obj_build.make_submission(
+            group=obj_build.make_group(project=project2), status=queued)
+        # Submissions that aren't queued don't count towards positions.
+        project1_submissions[0].status = ag_models.Submission.GradingStatus.being_graded
+        project1_submissions[0].save()
+        finished = obj_build.make_finished_submission(obj_build.make_group(project=project1))
+
+        submissions = project1_submissions + [project2_submission, finished]
+        expected = [submission.position_in_queue for submission in submissions]
+        self.assertEqual([0, 1, 2, 1, 0], expected)
+
+        submissions = list(
+            ag_models.Submission.objects.filter(pk__in=[s.pk for s in submissions]).order_by('pk'))
+        # One query per project with queued submissions
+        with self.assertNumQueries(2):
+            ag_models.Submission.load_positions_in_queue(submissions)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                expected, [submission.position_in_queue for submission in submissions])
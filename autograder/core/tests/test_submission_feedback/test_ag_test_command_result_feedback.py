@@ -3,6 +3,7 @@ import tempfile
 from typing import Union
 from unittest import mock
 
+import autograder.core.diff as core_diff
 import autograder.core.models as ag_models
 import autograder.core.utils as core_ut
 import autograder.utils.testing.model_obj_builders as obj_build
@@ -506,6 +507,30 @@ class AGTestCommandResultFeedbackTestCase(UnitTestBase):
         self.assertEqual(self._compute_diff_size(diff), fdbk.get_stdout_diff_size())
         self.assertEqual(diff.diff_content, fdbk.stdout_diff.diff_content)
 
+    def test_diffs_cached(self):
+        result = self.make_incorrect_result()
+        fdbk = get_cmd_fdbk(result, ag_models.FeedbackCategory.max)
+        expected_stdout_diff = _get_expected_diff(self.ag_test_command.expected_stdout_text,
+                                                  result.stdout_filename)
+        with mock.patch('autograder.core.diff.compute_diff',
+                        wraps=core_diff.compute_diff) as mock_compute_diff:
+            for _ in range(2):
+                self.assertEqual(expected_stdout_diff.diff_content,
+                                 fdbk.stdout_diff.diff_content)
+                self.assertEqual(self._compute_diff_size(expected_stdout_diff),
+                                 fdbk.get_stdout_diff_size())
+                self.assertIsNotNone(fdbk.stderr_diff)
+                self.assertIsNotNone(fdbk.get_stderr_diff_size())
+
+        # Once for stdout and once for stderr
+        self.assertEqual(2, mock_compute_diff.call_count)
+        self.assertTrue(os.path.isfile(result.stdout_diff_cache_filename))
+        self.assertTrue(os.path.isfile(result.stderr_diff_cache_filename))
+
+        result.clear_cached_diffs()
+        self.assertFalse(os.path.exists(result.stdout_diff_cache_filename))
+        self.assertFalse(os.path.exists(result.stderr_diff_cache_filename))
+
     def test_stdout_show_actual(self):
         self.ag_test_command.validate_and_update(
             normal_fdbk_config={
@@ -1,8 +1,14 @@
 import json
+import os
 from decimal import Decimal
 
+from django.test import override_settings
+
 from autograder.core.models import get_submissions_with_results_queryset
-from autograder.core.submission_feedback import update_denormalized_ag_test_results
+from autograder.core.models.ag_test.ag_test_case_result import (
+    COMPACT_AG_TEST_COMMAND_RESULT_FIELDS, COMPACT_AG_TEST_COMMAND_RESULTS_KEY)
+from autograder.core.submission_feedback import (
+    save_denormalized_ag_test_suite_result, update_denormalized_ag_test_results)
 from autograder.core.tests.test_submission_feedback.fdbk_getter_shortcuts import (
     get_suite_fdbk, get_submission_fdbk)
 import autograder.core.models as ag_models
@@ -386,3 +392,81 @@ class SubmissionFeedbackTestCase(UnitTestBase):
         for suite_res in result.ag_test_suite_results:
             for test_res in suite_res.ag_test_case_results:
                 self.assertNotIn(self.ag_test_cmd1, test_res.ag_test_command_results)
+
+
+class DenormalizedResultOutputFilenamesTestCase(UnitTestBase):
+    def setUp(self):
+        super().setUp()
+        self.project = obj_build.make_project()
+        suite = obj_build.make_ag_test_suite(self.project)
+        case = obj_build.make_ag_test_case(suite)
+        self.num_cmds = 100
+        cmds = [obj_build.make_full_ag_test_command(case) for _ in range(self.num_cmds)]
+
+        submission = obj_build.make_submission(
+            group=obj_build.make_group(project=self.project))
+        self.suite_result = ag_models.AGTestSuiteResult.objects.validate_and_create(
+            ag_test_suite=suite, submission=submission)
+        case_result = ag_models.AGTestCaseResult.objects.validate_and_create(
+            ag_test_suite_result=self.suite_result, ag_test_case=case)
+        self.cmd_results = {
+            cmd.pk: obj_build.make_correct_ag_test_command_result(cmd, case_result)
+            for cmd in cmds
+        }
+
+        update_denormalized_ag_test_results(submission.pk)
+        self.submission = ag_models.Submission.objects.get(pk=submission.pk)
+
+    def test_output_filenames_and_sizes_computed_without_per_result_queries(self) -> None:
+        fdbk = get_submission_fdbk(self.submission, ag_models.FeedbackCategory.max)
+        # Loads the suites, test cases, and commands.
+        [suite_fdbk] = fdbk.ag_test_suite_results
+        [case_fdbk] = suite_fdbk.ag_test_case_results
+        cmd_fdbks = case_fdbk.ag_test_command_results
+        self.assertEqual(self.num_cmds, len(cmd_fdbks))
+
+        # Loads the submission's course (the group and project are
+        # already loaded).
+        self.assertEqual(
+            self.suite_result.setup_stdout_filename, str(suite_fdbk.setup_stdout_filename))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.suite_result.setup_stderr_filename, str(suite_fdbk.setup_stderr_filename))
+            for cmd_fdbk in cmd_fdbks:
+                cmd_result = self.cmd_results[cmd_fdbk.ag_test_command_pk]
+                self.assertEqual(cmd_result.stdout_filename, str(cmd_fdbk.stdout_filename))
+                self.assertEqual(cmd_result.stderr_filename, str(cmd_fdbk.stderr_filename))
+                self.assertEqual(
+                    os.path.getsize(cmd_result.stdout_filename), cmd_fdbk.get_stdout_size())
+                self.assertEqual(
+                    os.path.getsize(cmd_result.stderr_filename), cmd_fdbk.get_stderr_size())
+
+
+@override_settings(COMPACT_DENORMALIZED_AG_TEST_RESULTS=True)
+class CompactDenormalizedResultsSubmissionFeedbackTestCase(SubmissionFeedbackTestCase):
+    def test_cmd_results_stored_in_compact_form(self) -> None:
+        case_result = self.submission.denormalized_ag_test_results[
+            str(self.ag_test_suite1.pk)]['ag_test_case_results'][str(self.ag_test_case1.pk)]
+        self.assertNotIn('ag_test_command_results', case_result)
+
+        cmd_result_dict = self.ag_cmd_result1.to_dict()
+        expected = {
+            field: [cmd_result_dict[field]] for field in COMPACT_AG_TEST_COMMAND_RESULT_FIELDS
+        }
+        self.assertEqual(expected, case_result[COMPACT_AG_TEST_COMMAND_RESULTS_KEY])
+
+    def test_results_stored_in_either_form_read(self) -> None:
+        expected = get_submission_fdbk(self.submission, ag_models.FeedbackCategory.max).to_dict()
+
+        with override_settings(COMPACT_DENORMALIZED_AG_TEST_RESULTS=False):
+            save_denormalized_ag_test_suite_result(self.submission.pk, self.ag_suite_result2)
+        self.submission.refresh_from_db()
+        self.assertIn(
+            'ag_test_command_results',
+            self.submission.denormalized_ag_test_results[
+                str(self.ag_test_suite2.pk)]['ag_test_case_results'][str(self.ag_test_case2.pk)])
+
+        self.assertEqual(
+            expected,
+            get_submission_fdbk(self.submission, ag_models.FeedbackCategory.max).to_dict())
@@ -0,0 +1,210 @@
+import random
+from decimal import Decimal
+
+from django.test import override_settings
+
+import autograder.core.models as ag_models
+import autograder.utils.testing.model_obj_builders as obj_build
+from autograder.core.models import get_submissions_with_results_queryset
+from autograder.core.submission_feedback import (
+    AGTestPreLoader, MutationTestSuitePreLoader, SubmissionResultFeedback,
+    update_denormalized_ag_test_results)
+from autograder.core.submission_points import SubmissionPointsCalculator
+from autograder.utils.testing import UnitTestBase
+
+
+class SubmissionPointsCalculatorTestCase(UnitTestBase):
+    """
+    Checks that SubmissionPointsCalculator computes the same points as
+    SubmissionResultFeedback for projects with randomly chosen
+    feedback settings and submissions with randomly chosen results.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.rand = random.Random(42)
+        self.project = obj_build.make_project()
+
+        self.cmds = []
+        for i in range(3):
+            suite = obj_build.make_ag_test_suite(
+                self.project,
+                normal_fdbk_config=self._random_suite_fdbk(),
+                ultimate_submission_fdbk_config=self._random_suite_fdbk(),
+                past_limit_submission_fdbk_config=self._random_suite_fdbk(),
+                staff_viewer_fdbk_config=self._random_suite_fdbk())
+            for j in range(3):
+                case = obj_build.make_ag_test_case(
+                    suite,
+                    normal_fdbk_config=self._random_case_fdbk(),
+                    ultimate_submission_fdbk_config=self._random_case_fdbk(),
+                    past_limit_submission_fdbk_config=self._random_case_fdbk(),
+                    staff_viewer_fdbk_config=self._random_case_fdbk())
+                for k in range(2):
+                    self.cmds.append(self._make_random_cmd(case))
+
+        self.mutation_suite = ag_models.MutationTestSuite.objects.validate_and_create(
+            name='mutation_suite', project=self.project,
+            buggy_impl_names=['bug1', 'bug2', 'bug3'],
+            points_per_exposed_bug=Decimal('1.5'))
+
+        self.submissions = []
+        for i in range(5):
+            group = obj_build.make_group(project=self.project)
+            for j in range(2):
+                self.submissions.append(self._make_random_submission(group))
+
+    def test_points_match_submission_fdbk(self):
+        self._check_points_match_submission_fdbk()
+
+    def test_results_for_deleted_tests_ignored(self):
+        self.cmds[0].delete()
+        self.cmds[-1].ag_test_case.delete()
+        self._check_points_match_submission_fdbk()
+
+    def test_results_with_no_correctness_value(self):
+        # E.g., a command's expected output was added after grading.
+        cmd_results = ag_models.AGTestCommandResult.objects.filter(
+            ag_test_case_result__ag_test_suite_result__submission__in=self.submissions)
+        for cmd_result in cmd_results:
+            for field in 'return_code_correct', 'stdout_correct', 'stderr_correct':
+                if self.rand.random() < 0.5:
+                    setattr(cmd_result, field, None)
+            cmd_result.save()
+
+        for submission in self.submissions:
+            update_denormalized_ag_test_results(submission.pk)
+
+        self._check_points_match_submission_fdbk()
+
+    def test_no_mutation_test_suites(self):
+        self.mutation_suite.delete()
+        self._check_points_match_submission_fdbk()
+
+    def _check_points_match_submission_fdbk(self):
+        submissions = list(get_submissions_with_results_queryset().filter(
+            pk__in=[submission.pk for submission in self.submissions]))
+        ag_test_preloader = AGTestPreLoader(self.project)
+        mutation_test_suite_preloader = MutationTestSuitePreLoader(self.project)
+
+        for fdbk_category in ag_models.FeedbackCategory:
+            calculator = SubmissionPointsCalculator(
+                fdbk_category, ag_test_preloader, mutation_test_suite_preloader)
+            all_points = calculator.get_points_for_submissions(submissions)
+            self.assertCountEqual([submission.pk for submission in submissions], all_points)
+
+            for submission in submissions:
+                points = all_points[submission.pk]
+                fdbk = SubmissionResultFeedback(
+                    submission, fdbk_category, ag_test_preloader, mutation_test_suite_preloader)
+
+                self.assertEqual(fdbk.total_points, points.total_points)
+                self.assertIs(type(fdbk.total_points), type(points.total_points))
+                self.assertEqual(fdbk.total_points_possible, points.total_points_possible)
+                self.assertIs(
+                    type(fdbk.total_points_possible), type(points.total_points_possible))
+
+                self.assertEqual(
+                    [(suite_fdbk.ag_test_suite_pk,
+                      suite_fdbk.total_points,
+                      suite_fdbk.total_points_possible)
+                     for suite_fdbk in fdbk.ag_test_suite_results],
+                    [(suite_points.ag_test_suite_pk,
+                      suite_points.total_points,
+                      suite_points.total_points_possible)
+                     for suite_points in points.ag_test_suite_points])
+
+                for suite_fdbk, suite_points in zip(
+                        fdbk.ag_test_suite_results, points.ag_test_suite_points):
+                    if not suite_fdbk.fdbk_conf.show_individual_tests:
+                        continue
+
+                    self.assertEqual(
+                        [(case_fdbk.ag_test_case_pk,
+                          case_fdbk.total_points,
+                          case_fdbk.total_points_possible)
+                         for case_fdbk in suite_fdbk.ag_test_case_results],
+                        [(case_points.ag_test_case_pk,
+                          case_points.total_points,
+                          case_points.total_points_possible)
+                         for case_points in suite_points.ag_test_case_points])
+
+                self.assertEqual(
+                    [(suite_fdbk.mutation_test_suite_pk,
+                      suite_fdbk.total_points,
+                      suite_fdbk.total_points_possible)
+                     for suite_fdbk in fdbk.mutation_test_suite_results],
+                    [(suite_points.mutation_test_suite_pk,
+                      suite_points.total_points,
+                      suite_points.total_points_possible)
+                     for suite_points in points.mutation_test_suite_points])
+
+    def _make_random_cmd(self, case: ag_models.AGTestCase) -> ag_models.AGTestCommand:
+        return obj_build.make_full_ag_test_command(
+            case,
+            expected_return_code=self.rand.choice(list(ag_models.ExpectedReturnCode)),
+            expected_stdout_source=self.rand.choice(
+                [ag_models.ExpectedOutputSource.none, ag_models.ExpectedOutputSource.text]),
+            expected_stderr_source=self.rand.choice(
+                [ag_models.ExpectedOutputSource.none, ag_models.ExpectedOutputSource.text]),
+            points_for_correct_return_code=self.rand.randint(0, 5),
+            points_for_correct_stdout=self.rand.randint(0, 5),
+            points_for_correct_stderr=self.rand.randint(0, 5),
+            deduction_for_wrong_return_code=-self.rand.randint(0, 5),
+            deduction_for_wrong_stdout=-self.rand.randint(0, 5),
+            deduction_for_wrong_stderr=-self.rand.randint(0, 5),
+            normal_fdbk_config=self._random_cmd_fdbk(),
+            first_failed_test_normal_fdbk_config=(
+                self._random_cmd_fdbk() if self.rand.random() < 0.5 else None),
+            ultimate_submission_fdbk_config=self._random_cmd_fdbk(),
+            past_limit_submission_fdbk_config=self._random_cmd_fdbk(),
+            staff_viewer_fdbk_config=self._random_cmd_fdbk(),
+        )
+
+    def _make_random_submission(self, group: ag_models.Group) -> ag_models.Submission:
+        submission = obj_build.make_finished_submission(group=group)
+        for suite in self.project.ag_test_suites.all():
+            suite_result = ag_models.AGTestSuiteResult.objects.validate_and_create(
+                ag_test_suite=suite, submission=submission)
+            for case in suite.ag_test_cases.all():
+                case_result = ag_models.AGTestCaseResult.objects.validate_and_create(
+                    ag_test_case=case, ag_test_suite_result=suite_result)
+                for cmd in case.ag_test_commands.all():
+                    obj_build.make_correct_ag_test_command_result(
+                        cmd, ag_test_case_result=case_result,
+                        return_code_correct=self.rand.random() < 0.7,
+                        stdout_correct=self.rand.random() < 0.7,
+                        stderr_correct=self.rand.random() < 0.7)
+
+        ag_models.MutationTestSuiteResult.objects.validate_and_create(
+            mutation_test_suite=self.mutation_suite,
+            submission=submission,
+            bugs_exposed=self.rand.sample(
+                self.mutation_suite.buggy_impl_names, self.rand.randint(0, 3)))
+
+        return update_denormalized_ag_test_results(submission.pk)
+
+    def _random_suite_fdbk(self):
+        return {
+            'visible': self.rand.random() < 0.8,
+            'show_individual_tests': self.rand.random() < 0.8,
+        }
+
+    def _random_case_fdbk(self):
+        return {'visible': self.rand.random() < 0.8}
+
+    def _random_cmd_fdbk(self):
+        return {
+            'visible': self.rand.random() < 0.8,
+            'show_points': self.rand.random() < 0.8,
+            'return_code_fdbk_level': self.rand.choice(list(ag_models.ValueFeedbackLevel)),
+            'stdout_fdbk_level': self.rand.choice(list(ag_models.ValueFeedbackLevel)),
+            'stderr_fdbk_level': self.rand.choice(list(ag_models.ValueFeedbackLevel)),
+        }
+
+
+@override_settings(COMPACT_DENORMALIZED_AG_TEST_RESULTS=True)
+class CompactDenormalizedResultsSubmissionPointsCalculatorTestCase(
+    SubmissionPointsCalculatorTestCase
+):
+    pass
@@ -0,0 +1,139 @@
+import autograder.core.models as ag_models
+import autograder.utils.testing.model_obj_builders as obj_build
+from autograder.core.models.ag_test.feedback_category import FeedbackCategory
+from autograder.core.submission_feedback import (
+    AGTestPreLoader, MutationTestSuitePreLoader, update_denormalized_ag_test_results)
+from autograder.core.submission_scores import (
+    clear_submission_scores, get_scoring_config_fingerprint, get_submission_scores,
+    update_submission_scores)
+from autograder.core.tests.test_submission_feedback.fdbk_getter_shortcuts import (
+    get_submission_fdbk)
+from autograder.utils.testing import UnitTestBase
+
+
+class SubmissionScoresTestCase(UnitTestBase):
+    def setUp(self):
+        super().setUp()
+        self.project = obj_build.make_project()
+        self.group = obj_build.make_group(project=self.project)
+
+        suite = obj_build.make_ag_test_suite(self.project)
+        case = obj_build.make_ag_test_case(suite)
+        self.cmd = obj_build.make_full_ag_test_command(case)
+
+        self.correct_submission = obj_build.make_finished_submission(group=self.group)
+        obj_build.make_correct_ag_test_command_result(
+            self.cmd, submission=self.correct_submission)
+        self.correct_submission = update_denormalized_ag_test_results(
+            self.correct_submission.pk)
+
+        self.incorrect_submission = obj_build.make_finished_submission(group=self.group)
+        obj_build.make_incorrect_ag_test_command_result(
+            self.cmd, submission=self.incorrect_submission)
+        self.incorrect_submission = update_denormalized_ag_test_results(
+            self.incorrect_submission.pk)
+
+    def test_update_submission_scores(self):
+        update_submission_scores(self.correct_submission.pk)
+
+        self.assertCountEqual(
+            [FeedbackCategory.max.value, FeedbackCategory.normal.value],
+            self.correct_submission.scores.values_list('fdbk_category', flat=True))
+        for fdbk_category in FeedbackCategory.max, FeedbackCategory.normal:
+            self._check_score_matches_fdbk(self.correct_submission, fdbk_category)
+
+        # Updating again replaces the existing scores.
+        update_submission_scores(self.correct_submission.pk)
+        self.assertEqual(2, self.correct_submission.scores.count())
+
+    def test_clear_submission_scores(self):
+        update_submission_scores(self.correct_submission.pk)
+        update_submission_scores(self.incorrect_submission.pk)
+
+        clear_submission_scores(self.correct_submission.pk)
+        self.assertFalse(self.correct_submission.scores.exists())
+        self.assertEqual(2, self.incorrect_submission.scores.count())
+
+    def test_get_submission_scores_computes_missing_scores(self):
+        self.assertFalse(ag_models.SubmissionScore.objects.exists())
+
+        scores = self._get_scores(FeedbackCategory.past_limit_submission)
+        self.assertEqual(
+            {self.correct_submission.pk, self.incorrect_submission.pk}, set(scores.keys()))
+        self.assertEqual(2, ag_models.SubmissionScore.objects.count())
+
+        for submission in self.correct_submission, self.incorrect_submission:
+            self._check_score_matches_fdbk(submission, FeedbackCategory.past_limit_submission)
+
+    def test_get_submission_scores_loads_up_to_date_scores(self):
+        self._get_scores(FeedbackCategory.max)
+
+        scores = self._get_scores(FeedbackCategory.max)
+        self.assertEqual(2, ag_models.SubmissionScore.objects.count())
+        self.assertGreater(
+            scores[self.correct_submission.pk].get_total_points(),
+            scores[self.incorrect_submission.pk].get_total_points())
+
+    def test_get_submission_scores_recomputes_stale_scores(self):
+        original = self._get_scores(FeedbackCategory.max)[self.correct_submission.pk]
+        original_fingerprint = original.scoring_config_fingerprint
+
+        self.cmd.validate_and_update(
+            points_for_correct_return_code=self.cmd.points_for_correct_return_code + 5)
+        self.assertNotEqual(
+            original_fingerprint, get_scoring_config_fingerprint(self.project))
+
+        updated = self._get_scores(FeedbackCategory.max)[self.correct_submission.pk]
+        self.assertEqual(original.pk, updated.pk)
+        self.assertEqual(original.get_total_points() + 5, updated.get_total_points())
+        self.assertEqual(2, ag_models.SubmissionScore.objects.count())
+        self._check_score_matches_fdbk(self.correct_submission, FeedbackCategory.max)
+
+    def test_scoring_config_fingerprint_changes_when_suite_added_or_removed(self):
+        original = get_scoring_config_fingerprint(self.project)
+
+        suite = obj_build.make_ag_test_suite(self.project)
+        with_suite = get_scoring_config_fingerprint(self.project)
+        self.assertNotEqual(original, with_suite)
+
+        mutation_suite = ag_models.MutationTestSuite.objects.validate_and_create(
+            name='mutation', project=self.project)
+        with_mutation_suite = get_scoring_config_fingerprint(self.project)
+        self.assertNotEqual(with_suite, with_mutation_suite)
+
+        suite.delete()
+        mutation_suite.delete()
+        self.assertEqual(original, get_scoring_config_fingerprint(self.project))
+
+    def test_scoring_config_fingerprint_unaffected_by_other_projects(self):
+        original = get_scoring_config_fingerprint(self.project)
+
+        other_project = obj_build.make_project(course=self.project.course)
+        obj_build.make_ag_test_suite(other_project)
+        self.assertEqual(original, get_scoring_config_fingerprint(self.project))
+
+    def _get_scores(self, fdbk_category: FeedbackCategory):
+        submissions = ag_models.get_submissions_with_results_queryset().filter(
+            group=self.group)
+        return get_submission_scores(
+            self.project, submissions, fdbk_category,
+            AGTestPreLoader(self.project), MutationTestSuitePreLoader(self.project))
+
+    def _check_score_matches_fdbk(
+        self, submission: ag_models.Submission, fdbk_category: FeedbackCategory
+    ):
+        score = submission.scores.get(fdbk_category=fdbk_category.value)
+        fdbk = get_submission_fdbk(submission, fdbk_category)
+        self.assertEqual(fdbk.total_points, score.get_total_points())
+        self.assertEqual(fdbk.total_points_possible, score.get_total_points_possible())
+        self.assertEqual(fdbk.total_points, score.total_points)
+        self.assertEqual(fdbk.total_points_possible, score.total_points_possible)
+        self.assertEqual(
+            {
+                suite_fdbk.ag_test_suite_pk: {
+                    'total_points': suite_fdbk.total_points,
+                    'total_points_possible': suite_fdbk.total_points_possible,
+                }
+                for suite_fdbk in fdbk.ag_test_suite_results
+            },
+            score.get_ag_test_suite_points())
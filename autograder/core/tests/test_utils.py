@@ -128,6 +128,14 @@ cheese\r
         diff = core_ut.get_diff(self.file1.name, self.file2.name)
         self.assertEqual(expected_diff, diff.diff_content)
 
+    def test_null_bytes_diffed_as_text(self) -> None:
+        self._write_and_seek(self.file1, b'spam\x00\negg\n')
+        self._write_and_seek(self.file2, b'spam\x00\nsausage\n')
+
+        diff = core_ut.get_diff(self.file1.name, self.file2.name)
+        self.assertFalse(diff.diff_pass)
+        self.assertEqual(['  spam\x00\n', '- egg\n', '+ sausage\n'], diff.diff_content)
+
     def test_ignore_case(self):
         self._write_and_seek(self.file1, 'SPAM')
         self._write_and_seek(self.file2, 'spam')
@@ -152,6 +160,15 @@ cheese\r
         result = core_ut.get_diff(self.file1.name, self.file2.name, ignore_blank_lines=True)
         self.assertTrue(result.diff_pass)
 
+    # Like GNU diff's --ignore-blank-lines, only groups of changes that
+    # consist entirely of blank lines are ignored.
+    def test_ignore_blank_lines_changes_next_to_blank_lines(self):
+        self._write_and_seek(self.file1, 'spam\n\n')
+        self._write_and_seek(self.file2, '\nspam\n')
+        result = core_ut.get_diff(self.file1.name, self.file2.name, ignore_blank_lines=True)
+        self.assertFalse(result.diff_pass)
+        self.assertEqual(['- spam\n', '  \n', '+ spam\n'], result.diff_content)
+
     def test_all_ignore_options(self):
         self._write_and_seek(self.file1, 'spam sausage\n\n\negg\n')
         self._write_and_seek(self.file2, 'SPAM   \tsausage\negg\n')
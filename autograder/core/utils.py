@@ -3,10 +3,8 @@ from __future__ import annotations
 import datetime
 import enum
 import os
-import re
-import subprocess
 import typing
-from typing import List, Tuple, Type, TypeVar, cast
+from typing import Tuple, Type, TypeVar, cast
 import zoneinfo
 
 from django.conf import settings
@@ -14,6 +12,11 @@ from django.core import exceptions
 from django.utils import timezone
 
 from . import constants as const
+from .diff import DiffResult as DiffResult
+from .diff import compute_diff
+from .diff import files_equivalent as files_equivalent
+from .diff import get_cached_diff as get_cached_diff
+from .diff import get_cached_diff_size as get_cached_diff_size
 
 if typing.TYPE_CHECKING:
     from .models.course import Course
@@ -22,50 +25,25 @@ if typing.TYPE_CHECKING:
     from .models.submission import Submission
 
 
-class DiffResult:
-    def __init__(self, diff_pass: bool, diff_content: List[str]):
-        self.diff_pass = diff_pass
-        self.diff_content = diff_content
-
-
-_DIFF_LINE_REGEX = re.compile(r'^(?:  |\+ |- ).*\n+'.encode(), flags=re.MULTILINE)
-
-
 def get_diff(first_filename: str, second_filename: str,
              ignore_case: bool = False,
              ignore_whitespace: bool = False,
              ignore_whitespace_changes: bool = False,
              ignore_blank_lines: bool = False) -> DiffResult:
     """
-    Diffs first and second using the GNU diff command line utility.
-    Returns an empty list if first and second are considered equivalent.
+    Diffs first and second in-process (see autograder.core.diff).
+    If first and second are considered equivalent, diff_pass is True
+    and every line of first is listed as unchanged.
     Otherwise, returns a list of strings, each of which are prefixed
     with one of the two-letter opcodes used by
     https://docs.python.org/3.5/library/difflib.html#difflib.Differ
     """
-    # We're adding newlines at the beginning of each formatted line
-    # because GNU diff will otherwise handle missing trailing
-    # newlines in a way that the client can't reliably parse.
-    diff_cmd = ['diff',
-                '--text',  # Consider all files to be text
-                '--new-line-format', '+ %L\n',
-                '--old-line-format', '- %L\n',
-                '--unchanged-line-format', '  %L\n']
-    if ignore_case:
-        diff_cmd.append('--ignore-case')
-    if ignore_whitespace:
-        diff_cmd.append('--ignore-all-space')
-    if ignore_whitespace_changes:
-        diff_cmd.append('--ignore-space-change')
-    if ignore_blank_lines:
-        diff_cmd.append('--ignore-blank-lines')
-
-    diff_cmd += [first_filename, second_filename]
-
-    diff_result = subprocess.run(diff_cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-    diff_list = [match.group()[:-1].decode('utf-8', 'surrogateescape')
-                 for match in _DIFF_LINE_REGEX.finditer(diff_result.stdout)]
-    return DiffResult(diff_result.returncode == 0, diff_list)
+    return compute_diff(
+        first_filename, second_filename,
+        ignore_case=ignore_case,
+        ignore_whitespace=ignore_whitespace,
+        ignore_whitespace_changes=ignore_whitespace_changes,
+        ignore_blank_lines=ignore_blank_lines)
 
 
 def get_24_hour_period(
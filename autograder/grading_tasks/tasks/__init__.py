@@ -5,10 +5,13 @@ from .grade_ag_test import (
     grade_ag_test_suite_impl,
     grade_deferred_ag_test_suite,
     grade_ag_test_case_impl,
-    grade_ag_test_command_impl
+    grade_ag_test_command_impl,
+    run_ag_test_command_impl,
+    save_ag_test_command_results
 )
 from .grade_mutation_test_suite import (
     grade_mutation_test_suite_impl, grade_deferred_mutation_test_suite)
+from .grading_time_estimates import clear_grading_time_estimates
 from .utils import run_ag_test_command, run_ag_command, run_command_from_args
 
 from .queueing import queue_submissions, register_project_queues
@@ -2,14 +2,17 @@ import shutil
 import tempfile
 import traceback
 import uuid
-from typing import IO, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import IO, Dict, List, Optional, Sequence, Tuple
 
 import celery
 from autograder_sandbox import AutograderSandbox, SandboxNotDestroyed, SandboxNotStopped
+from autograder_sandbox.autograder_sandbox import CompletedCommand
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.mail import send_mail
 from django.conf import settings
-from django.db import IntegrityError, transaction
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
 
 import autograder.core.models as ag_models
 import autograder.core.utils as core_ut
@@ -18,6 +21,8 @@ from autograder.core.submission_feedback import update_denormalized_ag_test_resu
 from autograder.utils.retry import retry_ag_test_cmd, retry_should_recover
 
 from .exceptions import SubmissionRejected, TestDeleted
+from .instructor_files_image import get_suite_sandbox_image
+from .sandbox_pool import get_sandbox_pool
 from .utils import (FileCloser, add_files_to_sandbox, load_queryset_with_retry,
                     mark_submission_as_error, run_ag_test_command, run_command_from_args)
 
@@ -70,18 +75,27 @@ def grade_ag_test_suite_impl(ag_test_suite: ag_models.AGTestSuite,
     if suite_result is None:
         return
 
-    sandbox = AutograderSandbox(
-        name='submission{}-suite{}-{}'.format(submission.pk, ag_test_suite.pk, uuid.uuid4().hex),
-        environment_variables={
-            'usernames': ' '.join(group.member_names)
-        },
+    environment_variables = {
+        'usernames': ' '.join(group.member_names)
+    }
+    docker_image, instructor_files_in_image = get_suite_sandbox_image(ag_test_suite)
+    sandbox = get_sandbox_pool().checkout(
+        docker_image=docker_image,
         allow_network_access=ag_test_suite.allow_network_access,
-        docker_image=ag_test_suite.sandbox_docker_image.tag)
+        environment_variables=environment_variables)
+    if sandbox is None:
+        sandbox = AutograderSandbox(
+            name='submission{}-suite{}-{}'.format(
+                submission.pk, ag_test_suite.pk, uuid.uuid4().hex),
+            environment_variables=environment_variables,
+            allow_network_access=ag_test_suite.allow_network_access,
+            docker_image=docker_image)
     print(ag_test_suite.sandbox_docker_image.to_dict())
-    print(sandbox.docker_image)
     try:
         with sandbox:
-            add_files_to_sandbox(sandbox, ag_test_suite, submission)
+            add_files_to_sandbox(
+                sandbox, ag_test_suite, submission,
+                add_instructor_files=not instructor_files_in_image)
 
             try:
                 print('Running setup for', ag_test_suite.name)
@@ -98,10 +112,20 @@ def grade_ag_test_suite_impl(ag_test_suite: ag_models.AGTestSuite,
             if len(ag_test_cases_to_run) != 0:
                 ag_test_case_queryset = ag_test_case_queryset.filter(pk__in=ag_test_cases_to_run)
 
-            for ag_test_case in load_queryset_with_retry(ag_test_case_queryset):
-                print('Grading test case', ag_test_case.name)
-                case_result = grade_ag_test_case_impl(sandbox, ag_test_case, suite_result)
-                on_test_case_finished(case_result)
+            ag_test_cases = load_queryset_with_retry(ag_test_case_queryset)
+            if ag_test_suite.max_concurrent_test_cases > 1 and len(ag_test_cases) > 1:
+                _grade_ag_test_cases_concurrently(
+                    sandbox,
+                    ag_test_cases,
+                    suite_result,
+                    max_workers=ag_test_suite.max_concurrent_test_cases,
+                    on_test_case_finished=on_test_case_finished
+                )
+            else:
+                for ag_test_case in ag_test_cases:
+                    print('Grading test case', ag_test_case.name)
+                    case_result = grade_ag_test_case_impl(sandbox, ag_test_case, suite_result)
+                    on_test_case_finished(case_result)
 
             # Used for testing SandboxNotStopped/SandboxNOtDestroyed error handling.
             _mocking_hook_sandbox_teardown_error()
@@ -113,7 +137,8 @@ def grade_ag_test_suite_impl(ag_test_suite: ag_models.AGTestSuite,
         # we proceed as normal and send an urgent email to the sysadmin.
         send_mail(
             subject=f'[Autograder.io] {type(e).__name__} error on autograder',
-            message=f'Error encountered when tearing down sandbox with ID {sandbox.name}. '
+            message=f'Error encountered when tearing down sandbox with ID {sandbox.name} '
+                    f'(submission {submission.pk}, suite {ag_test_suite.pk}). '
                     'If the exception in the subject is SandboxNotStopped, this is urgent.\n\n'
                     '(UMmich DCO): Go to the monitoring site to figure out which machine '
                     f'this sandbox is running on, then try running "docker kill {sandbox.name}" '
@@ -126,6 +151,41 @@ def grade_ag_test_suite_impl(ag_test_suite: ag_models.AGTestSuite,
         )
 
 
+def _grade_ag_test_cases_concurrently(sandbox: AutograderSandbox,
+                                      ag_test_cases: List[ag_models.AGTestCase],
+                                      suite_result: ag_models.AGTestSuiteResult,
+                                      *,
+                                      max_workers: int,
+                                      on_test_case_finished):
+    """
+    Grades ag_test_cases in the same sandbox using up to max_workers
+    threads. on_test_case_finished is called from the calling thread
+    as each test case finishes, so callbacks never run concurrently
+    with each other.
+    """
+    def _grade_ag_test_case_in_worker(ag_test_case: ag_models.AGTestCase):
+        try:
+            print('Grading test case', ag_test_case.name)
+            return grade_ag_test_case_impl(sandbox, ag_test_case, suite_result)
+        finally:
+            # Each worker thread gets its own database connection,
+            # which we need to close ourselves.
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_grade_ag_test_case_in_worker, ag_test_case)
+            for ag_test_case in ag_test_cases
+        ]
+        try:
+            for future in as_completed(futures):
+                on_test_case_finished(future.result())
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+
 def _mocking_hook_sandbox_teardown_error():
     pass
 
@@ -206,27 +266,67 @@ def grade_ag_test_case_impl(sandbox: AutograderSandbox,
         return
 
     @retry_ag_test_cmd
-    def _grade_ag_test_cmd_with_retry(ag_test_cmd, case_result):
-        grade_ag_test_command_impl(sandbox, ag_test_cmd, case_result)
-
-    for ag_test_cmd in ag_test_case.ag_test_commands.all():
+    def _run_ag_test_cmd_with_retry(ag_test_cmd, case_result):
+        return run_ag_test_command_impl(sandbox, ag_test_cmd, case_result)
+
+    # The results of all the commands in the test case are saved together
+    # once they've all finished so that saving them takes a constant
+    # number of database round trips.
+    pending_results = []
+    for ag_test_cmd in load_queryset_with_retry(ag_test_case.ag_test_commands.all()):
         print('Running command', ag_test_cmd.name)
-        _grade_ag_test_cmd_with_retry(ag_test_cmd, case_result)
+        pending_results.append(_run_ag_test_cmd_with_retry(ag_test_cmd, case_result))
+
+    save_ag_test_command_results(case_result, pending_results)
 
     return case_result
 
 
+class PendingAGTestCommandResult:
+    """
+    The outcome of running an AGTestCommand that has not yet been saved
+    to the database.
+    """
+    def __init__(self, ag_test_cmd: ag_models.AGTestCommand,
+                 result_data: Dict[str, object],
+                 run_result: CompletedCommand):
+        self.ag_test_cmd = ag_test_cmd
+        self.result_data = result_data
+        self.run_result = run_result
+
+
 def grade_ag_test_command_impl(sandbox: AutograderSandbox,
                                ag_test_cmd: ag_models.AGTestCommand,
                                case_result: ag_models.AGTestCaseResult):
+    """
+    Runs ag_test_cmd and saves its result.
+    To grade several commands, prefer calling run_ag_test_command_impl
+    for each command and saving all the results at once with
+    save_ag_test_command_results.
+    """
+    save_ag_test_command_results(
+        case_result, [run_ag_test_command_impl(sandbox, ag_test_cmd, case_result)])
+
+
+def run_ag_test_command_impl(
+    sandbox: AutograderSandbox,
+    ag_test_cmd: ag_models.AGTestCommand,
+    case_result: ag_models.AGTestCaseResult
+) -> PendingAGTestCommandResult:
+    """
+    Runs ag_test_cmd and checks its output, but does NOT save the result.
+    """
     with FileCloser() as file_closer:
         run_result = run_ag_test_command(ag_test_cmd, sandbox, case_result.ag_test_suite_result)
 
-        result_data = {
+        result_data: Dict[str, object] = {
             'return_code': run_result.return_code,
             'timed_out': run_result.timed_out,
             'stdout_truncated': run_result.stdout_truncated,
             'stderr_truncated': run_result.stderr_truncated,
+            'return_code_correct': None,
+            'stdout_correct': None,
+            'stderr_correct': None,
         }
 
         if ag_test_cmd.expected_return_code == ag_models.ExpectedReturnCode.zero:
@@ -238,46 +338,111 @@ def grade_ag_test_command_impl(sandbox: AutograderSandbox,
         file_closer.register_file(expected_stdout)
 
         if expected_stdout_filename is not None:
-            diff = core_ut.get_diff(
+            result_data['stdout_correct'] = core_ut.files_equivalent(
                 expected_stdout_filename, run_result.stdout.name,
                 ignore_case=ag_test_cmd.ignore_case,
                 ignore_whitespace=ag_test_cmd.ignore_whitespace,
                 ignore_whitespace_changes=ag_test_cmd.ignore_whitespace_changes,
                 ignore_blank_lines=ag_test_cmd.ignore_blank_lines)
-            result_data['stdout_correct'] = diff.diff_pass
 
         expected_stderr, expected_stderr_filename = _get_expected_stderr_file_and_name(ag_test_cmd)
         file_closer.register_file(expected_stderr)
 
         if expected_stderr_filename is not None:
-            diff = core_ut.get_diff(
+            result_data['stderr_correct'] = core_ut.files_equivalent(
                 expected_stderr_filename, run_result.stderr.name,
                 ignore_case=ag_test_cmd.ignore_case,
                 ignore_whitespace=ag_test_cmd.ignore_whitespace,
                 ignore_whitespace_changes=ag_test_cmd.ignore_whitespace_changes,
                 ignore_blank_lines=ag_test_cmd.ignore_blank_lines)
-            result_data['stderr_correct'] = diff.diff_pass
 
         print(result_data)
 
-        @retry_should_recover
-        def save_ag_test_cmd_result():
-            try:
-                with transaction.atomic():
-                    cmd_result = ag_models.AGTestCommandResult.objects.update_or_create(
-                        defaults=result_data,
-                        ag_test_command=ag_test_cmd,
-                        ag_test_case_result=case_result)[0]  # type: ag_models.AGTestCommandResult
-
-                    with open(cmd_result.stdout_filename, 'wb') as f:
-                        shutil.copyfileobj(run_result.stdout, f)
-                    with open(cmd_result.stderr_filename, 'wb') as f:
-                        shutil.copyfileobj(run_result.stderr, f)
-            except IntegrityError:
-                # The command or case result has likely been deleted
-                return
+        return PendingAGTestCommandResult(ag_test_cmd, result_data, run_result)
+
 
-        save_ag_test_cmd_result()
+@retry_should_recover
+def save_ag_test_command_results(case_result: ag_models.AGTestCaseResult,
+                                 pending_results: Sequence[PendingAGTestCommandResult]) -> None:
+    """
+    Creates or updates the AGTestCommandResults for pending_results
+    using a constant number of queries, then copies the commands'
+    output into place.
+    """
+    if not pending_results:
+        return
+
+    try:
+        with transaction.atomic():
+            existing_results = {
+                cmd_result.ag_test_command_id: cmd_result
+                for cmd_result in ag_models.AGTestCommandResult.objects.select_for_update().filter(
+                    ag_test_case_result=case_result,
+                    ag_test_command__in=[pending.ag_test_cmd for pending in pending_results]
+                )
+            }
+
+            now = timezone.now()
+            to_create = []
+            to_update = []
+            cmd_results = []
+            for pending in pending_results:
+                cmd_result = existing_results.get(pending.ag_test_cmd.pk)
+                if cmd_result is None:
+                    cmd_result = ag_models.AGTestCommandResult(
+                        ag_test_command=pending.ag_test_cmd,
+                        ag_test_case_result=case_result,
+                        **pending.result_data
+                    )
+                    to_create.append(cmd_result)
+                else:
+                    for field_name, value in pending.result_data.items():
+                        setattr(cmd_result, field_name, value)
+                    cmd_result.last_modified = now
+                    # Avoids a query per result when computing output filenames.
+                    cmd_result.ag_test_case_result = case_result
+                    to_update.append(cmd_result)
+
+                cmd_results.append(cmd_result)
+
+            if to_create:
+                ag_models.AGTestCommandResult.objects.bulk_create(to_create)
+            if to_update:
+                ag_models.AGTestCommandResult.objects.bulk_update(
+                    to_update, fields=[*_AG_TEST_COMMAND_RESULT_FIELDS, 'last_modified'])
+
+            for cmd_result, pending in zip(cmd_results, pending_results):
+                # In case this is a retry, make sure we copy all of the output.
+                pending.run_result.stdout.seek(0)
+                pending.run_result.stderr.seek(0)
+
+                with open(cmd_result.stdout_filename, 'wb') as f:
+                    shutil.copyfileobj(pending.run_result.stdout, f)
+                with open(cmd_result.stderr_filename, 'wb') as f:
+                    shutil.copyfileobj(pending.run_result.stderr, f)
+
+            # Diffs cached for the previous output (e.g., before a rerun)
+            # are now stale.
+            for cmd_result in to_update:
+                cmd_result.clear_cached_diffs()
+    except IntegrityError:
+        # A command or the case result has likely been deleted.
+        # Save the results one at a time so that we only skip the
+        # results that can't be saved.
+        if len(pending_results) > 1:
+            for pending in pending_results:
+                save_ag_test_command_results(case_result, [pending])
+
+
+_AG_TEST_COMMAND_RESULT_FIELDS = [
+    'return_code',
+    'timed_out',
+    'stdout_truncated',
+    'stderr_truncated',
+    'return_code_correct',
+    'stdout_correct',
+    'stderr_correct',
+]
 
 
 def _get_expected_stdout_file_and_name(
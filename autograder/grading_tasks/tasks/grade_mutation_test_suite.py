@@ -1,9 +1,11 @@
 import shutil
 import tempfile
+import threading
 import traceback
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from io import FileIO
-from typing import List, Tuple
+from typing import IO, Callable, Dict, List, Optional, Tuple, TypeVar
 
 import celery
 from autograder_sandbox import AutograderSandbox, SandboxNotDestroyed, SandboxNotStopped
@@ -16,6 +18,8 @@ from django.db import IntegrityError, transaction
 import autograder.core.models as ag_models
 from autograder.utils.retry import retry_should_recover
 
+from .instructor_files_image import get_suite_sandbox_image
+from .sandbox_pool import get_sandbox_pool
 from .utils import add_files_to_sandbox, mark_submission_as_error, run_ag_command
 
 
@@ -42,19 +46,27 @@ def grade_deferred_mutation_test_suite(mutation_test_suite_pk, submission_pk):
 
 def grade_mutation_test_suite_impl(mutation_test_suite: ag_models.MutationTestSuite,
                                    submission: ag_models.Submission):
-    sandbox = AutograderSandbox(
-        name='submission{}-suite{}-{}'.format(
-            submission.pk, mutation_test_suite.pk, uuid.uuid4().hex),
-        environment_variables={
-            'usernames': ' '.join(submission.group.member_names)
-        },
+    environment_variables = {
+        'usernames': ' '.join(submission.group.member_names)
+    }
+    docker_image, instructor_files_in_image = get_suite_sandbox_image(mutation_test_suite)
+    sandbox = get_sandbox_pool().checkout(
+        docker_image=docker_image,
         allow_network_access=mutation_test_suite.allow_network_access,
-        docker_image=mutation_test_suite.sandbox_docker_image.tag)
+        environment_variables=environment_variables)
+    if sandbox is None:
+        sandbox = AutograderSandbox(
+            name='submission{}-suite{}-{}'.format(
+                submission.pk, mutation_test_suite.pk, uuid.uuid4().hex),
+            environment_variables=environment_variables,
+            allow_network_access=mutation_test_suite.allow_network_access,
+            docker_image=docker_image)
     print(mutation_test_suite.sandbox_docker_image.to_dict())
-    print(sandbox.docker_image)
     try:
         with sandbox:
-            add_files_to_sandbox(sandbox, mutation_test_suite, submission)
+            add_files_to_sandbox(
+                sandbox, mutation_test_suite, submission,
+                add_instructor_files=not instructor_files_in_image)
 
             if mutation_test_suite.use_setup_command:
                 print('Running setup for', mutation_test_suite.name)
@@ -105,44 +117,31 @@ def grade_mutation_test_suite_impl(mutation_test_suite: ag_models.MutationTestSu
                 discarded_tests = student_tests[mutation_test_suite.max_num_student_tests:]
                 student_tests = student_tests[:mutation_test_suite.max_num_student_tests]
 
-            valid_tests: List[str] = []
-            invalid_tests: List[str] = []
-            timed_out_tests: List[str] = []
-
-            validity_check_stdout = tempfile.TemporaryFile()
-            validity_check_stderr = tempfile.TemporaryFile()
-            for test in student_tests:
-                validity_cmd = mutation_test_suite.student_test_validity_check_command
-                concrete_cmd = validity_cmd.cmd.replace(
-                    ag_models.MutationTestSuite.STUDENT_TEST_NAME_PLACEHOLDER, test)
-
-                validity_run_result = run_ag_command(validity_cmd, sandbox,
-                                                     cmd_str_override=concrete_cmd)
-                line = '\n------ {} ------\n'.format(test).encode()
-                validity_check_stdout.write(line)
-                validity_check_stderr.write(line)
-                shutil.copyfileobj(validity_run_result.stdout, validity_check_stdout)
-                shutil.copyfileobj(validity_run_result.stderr, validity_check_stderr)
-
-                if validity_run_result.return_code == 0:
-                    valid_tests.append(test)
-                else:
-                    invalid_tests.append(test)
-
-                if validity_run_result.timed_out:
-                    timed_out_tests.append(test)
+            check_tests_in_batch = (
+                ag_models.MutationTestSuite.ALL_DISCOVERED_TEST_NAMES_PLACEHOLDER
+                in mutation_test_suite.student_test_validity_check_command.cmd
+            )
+            if check_tests_in_batch:
+                (valid_tests, invalid_tests, timed_out_tests,
+                 validity_check_stdout, validity_check_stderr) = _check_test_validity_in_batch(
+                    sandbox, mutation_test_suite, student_tests)
+            else:
+                (valid_tests, invalid_tests, timed_out_tests,
+                 validity_check_stdout, validity_check_stderr) = _check_individual_test_validity(
+                    sandbox, mutation_test_suite, student_tests)
 
             run_individual_tests = (
                 ag_models.MutationTestSuite.STUDENT_TEST_NAME_PLACEHOLDER
                 in mutation_test_suite.grade_buggy_impl_command.cmd
             )
             if run_individual_tests:
-                exposed_bugs, buggy_impls_stdout, buggy_impls_stderr = (
+                exposed_bugs, kill_matrix, buggy_impls_stdout, buggy_impls_stderr = (
                     _run_individual_tests_against_mutants(
                         sandbox, mutation_test_suite, valid_tests
                     )
                 )
             else:
+                kill_matrix = {}
                 exposed_bugs, buggy_impls_stdout, buggy_impls_stderr = (
                     _run_test_batches_against_mutants(
                         sandbox, mutation_test_suite, valid_tests
@@ -155,6 +154,7 @@ def grade_mutation_test_suite_impl(mutation_test_suite: ag_models.MutationTestSu
                 setup_run_result,
                 student_tests, discarded_tests,
                 invalid_tests, timed_out_tests, exposed_bugs,
+                kill_matrix=kill_matrix,
                 get_test_names_run_result=get_test_names_result,
                 validity_check_stdout=validity_check_stdout,
                 validity_check_stderr=validity_check_stderr,
@@ -170,7 +170,8 @@ def grade_mutation_test_suite_impl(mutation_test_suite: ag_models.MutationTestSu
         # we proceed as normal and send an urgent email to the sysadmin.
         send_mail(
             subject=f'[Autograder.io] {type(e).__name__} error on autograder',
-            message=f'Error encountered when tearing down sandbox with ID {sandbox.name}. '
+            message=f'Error encountered when tearing down sandbox with ID {sandbox.name} '
+                    f'(submission {submission.pk}, suite {mutation_test_suite.pk}). '
                     'If the exception in the subject is SandboxNotStopped, this is urgent.\n\n'
                     '(UMmich DCO): Go to the monitoring site to figure out which machine '
                     f'this sandbox is running on, then try running "docker kill {sandbox.name}" '
@@ -187,36 +188,191 @@ def _mocking_hook_sandbox_teardown_error():
     pass
 
 
+ValidityCheckResultsType = Tuple[
+    List[str], List[str], List[str], tempfile.TemporaryFile, tempfile.TemporaryFile]
+
+
+def _check_individual_test_validity(
+    sandbox: AutograderSandbox,
+    mutation_test_suite: ag_models.MutationTestSuite,
+    student_tests: List[str],
+) -> ValidityCheckResultsType:
+    """
+    Runs the validity check command once for each of student_tests,
+    running up to mutation_test_suite.max_concurrent_validity_checks
+    of them at the same time.
+
+    Returns a tuple of (valid tests, invalid tests, timed out tests,
+    validity check stdout, validity check stderr).
+    """
+    validity_cmd = mutation_test_suite.student_test_validity_check_command
+
+    def _check_test_validity(test: str, stdout: IO[bytes], stderr: IO[bytes]):
+        concrete_cmd = validity_cmd.cmd.replace(
+            ag_models.MutationTestSuite.STUDENT_TEST_NAME_PLACEHOLDER, test)
+
+        validity_run_result = run_ag_command(validity_cmd, sandbox,
+                                             cmd_str_override=concrete_cmd)
+        line = '\n------ {} ------\n'.format(test).encode()
+        stdout.write(line)
+        stderr.write(line)
+        shutil.copyfileobj(validity_run_result.stdout, stdout)
+        shutil.copyfileobj(validity_run_result.stderr, stderr)
+
+        return validity_run_result.return_code == 0, validity_run_result.timed_out
+
+    results, validity_check_stdout, validity_check_stderr = _run_with_separate_output(
+        student_tests, mutation_test_suite.max_concurrent_validity_checks, _check_test_validity)
+
+    valid_tests: List[str] = []
+    invalid_tests: List[str] = []
+    timed_out_tests: List[str] = []
+    for test, (valid, timed_out) in zip(student_tests, results):
+        if valid:
+            valid_tests.append(test)
+        else:
+            invalid_tests.append(test)
+
+        if timed_out:
+            timed_out_tests.append(test)
+
+    return (valid_tests, invalid_tests, timed_out_tests,
+            validity_check_stdout, validity_check_stderr)
+
+
+def _check_test_validity_in_batch(
+    sandbox: AutograderSandbox,
+    mutation_test_suite: ag_models.MutationTestSuite,
+    student_tests: List[str],
+) -> ValidityCheckResultsType:
+    """
+    Runs the validity check command once for all of student_tests.
+    The tests whose names the command prints to stdout (one per line)
+    are valid. If the command times out, the remaining tests are
+    considered to have timed out.
+
+    Returns a tuple of (valid tests, invalid tests, timed out tests,
+    validity check stdout, validity check stderr).
+    """
+    validity_check_stdout = tempfile.TemporaryFile()
+    validity_check_stderr = tempfile.TemporaryFile()
+    if not student_tests:
+        return [], [], [], validity_check_stdout, validity_check_stderr
+
+    validity_cmd = mutation_test_suite.student_test_validity_check_command
+    concrete_cmd = validity_cmd.cmd.replace(
+        ag_models.MutationTestSuite.ALL_DISCOVERED_TEST_NAMES_PLACEHOLDER,
+        ' '.join([f'"{test_name}"' for test_name in student_tests])
+    )
+    validity_run_result = run_ag_command(validity_cmd, sandbox, cmd_str_override=concrete_cmd)
+
+    line = '\n------ all_discovered_tests ------\n'.encode()
+    validity_check_stdout.write(line)
+    validity_check_stderr.write(line)
+    output = validity_run_result.stdout.read()
+    validity_check_stdout.write(output)
+    shutil.copyfileobj(validity_run_result.stderr, validity_check_stderr)
+
+    reported_valid = {
+        line.strip() for line in output.decode(errors='backslashreplace').splitlines()
+    }
+    valid_tests = [test for test in student_tests if test in reported_valid]
+    invalid_tests = [test for test in student_tests if test not in reported_valid]
+    timed_out_tests = list(invalid_tests) if validity_run_result.timed_out else []
+
+    return (valid_tests, invalid_tests, timed_out_tests,
+            validity_check_stdout, validity_check_stderr)
+
+
+# Maps buggy impl names to {student test name: MutantTestOutcome}.
+KillMatrixType = Dict[str, Dict[str, str]]
+
+
 def _run_individual_tests_against_mutants(
     sandbox: AutograderSandbox,
     mutation_test_suite: ag_models.MutationTestSuite,
     valid_tests: List[str],
-) -> Tuple[List[str], tempfile.TemporaryFile, tempfile.TemporaryFile]:
-    exposed_bugs: List[str] = []
-    buggy_impls_stdout = tempfile.TemporaryFile()
-    buggy_impls_stderr = tempfile.TemporaryFile()
-    for bug in mutation_test_suite.buggy_impl_names:
-        for valid_test in valid_tests:
-            cmd_str = mutation_test_suite.grade_buggy_impl_command.cmd.replace(
-                ag_models.MutationTestSuite.STUDENT_TEST_NAME_PLACEHOLDER, valid_test
-            ).replace(ag_models.MutationTestSuite.BUGGY_IMPL_NAME_PLACEHOLDER, bug)
-
-            buggy_impl_run_result = run_ag_command(
-                mutation_test_suite.grade_buggy_impl_command,
-                sandbox,
-                cmd_str_override=cmd_str
-            )
-            line = '\n----- Bug "{}" with Test "{}" -----\n'.format(bug, valid_test).encode()
-            buggy_impls_stdout.write(line)
-            buggy_impls_stderr.write(line)
-            shutil.copyfileobj(buggy_impl_run_result.stdout, buggy_impls_stdout)
-            shutil.copyfileobj(buggy_impl_run_result.stderr, buggy_impls_stderr)
+) -> Tuple[List[str], KillMatrixType, tempfile.TemporaryFile, tempfile.TemporaryFile]:
+    """
+    Runs valid_tests one at a time against each buggy impl, stopping
+    at the first test that exposes the buggy impl.
+
+    A test that exposes one buggy impl is likely to expose others, so
+    the tests that have exposed the most buggy impls so far are run
+    first. This reduces the number of commands run for buggy impls
+    that get exposed.
+
+    Since that order depends on which buggy impls finished first when
+    they're graded concurrently, each buggy impl's kill matrix entries
+    and output are put back in the order of valid_tests.
+
+    Returns a tuple of (exposed bugs, kill matrix, stdout, stderr).
+    """
+    kill_matrix: KillMatrixType = {}
+    num_bugs_exposed_by_test = {test: 0 for test in valid_tests}
+    lock = threading.Lock()
+
+    def _run_individual_tests_against_mutant(bug: str, stdout: IO[bytes], stderr: IO[bytes]):
+        with lock:
+            # sorted() is stable, so ties are broken by discovery order.
+            ordered_tests = sorted(valid_tests, key=lambda test: -num_bugs_exposed_by_test[test])
+
+        # Keys are test names
+        outcomes: Dict[str, str] = {}
+        test_stdouts: Dict[str, IO[bytes]] = {}
+        test_stderrs: Dict[str, IO[bytes]] = {}
+        try:
+            for valid_test in ordered_tests:
+                cmd_str = mutation_test_suite.grade_buggy_impl_command.cmd.replace(
+                    ag_models.MutationTestSuite.STUDENT_TEST_NAME_PLACEHOLDER, valid_test
+                ).replace(ag_models.MutationTestSuite.BUGGY_IMPL_NAME_PLACEHOLDER, bug)
+
+                buggy_impl_run_result = run_ag_command(
+                    mutation_test_suite.grade_buggy_impl_command,
+                    sandbox,
+                    cmd_str_override=cmd_str
+                )
+                test_stdouts[valid_test] = buggy_impl_run_result.stdout
+                test_stderrs[valid_test] = buggy_impl_run_result.stderr
+
+                if buggy_impl_run_result.return_code != 0:
+                    outcomes[valid_test] = (
+                        ag_models.MutantTestOutcome.timed_out if buggy_impl_run_result.timed_out
+                        else ag_models.MutantTestOutcome.exposed
+                    )
+                    with lock:
+                        num_bugs_exposed_by_test[valid_test] += 1
+                    break
 
-            if buggy_impl_run_result.return_code != 0:
-                exposed_bugs.append(bug)
-                break
+                outcomes[valid_test] = ag_models.MutantTestOutcome.not_exposed
 
-    return exposed_bugs, buggy_impls_stdout, buggy_impls_stderr
+            for valid_test in valid_tests:
+                if valid_test not in outcomes:
+                    continue
+
+                line = '\n----- Bug "{}" with Test "{}" -----\n'.format(bug, valid_test).encode()
+                stdout.write(line)
+                stderr.write(line)
+                shutil.copyfileobj(test_stdouts[valid_test], stdout)
+                shutil.copyfileobj(test_stderrs[valid_test], stderr)
+        finally:
+            for file_ in [*test_stdouts.values(), *test_stderrs.values()]:
+                file_.close()
+
+        with lock:
+            kill_matrix[bug] = {
+                test: outcomes[test] for test in valid_tests if test in outcomes}
+
+        return any(outcome != ag_models.MutantTestOutcome.not_exposed
+                   for outcome in outcomes.values())
+
+    exposed_bugs, buggy_impls_stdout, buggy_impls_stderr = _run_against_mutants(
+        mutation_test_suite, _run_individual_tests_against_mutant)
+
+    # Buggy impls that were graded concurrently may have been added to
+    # kill_matrix out of order.
+    kill_matrix = {bug: kill_matrix[bug] for bug in mutation_test_suite.buggy_impl_names}
+    return exposed_bugs, kill_matrix, buggy_impls_stdout, buggy_impls_stderr
 
 
 def _run_test_batches_against_mutants(
@@ -224,10 +380,7 @@ def _run_test_batches_against_mutants(
     mutation_test_suite: ag_models.MutationTestSuite,
     valid_tests: List[str],
 ) -> Tuple[List[str], tempfile.TemporaryFile, tempfile.TemporaryFile]:
-    exposed_bugs: List[str] = []
-    buggy_impls_stdout = tempfile.TemporaryFile()
-    buggy_impls_stderr = tempfile.TemporaryFile()
-    for bug in mutation_test_suite.buggy_impl_names:
+    def _run_test_batch_against_mutant(bug: str, stdout: IO[bytes], stderr: IO[bytes]):
         cmd_str = mutation_test_suite.grade_buggy_impl_command.cmd.replace(
             ag_models.MutationTestSuite.ALL_STUDENT_TEST_NAMES_PLACEHOLDER,
             ' '.join([f'"{test_name}"' for test_name in valid_tests])
@@ -237,17 +390,82 @@ def _run_test_batches_against_mutants(
             mutation_test_suite.grade_buggy_impl_command, sandbox, cmd_str_override=cmd_str)
 
         line = f'\n----- Bug "{bug}" with all_valid_tests -----\n'.encode()
-        buggy_impls_stdout.write(line)
-        buggy_impls_stderr.write(line)
-        shutil.copyfileobj(buggy_impl_run_result.stdout, buggy_impls_stdout)
-        shutil.copyfileobj(buggy_impl_run_result.stderr, buggy_impls_stderr)
+        stdout.write(line)
+        stderr.write(line)
+        shutil.copyfileobj(buggy_impl_run_result.stdout, stdout)
+        shutil.copyfileobj(buggy_impl_run_result.stderr, stderr)
+
+        return buggy_impl_run_result.return_code != 0
+
+    return _run_against_mutants(mutation_test_suite, _run_test_batch_against_mutant)
+
+
+# Given a buggy impl name and files to write the output of the buggy
+# impl's commands to, runs the valid student tests against that buggy
+# impl and returns whether they exposed it.
+RunAgainstMutantFnType = Callable[[str, IO[bytes], IO[bytes]], bool]
 
-        if buggy_impl_run_result.return_code != 0:
-            exposed_bugs.append(bug)
 
+def _run_against_mutants(
+    mutation_test_suite: ag_models.MutationTestSuite,
+    run_against_mutant: RunAgainstMutantFnType,
+) -> Tuple[List[str], tempfile.TemporaryFile, tempfile.TemporaryFile]:
+    """
+    Calls run_against_mutant for each of mutation_test_suite's buggy
+    impls, running up to mutation_test_suite.max_concurrent_buggy_impls
+    of them at the same time.
+    """
+    bugs = mutation_test_suite.buggy_impl_names
+    exposed, buggy_impls_stdout, buggy_impls_stderr = _run_with_separate_output(
+        bugs, mutation_test_suite.max_concurrent_buggy_impls, run_against_mutant)
+
+    exposed_bugs = [bug for bug, bug_exposed in zip(bugs, exposed) if bug_exposed]
     return exposed_bugs, buggy_impls_stdout, buggy_impls_stderr
 
 
+_ResultType = TypeVar('_ResultType')
+
+
+def _run_with_separate_output(
+    names: List[str],
+    max_workers: int,
+    func: Callable[[str, IO[bytes], IO[bytes]], _ResultType],
+) -> Tuple[List[_ResultType], tempfile.TemporaryFile, tempfile.TemporaryFile]:
+    """
+    Calls func(name, stdout, stderr) for each of names, running up to
+    max_workers of them at the same time.
+
+    Each call's output is written to its own pair of files, which are
+    then combined in the order of names. This means that the returned
+    results and output are the same no matter what order the calls
+    finish in.
+    """
+    stdouts = [tempfile.TemporaryFile() for _ in names]
+    stderrs = [tempfile.TemporaryFile() for _ in names]
+    try:
+        if max_workers > 1 and len(names) > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(func, names, stdouts, stderrs))
+        else:
+            results = [
+                func(name, stdout, stderr)
+                for name, stdout, stderr in zip(names, stdouts, stderrs)
+            ]
+
+        combined_stdout = tempfile.TemporaryFile()
+        combined_stderr = tempfile.TemporaryFile()
+        for stdout, stderr in zip(stdouts, stderrs):
+            stdout.seek(0)
+            shutil.copyfileobj(stdout, combined_stdout)
+            stderr.seek(0)
+            shutil.copyfileobj(stderr, combined_stderr)
+    finally:
+        for file_ in stdouts + stderrs:
+            file_.close()
+
+    return results, combined_stdout, combined_stderr
+
+
 @retry_should_recover
 def _save_results(mutation_test_suite: ag_models.MutationTestSuite,
                   submission: ag_models.Submission,
@@ -257,6 +475,7 @@ def _save_results(mutation_test_suite: ag_models.MutationTestSuite,
                   invalid_tests: List[str],
                   timed_out_tests: List[str],
                   bugs_exposed: List[str],
+                  kill_matrix: Optional[KillMatrixType] = None,
                   get_test_names_run_result: CompletedCommand = None,
                   validity_check_stdout: FileIO = None,
                   validity_check_stderr: FileIO = None,
@@ -269,7 +488,8 @@ def _save_results(mutation_test_suite: ag_models.MutationTestSuite,
                 'discarded_tests': discarded_tests,
                 'invalid_tests': invalid_tests,
                 'timed_out_tests': timed_out_tests,
-                'bugs_exposed': bugs_exposed
+                'bugs_exposed': bugs_exposed,
+                'kill_matrix': kill_matrix if kill_matrix is not None else {},
             }
             result = ag_models.MutationTestSuiteResult.objects.update_or_create(
                 defaults=result_kwargs,
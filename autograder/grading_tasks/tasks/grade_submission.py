@@ -1,4 +1,3 @@
-from autograder.core.models.submission import Submission
 import traceback
 
 import celery
@@ -10,6 +9,9 @@ from django.utils import timezone
 
 import autograder.core.models as ag_models
 from autograder.core.caching import delete_cached_submission_result
+from autograder.core.submission_feedback import (
+    save_denormalized_ag_test_case_result, save_denormalized_ag_test_suite_result
+)
 from autograder.utils.retry import retry_should_recover
 
 from .grade_mutation_test_suite import (
@@ -18,8 +20,10 @@ from .grade_ag_test import (
     grade_ag_test_suite_impl,
     grade_deferred_ag_test_suite
 )
+from .grading_time_estimates import record_grading_duration
 from .utils import mark_submission_as_error, load_queryset_with_retry
 from autograder.core.submission_email_receipts import send_submission_score_summary_email
+from autograder.core.submission_scores import update_submission_scores
 
 from .exceptions import SubmissionRejected, SubmissionRemovedFromQueue
 
@@ -124,43 +128,54 @@ class SubmissionGrader:
                     pk=self.submission.group_id
                 ).update(bonus_submissions_used=F('bonus_submissions_used') - 1)
 
+            # We use update() here so that we don't overwrite the
+            # denormalized results saved since self.submission was loaded.
+            ag_models.Submission.objects.filter(
+                pk=self.submission_pk
+            ).update(
+                is_bonus_submission=False,
+                status=ag_models.Submission.GradingStatus.rejected
+            )
             self.submission.is_bonus_submission = False
             self.submission.status = ag_models.Submission.GradingStatus.rejected
-            self.submission.save()
 
     def grade_mutation_test_suite(self, suite: ag_models.MutationTestSuite) -> None:
         grade_mutation_test_suite_impl(suite, self.submission)
 
+    # Note: The following two methods update the submission's
+    # denormalized_ag_test_results in the database without loading or
+    # rewriting the rest of that field. self.submission is NOT updated,
+    # so call self.reload_submission() before reading those results
+    # from it.
     @retry_should_recover
     def save_denormalized_ag_test_suite_result(
         self,
         ag_test_suite_result: ag_models.AGTestSuiteResult
     ) -> None:
-        with transaction.atomic():
-            submission = Submission.objects.select_for_update().get(pk=self.submission.pk)
-            key = str(ag_test_suite_result.ag_test_suite_id)
-            submission.denormalized_ag_test_results[key] = ag_test_suite_result.to_dict()
-            submission.save()
-            self._submission = submission
+        save_denormalized_ag_test_suite_result(self.submission_pk, ag_test_suite_result)
 
     @retry_should_recover
     def save_denormalized_ag_test_case_result(
         self,
         ag_test_case_result: ag_models.AGTestCaseResult
     ) -> None:
-        with transaction.atomic():
-            submission = Submission.objects.select_for_update().get(pk=self.submission.pk)
-            print(submission.denormalized_ag_test_results)
-            ag_test_case = ag_test_case_result.ag_test_case
-            submission.denormalized_ag_test_results[
-                str(ag_test_case.ag_test_suite_id)
-            ]['ag_test_case_results'][str(ag_test_case.pk)] = ag_test_case_result.to_dict()
+        save_denormalized_ag_test_case_result(
+            self.submission_pk,
+            ag_test_case_result.ag_test_case.ag_test_suite_id,
+            ag_test_case_result
+        )
 
-            submission.save()
-            self._submission = submission
+    @retry_should_recover
+    def reload_submission(self) -> None:
+        self._submission = ag_models.Submission.objects.select_related(
+            'project', 'group'
+        ).get(pk=self.submission_pk)
+        self._group = self._submission.group
+        self._project = self._submission.project
 
     def send_non_deferred_tests_finished_email(self) -> None:
         if self.project.send_email_on_non_deferred_tests_finished:
+            self.reload_submission()
             try:
                 send_submission_score_summary_email(self.submission)
             except Exception:
@@ -179,13 +194,20 @@ class SubmissionGrader:
 
     @retry_should_recover
     def mark_as_waiting_for_deferred(self):
+        non_deferred_grading_end_time = timezone.now()
         ag_models.Submission.objects.filter(
             pk=self.submission.pk
         ).update(
             status=ag_models.Submission.GradingStatus.waiting_for_deferred,
-            non_deferred_grading_end_time=timezone.now()
+            non_deferred_grading_end_time=non_deferred_grading_end_time
         )
 
+        if self.submission.grading_start_time is not None:
+            record_grading_duration(
+                self.project.pk,
+                (non_deferred_grading_end_time
+                 - self.submission.grading_start_time).total_seconds())
+
     def get_deferred_suite_task_signatures(self):
         deferred_ag_test_suites = load_queryset_with_retry(
             self.project.ag_test_suites.filter(deferred=True))
@@ -242,6 +264,7 @@ def _mark_submission_as_finished_impl(submission_pk):
     ag_models.Submission.objects.filter(
         pk=submission_pk
     ).update(status=ag_models.Submission.GradingStatus.finished_grading)
+    update_submission_scores(submission_pk)
 
     submission = ag_models.Submission.objects.select_related(
         'group__project').get(pk=submission_pk)
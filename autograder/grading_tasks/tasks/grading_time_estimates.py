@@ -0,0 +1,113 @@
+"""
+Estimates of how long it takes to grade a submission's non-deferred
+suites, used to decide which queue a submission is sent to.
+
+Once a project has enough recently graded submissions, the estimate is
+a high percentile of how long those submissions actually took to grade
+(from grading_start_time to non_deferred_grading_end_time). Until then,
+it's the sum of the time limits of the project's non-deferred commands.
+
+Both the observed durations and the time limit based estimate are kept
+in the cache, so estimating a project's grading time usually doesn't
+query the database. They're cleared when the project's tests change,
+since durations observed before the change no longer apply.
+"""
+
+import math
+from typing import List, Optional
+
+from django.core.cache import cache
+
+import autograder.core.models as ag_models
+
+# The number of most recent grading durations kept for each project.
+MAX_OBSERVED_DURATIONS = 50
+# The number of grading durations needed before they're used to
+# estimate a project's grading time.
+MIN_OBSERVED_DURATIONS = 10
+# The percentile of the observed durations used as the estimate.
+OBSERVED_DURATION_PERCENTILE = 90
+
+
+def get_estimated_grading_time(project_pk: int) -> float:
+    """
+    Returns the estimated number of seconds it takes to grade the
+    non-deferred suites of a submission to the given project.
+    """
+    durations: Optional[List[float]] = cache.get(_durations_cache_key(project_pk))
+    if durations is not None and len(durations) >= MIN_OBSERVED_DURATIONS:
+        return _percentile(durations, OBSERVED_DURATION_PERCENTILE)
+
+    cache_key = _time_limits_cache_key(project_pk)
+    estimate: Optional[float] = cache.get(cache_key)
+    if estimate is None:
+        estimate = _sum_time_limits(project_pk)
+        cache.set(cache_key, estimate, timeout=None)
+
+    return estimate
+
+
+def record_grading_duration(project_pk: int, seconds: float) -> None:
+    """
+    Adds the number of seconds it took to grade the non-deferred suites
+    of a submission to the project's observed durations, discarding the
+    oldest duration if there are more than MAX_OBSERVED_DURATIONS.
+    """
+    cache_key = _durations_cache_key(project_pk)
+    durations: List[float] = cache.get(cache_key) or []
+    durations.append(seconds)
+    # Concurrent updates can occasionally drop a duration, which
+    # doesn't noticeably change the estimate.
+    cache.set(cache_key, durations[-MAX_OBSERVED_DURATIONS:], timeout=None)
+
+
+def clear_grading_time_estimates(project_pk: int) -> None:
+    """
+    Discards the project's observed grading durations and time limit
+    based estimate. This should be called whenever the project's
+    suites, test cases, or commands change.
+    """
+    cache.delete_many([_durations_cache_key(project_pk), _time_limits_cache_key(project_pk)])
+
+
+def _sum_time_limits(project_pk: int) -> float:
+    ag_test_time_max = sum(
+        command.time_limit for command in
+        ag_models.AGTestCommand.objects.filter(
+            ag_test_case__ag_test_suite__project=project_pk
+        ).exclude(ag_test_case__ag_test_suite__deferred=True)
+    )
+
+    mutation_test_suite_time_max = sum(
+        _estimated_validity_check_time(suite)
+        for suite in
+        ag_models.MutationTestSuite.objects.filter(project=project_pk).exclude(deferred=True)
+    )
+
+    return ag_test_time_max + mutation_test_suite_time_max
+
+
+def _estimated_validity_check_time(suite: ag_models.MutationTestSuite):
+    validity_check_cmd = suite.student_test_validity_check_command
+    if ag_models.MutationTestSuite.ALL_DISCOVERED_TEST_NAMES_PLACEHOLDER in validity_check_cmd.cmd:
+        return validity_check_cmd.time_limit
+
+    # The validity checks are run in rounds of up to
+    # max_concurrent_validity_checks at a time.
+    num_rounds = math.ceil(suite.max_num_student_tests / suite.max_concurrent_validity_checks)
+    return validity_check_cmd.time_limit * num_rounds
+
+
+def _percentile(values: List[float], percentile: int) -> float:
+    # Nearest-rank method
+    sorted_values = sorted(values)
+    rank = math.ceil(percentile / 100 * len(sorted_values))
+    return sorted_values[max(rank, 1) - 1]
+
+
+def _durations_cache_key(project_pk: int) -> str:
+    return f'project_{project_pk}_grading_durations'
+
+
+def _time_limits_cache_key(project_pk: int) -> str:
+    return f'project_{project_pk}_grading_time_limits_estimate'
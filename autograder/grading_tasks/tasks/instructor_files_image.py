@@ -0,0 +1,167 @@
+"""
+Docker images that contain a suite's instructor files, used to grade
+suites with cache_instructor_files_in_image set to True.
+
+Each image is derived from the suite's sandbox image, and its tag is
+computed from the sandbox image tag and the names, sizes, and
+modification times of the suite's instructor files. Changing the
+suite's sandbox image or instructor files (or the files' contents)
+therefore results in a new image being built the next time the suite
+is graded, at which point the suite's previous images are removed.
+Images are built on (and never leave) the machine that grades the
+suite.
+
+Student files are added to the sandbox after the image is started, so
+add_files_to_sandbox() adds any instructor files that student files
+with the same names replaced again.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import traceback
+from typing import List, Tuple, Union
+
+from autograder_sandbox import SANDBOX_USERNAME
+from autograder_sandbox.autograder_sandbox import SANDBOX_WORKING_DIR_NAME
+from django.conf import settings
+
+import autograder.core.models as ag_models
+
+from .utils import load_queryset_with_retry
+
+_IMAGE_NAME = 'autograder-instructor-files'
+_BUILD_TIMEOUT = 600
+
+# Prevents threads in the same process from building the same image
+# at the same time. Concurrent builds in different processes are
+# harmless, since they produce identical images.
+_build_lock = threading.Lock()
+
+Suite = Union[ag_models.AGTestSuite, ag_models.MutationTestSuite]
+
+
+def get_suite_sandbox_image(suite: Suite) -> Tuple[str, bool]:
+    """
+    Returns a tuple of (docker image tag, instructor files in image)
+    to use when grading suite. When the second value is True, the
+    image already contains suite's instructor files, so they shouldn't
+    be added to the sandbox.
+
+    If building the image with suite's instructor files fails, suite's
+    regular sandbox image is used instead.
+    """
+    if not suite.cache_instructor_files_in_image:
+        return suite.sandbox_docker_image.tag, False
+
+    try:
+        return get_instructor_files_image(suite), True
+    except Exception:
+        print(f'Error building instructor files image for suite {suite.pk}')
+        traceback.print_exc()
+        return suite.sandbox_docker_image.tag, False
+
+
+def get_instructor_files_image(suite: Suite) -> str:
+    """
+    Returns the tag of the image that contains suite's instructor
+    files, building it first if it doesn't exist on this machine.
+    """
+    instructor_files: List[ag_models.InstructorFile] = load_queryset_with_retry(
+        suite.instructor_files_needed.all())
+    repository = _get_repository(suite)
+    tag = f'{repository}:{_get_fingerprint(suite, instructor_files)}'
+    with _build_lock:
+        if not _image_exists(tag):
+            print(f'Building instructor files image {tag} for suite {suite.pk}')
+            _build_image(tag, suite, instructor_files)
+            _remove_images(repository, keep=tag)
+
+    return tag
+
+
+def _get_repository(suite: Suite) -> str:
+    # Each suite gets its own repository so that its outdated images
+    # can be found and removed.
+    return f'{_IMAGE_NAME}-{type(suite).__name__.lower()}-{suite.pk}'
+
+
+def _get_fingerprint(suite: Suite, instructor_files: List[ag_models.InstructorFile]) -> str:
+    hasher = hashlib.sha256()
+    hasher.update(f'{suite.sandbox_docker_image.tag};{suite.read_only_instructor_files};'.encode())
+    for instructor_file in sorted(instructor_files, key=lambda file_: file_.name):
+        stat = os.stat(instructor_file.abspath)
+        hasher.update(
+            f'{instructor_file.name},{stat.st_size},{stat.st_mtime_ns};'.encode())
+
+    return hasher.hexdigest()
+
+
+def _image_exists(tag: str) -> bool:
+    return subprocess.run(
+        ['docker', 'image', 'inspect', tag],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    ).returncode == 0
+
+
+def _remove_images(repository: str, *, keep: str) -> None:
+    try:
+        tags = subprocess.run(
+            ['docker', 'image', 'ls', repository, '--format', '{{.Repository}}:{{.Tag}}'],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True
+        ).stdout.decode().split()
+    except subprocess.CalledProcessError:
+        print(f'Error listing images in {repository}')
+        return
+
+    # Removing an image that a sandbox is still using fails, in which
+    # case it's removed the next time the suite's image changes.
+    for tag in tags:
+        if tag != keep:
+            print(f'Removing outdated instructor files image {tag}')
+            subprocess.run(['docker', 'image', 'rm', tag],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _build_image(tag: str, suite: Suite, instructor_files: List[ag_models.InstructorFile]):
+    # The files are added with the same owner and permissions that
+    # add_files_to_sandbox would give them.
+    owner = 'root' if suite.read_only_instructor_files else SANDBOX_USERNAME
+    dest_filenames = [
+        os.path.join(SANDBOX_WORKING_DIR_NAME, instructor_file.name)
+        for instructor_file in instructor_files
+    ]
+    dockerfile = [
+        f'FROM {suite.sandbox_docker_image.tag}',
+        f'COPY --chown={owner}:{owner} '
+        + json.dumps(['files/', SANDBOX_WORKING_DIR_NAME + '/']),
+    ]
+    if suite.read_only_instructor_files and dest_filenames:
+        dockerfile.append('RUN ' + json.dumps(['chmod', '444'] + dest_filenames))
+
+    # Creating the build directory in MEDIA_ROOT lets us hard link the
+    # (possibly very large) instructor files instead of copying them.
+    with tempfile.TemporaryDirectory(dir=settings.MEDIA_ROOT) as build_dir:
+        files_dir = os.path.join(build_dir, 'files')
+        os.mkdir(files_dir)
+        for instructor_file in instructor_files:
+            dest = os.path.join(files_dir, instructor_file.name)
+            try:
+                os.link(instructor_file.abspath, dest)
+            except OSError:
+                shutil.copy(instructor_file.abspath, dest)
+
+        with open(os.path.join(build_dir, 'Dockerfile'), 'w') as f:
+            f.write('\n'.join(dockerfile) + '\n')
+
+        subprocess.run(
+            ['docker', 'build', '--quiet', '-t', tag, build_dir],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            timeout=_BUILD_TIMEOUT,
+            check=True
+        )
@@ -1,52 +1,104 @@
 import logging
+from typing import Dict, List, Tuple
 
 import celery
 from django.conf import settings
-from django.db import transaction
+from django.db import connection, transaction
 from django.db.models import Sum, F
+from django.utils import timezone
 
 import autograder.core.models as ag_models
+from autograder.utils.retry import retry_should_recover
 from .grade_submission import grade_submission
+from .grading_time_estimates import get_estimated_grading_time
 
 
-def _estimated_grading_time(project_pk: int):
-    ag_test_time_max = sum(
-        command.time_limit for command in
-        ag_models.AGTestCommand.objects.filter(
-            ag_test_case__ag_test_suite__project=project_pk
-        ).exclude(ag_test_case__ag_test_suite__deferred=True)
-    )
-
-    mutation_test_suite_time_max = sum(
-        suite.student_test_validity_check_command.time_limit * suite.max_num_student_tests
-        for suite in
-        ag_models.MutationTestSuite.objects.filter(project=project_pk).exclude(deferred=True)
-    )
-
-    return ag_test_time_max + mutation_test_suite_time_max
+# Submissions to projects that are estimated to take longer than this
+# many seconds to grade are sent to the (slower) submission queue
+# rather than the fast queue.
+FAST_QUEUE_MAX_GRADING_TIME = 10 * 60
 
 
 @celery.shared_task
 def queue_submissions():
     with transaction.atomic():
-        to_queue = list(ag_models.Submission.objects.select_for_update().filter(
-            status=ag_models.Submission.GradingStatus.received).reverse())
-        print(to_queue)
-
-        for submission in to_queue:
-            print('adding submission{} to queue for grading'.format(submission.pk))
-            submission.status = ag_models.Submission.GradingStatus.queued
-            submission.save()
-
-            if _estimated_grading_time(submission.project_id) / 60 > 10:
-                queue_name_tmpl = settings.SUBMISSION_QUEUE_TMPL.format(submission.project_id)
-            else:
-                queue_name_tmpl = settings.FAST_QUEUE_TMPL.format(submission.project_id)
-
-            grade_submission.apply_async(
-                [submission.pk], queue=queue_name_tmpl.format(submission.project_id))
+        to_queue = _mark_received_submissions_as_queued()
+        # Sending the submissions to the broker after the transaction
+        # commits means that their rows aren't locked while we wait on
+        # the broker, and that the graders will see their new status.
+        transaction.on_commit(lambda: _send_to_grading_queues(to_queue))
+
+
+def _mark_received_submissions_as_queued() -> List[Tuple[int, int]]:
+    """
+    Changes the status of all received submissions to queued and
+    returns a list of their (pk, project pk) tuples, oldest first.
+
+    Rows locked by another transaction (e.g., another instance of
+    queue_submissions that's already queueing them) are skipped.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            '''UPDATE core_submission
+               SET status = %s, last_modified = %s
+               WHERE core_submission.id IN (
+                   SELECT id FROM core_submission
+                   WHERE status = %s
+                   FOR UPDATE SKIP LOCKED
+               )
+               RETURNING core_submission.id, core_submission.project_id
+            ''',
+            (ag_models.Submission.GradingStatus.queued,
+             timezone.now(),
+             ag_models.Submission.GradingStatus.received)
+        )
+        return sorted(cursor.fetchall())
+
+
+def _send_to_grading_queues(to_queue: List[Tuple[int, int]]) -> None:
+    from autograder.celery import app
 
-        print('queued {} submissions'.format(to_queue))
+    queue_names: Dict[int, str] = {}
+    num_sent = 0
+    try:
+        # Sending all of the tasks with one producer reuses the same
+        # broker connection for each of them.
+        with app.producer_or_acquire() as producer:
+            for submission_pk, project_pk in to_queue:
+                if project_pk not in queue_names:
+                    queue_names[project_pk] = _get_queue_name(project_pk)
+
+                print('adding submission{} to queue for grading'.format(submission_pk))
+                grade_submission.apply_async(
+                    [submission_pk], queue=queue_names[project_pk], producer=producer)
+                num_sent += 1
+    except Exception:
+        unsent = [submission_pk for submission_pk, project_pk in to_queue[num_sent:]]
+        logging.getLogger(__name__).exception(
+            f'Error sending submissions {unsent} to grading queues, returning them to received')
+        # Put the submissions we didn't send back so that the next
+        # call to queue_submissions will try again.
+        _mark_queued_submissions_as_received(unsent)
+        raise
+
+    print('queued {} submissions'.format([pk for pk, project_pk in to_queue]))
+
+
+@retry_should_recover
+def _mark_queued_submissions_as_received(submission_pks: List[int]) -> None:
+    # Submissions left as queued here would never be graded, so this
+    # is retried until the database is reachable again.
+    ag_models.Submission.objects.filter(
+        pk__in=submission_pks,
+        status=ag_models.Submission.GradingStatus.queued
+    ).update(status=ag_models.Submission.GradingStatus.received)
+
+
+def _get_queue_name(project_pk: int) -> str:
+    if get_estimated_grading_time(project_pk) > FAST_QUEUE_MAX_GRADING_TIME:
+        return settings.SUBMISSION_QUEUE_TMPL.format(project_pk)
+
+    return settings.FAST_QUEUE_TMPL.format(project_pk)
 
 
 @celery.shared_task(acks_late=True, autoretry_for=(Exception,), default_retry_delay=5)
@@ -8,6 +8,7 @@ from django.db.models.functions import Concat
 
 import autograder.core.models as ag_models
 from autograder.core.caching import clear_submission_results_cache
+from autograder.core.submission_scores import clear_submission_scores, update_submission_scores
 from autograder.grading_tasks.tasks.grade_mutation_test_suite import grade_mutation_test_suite_impl
 from autograder.grading_tasks.tasks.utils import load_queryset_with_retry
 from autograder.utils.retry import retry_should_recover
@@ -81,6 +82,9 @@ class SubmissionRerunner:
             self._group = self._submission.group
             self._project = self.submission.project
 
+        # The submission's scores are out of date until the rerun finishes.
+        clear_submission_scores(self._submission_pk)
+
     def rerun_suites(self) -> None:
         for suite in load_queryset_with_retry(self.project.ag_test_suites.filter()):
             self.grade_ag_test_suite(suite)
@@ -135,6 +139,7 @@ class SubmissionRerunner:
                 and self.rerun_task.rerun_all_mutation_test_suites):
             _mark_submission_as_finished_after_rerun(self._submission_pk)
 
+        _update_submission_scores_impl(self._submission_pk)
         _clear_cached_submission_results_impl(self.project.pk)
 
     @retry_should_recover
@@ -161,6 +166,11 @@ def _mark_submission_as_finished_after_rerun(submission_pk: int):
         ).update(status=ag_models.Submission.GradingStatus.finished_grading)
 
 
+@retry_should_recover
+def _update_submission_scores_impl(submission_pk: int):
+    update_submission_scores(submission_pk)
+
+
 @retry_should_recover
 def _clear_cached_submission_results_impl(project_pk: int):
     clear_submission_results_cache(project_pk)
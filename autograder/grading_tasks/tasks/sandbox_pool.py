@@ -0,0 +1,358 @@
+"""
+A per-process pool of pre-started sandboxes. Creating and starting a
+sandbox's docker container takes long enough that doing so for every
+suite of every submission adds noticeably to grading time, so idle
+containers are started ahead of time and handed out to suites as
+they're graded.
+
+Each pooled sandbox is used by exactly one suite and is destroyed
+afterwards (student code may have modified its filesystem or left
+processes running). A replacement is started in the background.
+
+Since image tags change whenever an image is rebuilt, the pool forgets
+images that haven't been used recently: idle sandboxes for an image
+are destroyed once it hasn't been checked out for
+settings.SANDBOX_WARM_POOL_IDLE_TTL seconds, or sooner if keeping them
+would exceed settings.SANDBOX_WARM_POOL_MAX_IDLE idle sandboxes in
+total.
+
+The pool is disabled when settings.SANDBOX_WARM_POOL_SIZE is 0.
+"""
+
+import atexit
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Dict, List, Mapping, Optional, Tuple
+
+from autograder_sandbox import AutograderSandbox
+from autograder_sandbox.autograder_sandbox import CompletedCommand
+from celery.signals import worker_process_shutdown
+from django.conf import settings
+
+# (docker image tag, allow network access)
+SandboxPoolKey = Tuple[str, bool]
+
+
+class SandboxPool:
+    def __init__(self, size: int, *,
+                 max_idle: Optional[int] = None,
+                 idle_ttl: Optional[float] = None):
+        """
+        :param size: The maximum number of idle sandboxes to keep for
+            each combination of docker image and network access.
+        :param max_idle: The maximum number of idle (or starting)
+            sandboxes to keep in total. When starting a sandbox would
+            exceed this, the idle sandboxes of the least recently used
+            key are destroyed first. None means no limit.
+        :param idle_ttl: The number of seconds after a key's most recent
+            checkout that its idle sandboxes are destroyed.
+            None means they're kept until the pool is shut down.
+        """
+        self._size = size
+        self._max_idle = max_idle
+        self._idle_ttl = idle_ttl
+        self._lock = threading.Lock()
+        self._idle: Dict[SandboxPoolKey, Deque['_PooledSandbox']] = defaultdict(deque)
+        self._num_starting: Dict[SandboxPoolKey, int] = defaultdict(int)
+        self._hits: Dict[SandboxPoolKey, int] = defaultdict(int)
+        self._misses: Dict[SandboxPoolKey, int] = defaultdict(int)
+        # The keys the pool is keeping sandboxes for, from least to most
+        # recently used. Values are the time.monotonic() of their most
+        # recent use.
+        self._last_used: 'OrderedDict[SandboxPoolKey, float]' = OrderedDict()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='sandbox_pool')
+        self._reaper: Optional[threading.Thread] = None
+        self._stop_reaper = threading.Event()
+        self._shut_down = False
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def checkout(self, *, docker_image: str, allow_network_access: bool,
+                 environment_variables: Mapping[str, str]) -> Optional[AutograderSandbox]:
+        """
+        Returns an already started sandbox with the given settings, or
+        None if there isn't one available. In either case, a
+        replacement sandbox is started in the background.
+
+        The returned sandbox should be used with a context manager like
+        a regular AutograderSandbox. It will be destroyed when the
+        context manager exits.
+
+        Since the sandbox was started before environment_variables were
+        known, they are set for each command run in the sandbox rather
+        than for the whole container.
+        """
+        if self._size == 0:
+            return None
+
+        key = (docker_image, allow_network_access)
+        with self._lock:
+            self._touch(key)
+            self._start_reaper()
+            idle = self._idle[key]
+            sandbox = idle.popleft() if idle else None
+            if sandbox is None:
+                self._misses[key] += 1
+            else:
+                self._hits[key] += 1
+            hits, misses = self._hits[key], self._misses[key]
+
+        print(f'Sandbox pool {"hit" if sandbox is not None else "miss"} for {key} '
+              f'(hits: {hits}, misses: {misses})')
+        self._replenish_in_background(key)
+
+        if sandbox is not None:
+            sandbox.set_command_environment_variables(environment_variables)
+        return sandbox
+
+    def replenish(self, key: SandboxPoolKey) -> None:
+        """
+        Starts sandboxes for key until the pool has size idle
+        (or starting) sandboxes for it, or until it has max_idle
+        sandboxes in total and no other key's sandboxes can be evicted.
+        """
+        with self._lock:
+            if key not in self._last_used:
+                self._touch(key)
+
+        while True:
+            with self._lock:
+                if (self._shut_down
+                        or key not in self._last_used
+                        or len(self._idle[key]) + self._num_starting[key] >= self._size):
+                    return
+                to_evict, has_room = self._make_room(key)
+                if has_room:
+                    self._num_starting[key] += 1
+
+            _destroy_all(to_evict)
+            if not has_room:
+                return
+
+            try:
+                docker_image, allow_network_access = key
+                sandbox = _PooledSandbox(
+                    name=f'sandbox-pool-{uuid.uuid4().hex}',
+                    docker_image=docker_image,
+                    allow_network_access=allow_network_access)
+                sandbox.start()
+            except Exception:
+                print(f'Error starting pooled sandbox for {key}')
+                traceback.print_exc()
+                with self._lock:
+                    self._finish_starting(key)
+                return
+
+            with self._lock:
+                self._finish_starting(key)
+                if not self._shut_down and key in self._last_used:
+                    self._idle[key].append(sandbox)
+                    continue
+
+            # The pool was shut down or key was evicted while the
+            # sandbox was starting.
+            sandbox.destroy()
+            return
+
+    def evict_expired(self) -> None:
+        """
+        Destroys the idle sandboxes of keys that haven't been used in
+        the last idle_ttl seconds. This is called periodically in a
+        background thread once the pool has been used.
+        """
+        if self._idle_ttl is None:
+            return
+
+        to_destroy: List[_PooledSandbox] = []
+        with self._lock:
+            now = time.monotonic()
+            for key, last_used in list(self._last_used.items()):
+                if now - last_used < self._idle_ttl:
+                    break
+                print(f'Evicting sandbox pool key {key} (unused for {now - last_used:.0f}s)')
+                to_destroy += self._evict(key)
+
+        _destroy_all(to_destroy)
+
+    def get_stats(self) -> Dict[SandboxPoolKey, Dict[str, int]]:
+        """
+        Returns the number of hits, misses, and idle sandboxes for each
+        key the pool has been used with and hasn't evicted.
+        """
+        with self._lock:
+            keys = set(self._last_used) | set(self._hits) | set(self._misses)
+            return {
+                key: {
+                    'hits': self._hits[key],
+                    'misses': self._misses[key],
+                    'idle': len(self._idle[key]),
+                }
+                for key in keys
+            }
+
+    def shutdown(self) -> None:
+        """
+        Destroys all idle sandboxes. Sandboxes that are checked out are
+        destroyed when their suites finish.
+        """
+        with self._lock:
+            self._shut_down = True
+            to_destroy: List[_PooledSandbox] = [
+                sandbox for idle in self._idle.values() for sandbox in idle]
+            self._idle.clear()
+
+        self._stop_reaper.set()
+        self._executor.shutdown(wait=False)
+        _destroy_all(to_destroy)
+
+    # The methods below must be called with self._lock held.
+
+    def _touch(self, key: SandboxPoolKey) -> None:
+        self._last_used[key] = time.monotonic()
+        self._last_used.move_to_end(key)
+
+    def _make_room(self, key: SandboxPoolKey) -> Tuple[List['_PooledSandbox'], bool]:
+        """
+        Evicts least recently used keys other than key until another
+        sandbox can be started without exceeding max_idle. Returns the
+        evicted sandboxes, which the caller should destroy, and whether
+        another sandbox can be started.
+        """
+        if self._max_idle is None:
+            return [], True
+
+        evicted: List[_PooledSandbox] = []
+        num_sandboxes = (sum(len(idle) for idle in self._idle.values())
+                         + sum(self._num_starting.values()))
+        for other_key in list(self._last_used):
+            if num_sandboxes < self._max_idle:
+                break
+            if other_key == key or not self._idle[other_key]:
+                continue
+
+            print(f'Evicting sandbox pool key {other_key} to make room for {key}')
+            num_sandboxes -= len(self._idle[other_key])
+            evicted += self._evict(other_key)
+
+        return evicted, num_sandboxes < self._max_idle
+
+    def _evict(self, key: SandboxPoolKey) -> List['_PooledSandbox']:
+        """
+        Forgets key and returns its idle sandboxes, which the caller
+        should destroy. Sandboxes for key that are still starting are
+        destroyed once they've started.
+        """
+        del self._last_used[key]
+        self._hits.pop(key, None)
+        self._misses.pop(key, None)
+        if not self._num_starting.get(key):
+            self._num_starting.pop(key, None)
+        return list(self._idle.pop(key, []))
+
+    def _finish_starting(self, key: SandboxPoolKey) -> None:
+        self._num_starting[key] -= 1
+        if not self._num_starting[key] and key not in self._last_used:
+            del self._num_starting[key]
+
+    def _start_reaper(self) -> None:
+        if self._idle_ttl is None or self._reaper is not None:
+            return
+
+        self._reaper = threading.Thread(
+            target=self._reap, name='sandbox_pool_reaper', daemon=True)
+        self._reaper.start()
+
+    def _reap(self) -> None:
+        assert self._idle_ttl is not None
+        while not self._stop_reaper.wait(max(self._idle_ttl / 2, 1)):
+            try:
+                self.evict_expired()
+            except Exception:
+                print('Error evicting expired sandbox pool keys')
+                traceback.print_exc()
+
+    def _replenish_in_background(self, key: SandboxPoolKey) -> None:
+        try:
+            self._executor.submit(self.replenish, key)
+        except RuntimeError:
+            # The executor was shut down.
+            pass
+
+
+def _destroy_all(sandboxes: List['_PooledSandbox']) -> None:
+    for sandbox in sandboxes:
+        sandbox.destroy()
+
+
+class _PooledSandbox(AutograderSandbox):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._started = False
+        self._command_environment_variables: Mapping[str, str] = {}
+
+    def start(self) -> None:
+        super().__enter__()
+        self._started = True
+
+    def destroy(self) -> None:
+        try:
+            super().__exit__(None, None, None)
+        except Exception:
+            print(f'Error destroying pooled sandbox {self.name}')
+            traceback.print_exc()
+
+    def set_command_environment_variables(self, environment_variables: Mapping[str, str]):
+        self._command_environment_variables = dict(environment_variables)
+
+    @property
+    def environment_variables(self) -> Mapping[str, str]:
+        return dict(self._command_environment_variables)
+
+    def __enter__(self) -> '_PooledSandbox':
+        if not self._started:
+            self.start()
+        return self
+
+    def run_command(self, args: List[str], *posargs, **kwargs) -> CompletedCommand:
+        if self._command_environment_variables:
+            # "env" replaces itself with the command, so this doesn't
+            # start an extra process (which matters for commands with
+            # block_process_spawn).
+            args = ['env'] + [
+                f'{key}={value}' for key, value in self._command_environment_variables.items()
+            ] + args
+        return super().run_command(args, *posargs, **kwargs)
+
+
+_pool: Optional[SandboxPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_sandbox_pool() -> SandboxPool:
+    """
+    Returns this process's SandboxPool, creating it if needed.
+    The pool is created lazily so that each forked worker process
+    gets its own.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SandboxPool(
+                settings.SANDBOX_WARM_POOL_SIZE,
+                max_idle=settings.SANDBOX_WARM_POOL_MAX_IDLE,
+                idle_ttl=settings.SANDBOX_WARM_POOL_IDLE_TTL)
+        return _pool
+
+
+@atexit.register
+@worker_process_shutdown.connect
+def _shutdown_sandbox_pool(*args, **kwargs) -> None:
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
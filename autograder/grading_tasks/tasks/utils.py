@@ -25,7 +25,9 @@ def mark_submission_as_error(submission_pk: int, error_msg: str) -> None:
 
 def add_files_to_sandbox(sandbox: AutograderSandbox,
                          suite: Union[ag_models.AGTestSuite, ag_models.MutationTestSuite],
-                         submission: ag_models.Submission) -> None:
+                         submission: ag_models.Submission,
+                         *,
+                         add_instructor_files: bool = True) -> None:
     student_files_to_add = []
     for student_file in load_queryset_with_retry(suite.student_files_needed.all()):
         matching_files = fnmatch.filter(submission.submitted_filenames,
@@ -42,10 +44,16 @@ def add_files_to_sandbox(sandbox: AutograderSandbox,
     if student_files_to_add:
         sandbox.add_files(*student_files_to_add)
 
-    project_files_to_add = [
-        file_.abspath for file_
-        in load_queryset_with_retry(suite.instructor_files_needed.all())
-    ]
+    instructor_files = load_queryset_with_retry(suite.instructor_files_needed.all())
+    if not add_instructor_files:
+        # The instructor files are already in the sandbox, so student
+        # files with the same names just replaced them. Instructor files
+        # take precedence, so we add those ones again.
+        student_filenames = {os.path.basename(filename) for filename in student_files_to_add}
+        instructor_files = [
+            file_ for file_ in instructor_files if file_.name in student_filenames]
+
+    project_files_to_add = [file_.abspath for file_ in instructor_files]
     if project_files_to_add:
         owner_and_read_only = {
             'owner': 'root' if suite.read_only_instructor_files else SANDBOX_USERNAME,
@@ -662,6 +662,104 @@ class AGTestSuiteRerunTestCase(UnitTestBase):
         self.assertFalse(suite_result.setup_timed_out)
 
 
+@mock.patch('autograder.utils.retry.sleep')
+class SaveAGTestCommandResultsTestCase(UnitTestBase):
+    def setUp(self):
+        super().setUp()
+        self.submission = obj_build.make_submission()
+        self.ag_test_case = obj_build.make_ag_test_case(
+            obj_build.make_ag_test_suite(self.submission.group.project))
+        self.ag_test_cmds = [
+            obj_build.make_full_ag_test_command(self.ag_test_case) for i in range(3)
+        ]
+
+        suite_result = ag_models.AGTestSuiteResult.objects.validate_and_create(
+            ag_test_suite=self.ag_test_case.ag_test_suite,
+            submission=self.submission
+        )
+        self.case_result = ag_models.AGTestCaseResult.objects.validate_and_create(
+            ag_test_case=self.ag_test_case,
+            ag_test_suite_result=suite_result
+        )
+
+    def _make_pending_result(
+        self, ag_test_cmd: ag_models.AGTestCommand, return_code: int
+    ) -> tasks.grade_ag_test.PendingAGTestCommandResult:
+        stdout = tempfile.NamedTemporaryFile()
+        stdout.write(f'stdout {ag_test_cmd.pk} {return_code}'.encode())
+        stderr = tempfile.NamedTemporaryFile()
+        stderr.write(f'stderr {ag_test_cmd.pk} {return_code}'.encode())
+
+        run_result = CompletedCommand(
+            return_code=return_code, stdout=stdout, stderr=stderr, timed_out=False,
+            stdout_truncated=False, stderr_truncated=False)
+        result_data = {
+            'return_code': return_code,
+            'timed_out': False,
+            'stdout_truncated': False,
+            'stderr_truncated': False,
+            'return_code_correct': return_code == 0,
+            'stdout_correct': None,
+            'stderr_correct': None,
+        }
+        return tasks.grade_ag_test.PendingAGTestCommandResult(
+            ag_test_cmd, result_data, run_result)
+
+    def _check_results(self, return_code: int) -> None:
+        results = ag_models.AGTestCommandResult.objects.filter(
+            ag_test_case_result=self.case_result)
+        self.assertCountEqual(self.ag_test_cmds, [res.ag_test_command for res in results])
+        for res in results:
+            self.assertEqual(return_code, res.return_code)
+            self.assertEqual(return_code == 0, res.return_code_correct)
+            with open(res.stdout_filename) as f:
+                self.assertEqual(f'stdout {res.ag_test_command_id} {return_code}', f.read())
+            with open(res.stderr_filename) as f:
+                self.assertEqual(f'stderr {res.ag_test_command_id} {return_code}', f.read())
+
+    def test_create_and_update_results_in_constant_queries(self, *args) -> None:
+        pending = [self._make_pending_result(cmd, 1) for cmd in self.ag_test_cmds]
+        with self.assertNumQueries(4):  # savepoint, select, insert, release savepoint
+            tasks.save_ag_test_command_results(self.case_result, pending)
+        self._check_results(1)
+        original_pks = list(
+            ag_models.AGTestCommandResult.objects.values_list('pk', flat=True).order_by('pk'))
+
+        pending = [self._make_pending_result(cmd, 0) for cmd in self.ag_test_cmds]
+        with self.assertNumQueries(4):  # savepoint, select, update, release savepoint
+            tasks.save_ag_test_command_results(self.case_result, pending)
+        self._check_results(0)
+        self.assertEqual(
+            original_pks,
+            list(ag_models.AGTestCommandResult.objects.values_list('pk', flat=True).order_by('pk'))
+        )
+
+    def test_some_results_exist(self, *args) -> None:
+        tasks.save_ag_test_command_results(
+            self.case_result, [self._make_pending_result(self.ag_test_cmds[1], 1)])
+
+        pending = [self._make_pending_result(cmd, 2) for cmd in self.ag_test_cmds]
+        tasks.save_ag_test_command_results(self.case_result, pending)
+        self._check_results(2)
+
+    def test_updating_results_clears_cached_diffs(self, *args) -> None:
+        pending = [self._make_pending_result(cmd, 1) for cmd in self.ag_test_cmds]
+        tasks.save_ag_test_command_results(self.case_result, pending)
+
+        cache_filenames = []
+        for res in ag_models.AGTestCommandResult.objects.filter(
+                ag_test_case_result=self.case_result):
+            cache_filenames += [res.stdout_diff_cache_filename, res.stderr_diff_cache_filename]
+        for filename in cache_filenames:
+            with open(filename, 'w') as f:
+                f.write('stale')
+
+        pending = [self._make_pending_result(cmd, 0) for cmd in self.ag_test_cmds]
+        tasks.save_ag_test_command_results(self.case_result, pending)
+        for filename in cache_filenames:
+            self.assertFalse(os.path.exists(filename))
+
+
 @mock.patch('autograder.utils.retry.sleep')
 class NoRetryOnObjectNotFoundTestCase(TransactionUnitTestBase):
     def test_ag_test_suite_not_found_no_retry(self, sleep_mock) -> None:
@@ -861,6 +959,81 @@ class GradeAGTestSuiteCallbacksTestCase(TransactionUnitTestBase):
         self.assertEqual(self.submission, case_result.ag_test_suite_result.submission)
 
 
+@tag('slow', 'sandbox')
+@mock.patch('autograder.utils.retry.sleep')
+class GradeAGTestCasesConcurrentlyTestCase(TransactionUnitTestBase):
+    def setUp(self):
+        super().setUp()
+        self.submission = obj_build.make_submission()
+        self.project = self.submission.group.project
+        self.ag_test_suite = obj_build.make_ag_test_suite(
+            self.project, max_concurrent_test_cases=3)
+
+        self.ag_test_cases = [obj_build.make_ag_test_case(self.ag_test_suite) for i in range(5)]
+        self.ag_test_cmds = [
+            obj_build.make_full_ag_test_command(
+                ag_test_case,
+                set_arbitrary_points=False,
+                set_arbitrary_expected_vals=False,
+                cmd=f'sleep 1; printf {ag_test_case.pk}',
+                expected_return_code=ag_models.ExpectedReturnCode.zero,
+                expected_stdout_source=ag_models.ExpectedOutputSource.text,
+                expected_stdout_text=str(ag_test_case.pk),
+            )
+            for ag_test_case in self.ag_test_cases
+        ]
+
+        self.test_case_finished_callback = mock.Mock()
+
+    def test_all_test_cases_graded_and_callbacks_called(self, *args) -> None:
+        tasks.grade_ag_test_suite_impl(
+            self.ag_test_suite,
+            self.submission,
+            self.submission.group,
+            on_test_case_finished=self.test_case_finished_callback
+        )
+
+        for cmd in self.ag_test_cmds:
+            res = ag_models.AGTestCommandResult.objects.get(ag_test_command=cmd)
+            self.assertTrue(res.return_code_correct)
+            self.assertTrue(res.stdout_correct)
+            with open(res.stdout_filename) as f:
+                self.assertEqual(str(cmd.ag_test_case.pk), f.read())
+
+        self.assertEqual(len(self.ag_test_cases), self.test_case_finished_callback.call_count)
+        self.assertCountEqual(
+            self.ag_test_cases,
+            [call.args[0].ag_test_case for call in
+             self.test_case_finished_callback.call_args_list]
+        )
+
+    def test_rerun_some_tests_concurrently(self, *args) -> None:
+        to_rerun = self.ag_test_cases[1:3]
+        tasks.grade_ag_test_suite_impl(
+            self.ag_test_suite,
+            self.submission,
+            self.submission.group,
+            *[ag_test_case.pk for ag_test_case in to_rerun],
+            on_test_case_finished=self.test_case_finished_callback
+        )
+
+        self.assertEqual(len(to_rerun), ag_models.AGTestCommandResult.objects.count())
+        self.assertEqual(len(to_rerun), self.test_case_finished_callback.call_count)
+
+    def test_error_in_test_case_propagates(self, *args) -> None:
+        with mock.patch('autograder.grading_tasks.tasks.grade_ag_test.grade_ag_test_case_impl',
+                        side_effect=RuntimeError('Oops')):
+            with self.assertRaises(RuntimeError):
+                tasks.grade_ag_test_suite_impl(
+                    self.ag_test_suite,
+                    self.submission,
+                    self.submission.group,
+                    on_test_case_finished=self.test_case_finished_callback
+                )
+
+        self.test_case_finished_callback.assert_not_called()
+
+
 @mock.patch('autograder.utils.retry.sleep')
 class GradeAGTestSuiteTeardownErrorHandlingTestCase(TransactionUnitTestBase):
     def setUp(self):
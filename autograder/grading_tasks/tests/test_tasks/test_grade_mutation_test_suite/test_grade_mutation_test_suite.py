@@ -96,6 +96,50 @@ class EECS280StyleMutationTestGradingIntegrationTestCase(UnitTestBase):
 
         self._print_mutation_result_output(result)
 
+    def test_kill_matrix_recorded(self, *args) -> None:
+        tasks.grade_submission_task(self.submission.pk)
+
+        result = ag_models.MutationTestSuiteResult.objects.get(
+            mutation_test_suite=self.mutation_suite)
+        self.assertSequenceEqual(self.valid_tests, [
+            test for test in result.student_tests if test in self.valid_tests])
+
+        exposed = ag_models.MutantTestOutcome.exposed
+        timed_out = ag_models.MutantTestOutcome.timed_out
+        not_exposed = ag_models.MutantTestOutcome.not_exposed
+        self.assertEqual(
+            {
+                'RETURN_42_BUG': {'test_return_42': exposed},
+                'RETURN_TRUE_BUG': {'test_return_42': not_exposed, 'test_return_true': exposed},
+                # test_return_42 and test_return_true have each exposed
+                # one bug, so they're run in discovery order.
+                'INFINITE_LOOP_BUG': {'test_return_42': timed_out},
+                'RETURN_3_BUG': {'test_return_42': not_exposed, 'test_return_true': not_exposed},
+            },
+            result.kill_matrix
+        )
+
+        # Tests that have exposed more bugs are run first, but each bug's
+        # output is kept in discovery order.
+        with open(result.grade_buggy_impls_stdout_filename) as f:
+            stdout = f.read()
+        self.assertLess(
+            stdout.index('----- Bug "RETURN_TRUE_BUG" with Test "test_return_42" -----'),
+            stdout.index('----- Bug "RETURN_TRUE_BUG" with Test "test_return_true" -----'))
+
+    def test_kill_matrix_not_recorded_for_batches(self, *args) -> None:
+        self.mutation_suite.validate_and_update(
+            grade_buggy_impl_command={
+                'cmd': ("make student_test_batch='${all_valid_test_names}' "
+                        "bug_name=${buggy_impl_name} buggy_impl_batch"),
+            }
+        )
+        tasks.grade_submission_task(self.submission.pk)
+
+        result = ag_models.MutationTestSuiteResult.objects.get(
+            mutation_test_suite=self.mutation_suite)
+        self.assertEqual({}, result.kill_matrix)
+
     def test_run_student_tests_in_batch(self, *args) -> None:
         self.mutation_suite.validate_and_update(
             grade_buggy_impl_command={
@@ -121,6 +165,43 @@ class EECS280StyleMutationTestGradingIntegrationTestCase(UnitTestBase):
 
         self.assertEqual(0, result.get_test_names_result.return_code)
 
+    def test_grade_buggy_impls_concurrently(self, *args) -> None:
+        self.mutation_suite.validate_and_update(
+            max_concurrent_validity_checks=4, max_concurrent_buggy_impls=3)
+        tasks.grade_submission_task(self.submission.pk)
+
+        result = ag_models.MutationTestSuiteResult.objects.get(
+            mutation_test_suite=self.mutation_suite)
+        self._print_mutation_result_output(result)
+
+        self.assertCountEqual(self.all_tests, result.student_tests)
+        self.assertCountEqual(self.invalid_tests, result.invalid_tests)
+        self.assertCountEqual(self.timeout_tests, result.timed_out_tests)
+        # Exposed bugs are reported in the same order as when grading serially.
+        self.assertEqual(self.bugs_exposed, result.bugs_exposed)
+
+        # Each test's output is kept together, in the order the tests were discovered.
+        with open(result.validity_check_stdout_filename) as f:
+            stdout = f.read()
+        test_positions = [stdout.index(f'------ {test} ------') for test in result.student_tests]
+        self.assertEqual(sorted(test_positions), test_positions)
+
+        # Each buggy impl's output is kept together, in buggy_impl_names order.
+        with open(result.grade_buggy_impls_stdout_filename) as f:
+            stdout = f.read()
+        bug_positions = [
+            stdout.index(f'----- Bug "{bug}"') for bug in self.mutation_suite.buggy_impl_names]
+        self.assertEqual(sorted(bug_positions), bug_positions)
+
+        # Each buggy impl's output is in discovery order, no matter which
+        # tests the other buggy impls exposed first.
+        for bug, outcomes in result.kill_matrix.items():
+            test_positions = [
+                stdout.index(f'----- Bug "{bug}" with Test "{test}" -----')
+                for test in result.student_tests if test in outcomes
+            ]
+            self.assertEqual(sorted(test_positions), test_positions)
+
     def _print_mutation_result_output(self, result: ag_models.MutationTestSuiteResult) -> None:
         with open(result.get_test_names_result.stdout_filename) as f:
             print('get_test_names_result.stdout_filename')
@@ -313,6 +394,50 @@ class MutationTestSuiteGradingEdgeCaseTestCase(UnitTestBase):
         self.assertSequenceEqual(test_names.split(), result.student_tests)
         self.assertSequenceEqual([], result.invalid_tests)
 
+    def test_check_test_validity_in_batch(self, *args):
+        tests = ['test1', 'test2', 'test3', 'test4']
+        mutation_suite = ag_models.MutationTestSuite.objects.validate_and_create(
+            name='batchy',
+            project=self.project,
+            get_student_test_names_command={
+                'cmd': 'echo {}'.format(' '.join(tests))
+            },
+            student_test_validity_check_command={
+                'cmd': 'set -- ${all_discovered_test_names}; '
+                       'echo checking >&2; printf "%s\\n" "$2" "$4"'
+            },
+        )
+        tasks.grade_submission_task(self.submission.pk)
+
+        result = ag_models.MutationTestSuiteResult.objects.get(mutation_test_suite=mutation_suite)
+        self.assertSequenceEqual(tests, result.student_tests)
+        self.assertSequenceEqual(['test1', 'test3'], result.invalid_tests)
+        self.assertSequenceEqual([], result.timed_out_tests)
+        with open(result.validity_check_stdout_filename) as f:
+            self.assertIn('test2\ntest4\n', f.read())
+        with open(result.validity_check_stderr_filename) as f:
+            self.assertIn('checking', f.read())
+
+    def test_check_test_validity_in_batch_timeout(self, *args):
+        tests = ['test1', 'test2', 'test3']
+        mutation_suite = ag_models.MutationTestSuite.objects.validate_and_create(
+            name='batchy',
+            project=self.project,
+            get_student_test_names_command={
+                'cmd': 'echo {}'.format(' '.join(tests))
+            },
+            student_test_validity_check_command={
+                'cmd': 'set -- ${all_discovered_test_names}; echo "$1"; sleep 10',
+                'time_limit': 1,
+            },
+        )
+        tasks.grade_submission_task(self.submission.pk)
+
+        result = ag_models.MutationTestSuiteResult.objects.get(mutation_test_suite=mutation_suite)
+        self.assertSequenceEqual(tests, result.student_tests)
+        self.assertSequenceEqual(['test2', 'test3'], result.invalid_tests)
+        self.assertSequenceEqual(['test2', 'test3'], result.timed_out_tests)
+
     def test_get_test_names_stdout_and_stderr(self, *args):
         test_names = 'test1 test2 test3'
         stderr = 'stderry'
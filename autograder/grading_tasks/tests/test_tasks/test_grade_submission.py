@@ -21,7 +21,7 @@ class _MockException(Exception):
     pass
 
 
-def _make_mock_grade_ag_test_cmd_fail_then_succeed(num_times_to_fail):
+def _make_mock_run_ag_test_cmd_fail_then_succeed(num_times_to_fail):
     def side_effect(*args):
         nonlocal num_times_to_fail
         if num_times_to_fail is None:
@@ -31,7 +31,7 @@ def _make_mock_grade_ag_test_cmd_fail_then_succeed(num_times_to_fail):
             num_times_to_fail -= 1
             raise _MockException('retry me i am error')
 
-    return mock.Mock(wraps=tasks.grade_ag_test_command_impl, side_effect=side_effect)
+    return mock.Mock(wraps=tasks.run_ag_test_command_impl, side_effect=side_effect)
 
 
 @tag('slow', 'sandbox')
@@ -87,6 +87,12 @@ class GradeSubmissionTestCase(UnitTestBase):
         self.assertIsNotNone(self.submission.grading_start_time)
         self.assertIsNotNone(self.submission.non_deferred_grading_end_time)
 
+        max_score = self.submission.scores.get(fdbk_category=FeedbackCategory.max.value)
+        self.assertEqual(6, max_score.get_total_points())
+        self.assertEqual(6, max_score.get_total_points_possible())
+        self.assertTrue(
+            self.submission.scores.filter(fdbk_category=FeedbackCategory.normal.value).exists())
+
     def test_one_ag_suite_one_non_deferred_mutation_suite_one_deferred_mutation_suite(self, *args):
         ag_suite = obj_build.make_ag_test_suite(self.project)
         ag_case = obj_build.make_ag_test_case(ag_suite)
@@ -385,8 +391,8 @@ void file2() {
         self.assertEqual(ag_models.Submission.GradingStatus.removed_from_queue,
                          self.submission.status)
 
-    @mock.patch('autograder.grading_tasks.tasks.grade_ag_test_command_impl',
-                new=_make_mock_grade_ag_test_cmd_fail_then_succeed(1))
+    @mock.patch('autograder.grading_tasks.tasks.run_ag_test_command_impl',
+                new=_make_mock_run_ag_test_cmd_fail_then_succeed(1))
     def test_non_deferred_retry_on_error(self, *args):
         suite = obj_build.make_ag_test_suite(self.project)
         case = obj_build.make_ag_test_case(suite)
@@ -405,8 +411,8 @@ void file2() {
             3,
             get_submission_fdbk(self.submission, ag_models.FeedbackCategory.max).total_points)
 
-    @mock.patch('autograder.grading_tasks.tasks.grade_ag_test.grade_ag_test_command_impl',
-                new=_make_mock_grade_ag_test_cmd_fail_then_succeed(
+    @mock.patch('autograder.grading_tasks.tasks.grade_ag_test.run_ag_test_command_impl',
+                new=_make_mock_run_ag_test_cmd_fail_then_succeed(
                     settings.AG_TEST_MAX_RETRIES + 1))
     def test_non_deferred_max_num_retries_exceeded(self, impl_mock, *args):
         suite = obj_build.make_ag_test_suite(self.project)
@@ -426,8 +432,8 @@ void file2() {
                          self.submission.status)
         self.assertTrue(self.submission.error_msg.find('MaxRetriesExceeded') != -1)
 
-    @mock.patch('autograder.grading_tasks.tasks.grade_ag_test_command_impl',
-                new=_make_mock_grade_ag_test_cmd_fail_then_succeed(
+    @mock.patch('autograder.grading_tasks.tasks.run_ag_test_command_impl',
+                new=_make_mock_run_ag_test_cmd_fail_then_succeed(
                     settings.AG_TEST_MAX_RETRIES * 4))
     def test_deferred_retry_on_error(self, impl_mock, *args):
         suite = obj_build.make_ag_test_suite(self.project, deferred=True)
@@ -455,8 +461,8 @@ void file2() {
 
     @mock.patch('autograder.grading_tasks.tasks.grade_ag_test.retry_should_recover',
                 new=retry(max_num_retries=2))
-    @mock.patch('autograder.grading_tasks.tasks.grade_ag_test.grade_ag_test_command_impl',
-                new=_make_mock_grade_ag_test_cmd_fail_then_succeed(None))
+    @mock.patch('autograder.grading_tasks.tasks.grade_ag_test.run_ag_test_command_impl',
+                new=_make_mock_run_ag_test_cmd_fail_then_succeed(None))
     def test_deferred_ag_test_error(self, *args):
         suite = obj_build.make_ag_test_suite(self.project, deferred=True)
         case = obj_build.make_ag_test_case(suite)
@@ -546,7 +552,7 @@ class DenormalizedResultsUpdateTestCase(UnitTestBase):
     class _MockSubmissionGrader(SubmissionGrader):
         """
         Preserves original behavior of SubmissionGrader, but records
-        intermediate values of self.submission for later inspection.
+        intermediate values of the submission for later inspection.
         """
         def __init__(self, *args, **kwargs):
             super().__init__(*args, **kwargs)
@@ -554,11 +560,13 @@ class DenormalizedResultsUpdateTestCase(UnitTestBase):
 
         def save_denormalized_ag_test_suite_result(self, *args) -> None:
             super().save_denormalized_ag_test_suite_result(*args)
-            self.denormalized_result_snapshots.append(self.submission)
+            self.denormalized_result_snapshots.append(
+                ag_models.Submission.objects.get(pk=self.submission_pk))
 
         def save_denormalized_ag_test_case_result(self, *args) -> None:
             super().save_denormalized_ag_test_case_result(*args)
-            self.denormalized_result_snapshots.append(self.submission)
+            self.denormalized_result_snapshots.append(
+                ag_models.Submission.objects.get(pk=self.submission_pk))
 
     def setUp(self):
         super().setUp()
@@ -641,3 +649,38 @@ class DenormalizedResultsUpdateTestCase(UnitTestBase):
             AGTestPreLoader(self.project)
         )
         self.assertEqual(final_fdbk.to_dict(), snapshot_fdbk.to_dict())
+
+    def test_saving_test_case_result_does_not_load_submission(
+        self,
+        mock_update_denormed: mock.Mock,
+        *args
+    ) -> None:
+        suite = obj_build.make_ag_test_suite(self.project, setup_suite_cmd='true')
+        test = obj_build.make_ag_test_case(suite)
+        self.submission_grader.grade_submission()
+
+        suite_result = ag_models.AGTestSuiteResult.objects.get(ag_test_suite=suite)
+        case_result = ag_models.AGTestCaseResult.objects.select_related(
+            'ag_test_case'
+        ).get(ag_test_case=test)
+        case_result_dict = case_result.to_dict()
+        original_last_modified = ag_models.Submission.objects.get(
+            pk=self.submission.pk).last_modified
+
+        grader = SubmissionGrader(self.submission.pk)
+        # One query for the command results of the test case and one
+        # query to patch the submission.
+        with self.assertNumQueries(2):
+            grader.save_denormalized_ag_test_case_result(case_result)
+
+        self.submission.refresh_from_db()
+        self.assertEqual(
+            case_result_dict,
+            self.submission.denormalized_ag_test_results[
+                str(suite.pk)]['ag_test_case_results'][str(test.pk)]
+        )
+        self.assertLess(original_last_modified, self.submission.last_modified)
+
+        mock_update_denormed.assert_not_called()
+        self.assertEqual(
+            suite_result.to_dict(), self.submission.denormalized_ag_test_results[str(suite.pk)])
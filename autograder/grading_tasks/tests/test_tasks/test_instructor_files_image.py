@@ -0,0 +1,112 @@
+import os
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import tag
+
+import autograder.core.models as ag_models
+import autograder.utils.testing.model_obj_builders as obj_build
+from autograder.grading_tasks import tasks
+from autograder.grading_tasks.tasks import instructor_files_image
+from autograder.grading_tasks.tasks.instructor_files_image import (
+    get_instructor_files_image, get_suite_sandbox_image)
+from autograder.utils.testing import UnitTestBase
+
+
+@tag('slow', 'sandbox')
+@mock.patch('autograder.utils.retry.sleep')
+class InstructorFilesImageTestCase(UnitTestBase):
+    def setUp(self):
+        super().setUp()
+        self.submission = obj_build.make_submission()
+        self.project = self.submission.group.project
+        self.instructor_file = ag_models.InstructorFile.objects.validate_and_create(
+            file_obj=SimpleUploadedFile('data.txt', b'some test data'),
+            project=self.project)
+        self.suite = obj_build.make_ag_test_suite(
+            self.project, cache_instructor_files_in_image=True)
+        self.suite.instructor_files_needed.add(self.instructor_file)
+        self.case = obj_build.make_ag_test_case(self.suite)
+
+    def test_suite_graded_with_instructor_files_in_image(self, *args):
+        cmd = obj_build.make_full_ag_test_command(
+            self.case, cmd='bash -c "cat data.txt; stat -c \' %a %U\' data.txt"')
+
+        with mock.patch('autograder.grading_tasks.tasks.utils.AutograderSandbox.add_files',
+                        autospec=True) as add_files_mock:
+            tasks.grade_submission_task(self.submission.pk)
+            add_files_mock.assert_not_called()
+
+        res = ag_models.AGTestCommandResult.objects.get(ag_test_command=cmd)
+        with open(res.stdout_filename) as f:
+            self.assertEqual('some test data 444 root\n', f.read())
+
+    def test_student_file_with_same_name_replaced_by_instructor_file(self, *args):
+        student_file = obj_build.make_expected_student_file(self.project, pattern='data.txt')
+        self.suite.student_files_needed.add(student_file)
+        submission = obj_build.make_submission(
+            group=obj_build.make_group(project=self.project),
+            submitted_files=[SimpleUploadedFile('data.txt', b'student data')])
+        self.assertEqual(['data.txt'], submission.submitted_filenames)
+
+        cmd = obj_build.make_full_ag_test_command(
+            self.case, cmd='bash -c "cat data.txt; stat -c \' %a %U\' data.txt"')
+        tasks.grade_submission_task(submission.pk)
+
+        res = ag_models.AGTestCommandResult.objects.get(ag_test_command=cmd)
+        with open(res.stdout_filename) as f:
+            self.assertEqual('some test data 444 root\n', f.read())
+
+    def test_writable_instructor_files_owned_by_sandbox_user(self, *args):
+        self.suite.validate_and_update(read_only_instructor_files=False)
+        cmd = obj_build.make_full_ag_test_command(
+            self.case, cmd='bash -c "echo hi >> data.txt && stat -c %U data.txt"')
+        tasks.grade_submission_task(self.submission.pk)
+
+        res = ag_models.AGTestCommandResult.objects.get(ag_test_command=cmd)
+        with open(res.stdout_filename) as f:
+            self.assertEqual('autograder\n', f.read())
+
+    def test_image_reused_until_instructor_files_change(self, *args):
+        with mock.patch.object(instructor_files_image, '_build_image',
+                               wraps=instructor_files_image._build_image) as build_mock:
+            original_tag = get_instructor_files_image(self.suite)
+            self.assertEqual(original_tag, get_instructor_files_image(self.suite))
+            self.assertLessEqual(build_mock.call_count, 1)
+
+        # Changing the file's contents changes its size and modification time.
+        with open(self.instructor_file.abspath, 'wb') as f:
+            f.write(b'new contents')
+        new_contents_tag = get_instructor_files_image(self.suite)
+        self.assertNotEqual(original_tag, new_contents_tag)
+        self.assertFalse(instructor_files_image._image_exists(original_tag))
+
+        self.suite.instructor_files_needed.add(obj_build.make_instructor_file(self.project))
+        self.assertNotEqual(new_contents_tag, get_instructor_files_image(self.suite))
+        self.assertFalse(instructor_files_image._image_exists(new_contents_tag))
+
+    def test_tag_changes_when_read_only_instructor_files_changes(self, *args):
+        read_only_tag = get_instructor_files_image(self.suite)
+        self.suite.validate_and_update(read_only_instructor_files=False)
+        self.assertNotEqual(read_only_tag, get_instructor_files_image(self.suite))
+
+    def test_cache_instructor_files_in_image_false(self, *args):
+        self.suite.validate_and_update(cache_instructor_files_in_image=False)
+        self.assertEqual(
+            (self.suite.sandbox_docker_image.tag, False), get_suite_sandbox_image(self.suite))
+
+    def test_build_error_falls_back_to_adding_files(self, *args):
+        cmd = obj_build.make_full_ag_test_command(self.case, cmd='cat data.txt')
+        with mock.patch.object(instructor_files_image, '_get_fingerprint',
+                               return_value=os.urandom(8).hex()), \
+                mock.patch.object(instructor_files_image, '_build_image',
+                                  side_effect=Exception('Build failed')):
+            self.assertEqual(
+                (self.suite.sandbox_docker_image.tag, False),
+                get_suite_sandbox_image(self.suite))
+
+            tasks.grade_submission_task(self.submission.pk)
+
+        res = ag_models.AGTestCommandResult.objects.get(ag_test_command=cmd)
+        with open(res.stdout_filename) as f:
+            self.assertEqual('some test data', f.read())
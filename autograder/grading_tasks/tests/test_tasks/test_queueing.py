@@ -1,5 +1,9 @@
+import threading
 from unittest import mock
 
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import QuerySet
 from django.urls import reverse
 from django.test import tag
 
@@ -8,9 +12,11 @@ from rest_framework.test import APIClient
 
 import autograder.core.models as ag_models
 import autograder.utils.testing.model_obj_builders as obj_build
-from autograder.utils.testing import TransactionUnitTestBase, sleeper_subtest
+from autograder.utils.testing import TransactionUnitTestBase, UnitTestBase, sleeper_subtest
 
 from autograder.grading_tasks import tasks
+from autograder.grading_tasks.tasks.grading_time_estimates import (
+    MIN_OBSERVED_DURATIONS, get_estimated_grading_time, record_grading_duration)
 
 
 @tag('slow')
@@ -41,3 +47,238 @@ class RaceConditionTestCase(TransactionUnitTestBase):
         self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
 
         self.assertEqual(ag_models.Submission.GradingStatus.finished_grading, submission.status)
+
+
+@mock.patch('autograder.grading_tasks.tasks.queueing.grade_submission.apply_async')
+class QueueRoutingTestCase(UnitTestBase):
+    def setUp(self):
+        super().setUp()
+        self.project = obj_build.make_project()
+        self.ag_test_case = obj_build.make_ag_test_case(
+            obj_build.make_ag_test_suite(self.project))
+
+    def test_routing_uses_time_limits_without_observed_durations(self, apply_async_mock):
+        obj_build.make_full_ag_test_command(self.ag_test_case, time_limit=60)
+        self.assertEqual(60, get_estimated_grading_time(self.project.pk))
+        self._queue_submission()
+        self._check_queue(apply_async_mock, settings.FAST_QUEUE_TMPL)
+
+        for _ in range(10):
+            obj_build.make_full_ag_test_command(self.ag_test_case, time_limit=60)
+        self.assertEqual(660, get_estimated_grading_time(self.project.pk))
+        self._queue_submission()
+        self._check_queue(apply_async_mock, settings.SUBMISSION_QUEUE_TMPL)
+
+    def test_routing_uses_observed_durations(self, apply_async_mock):
+        for _ in range(11):
+            obj_build.make_full_ag_test_command(self.ag_test_case, time_limit=60)
+
+        for _ in range(MIN_OBSERVED_DURATIONS - 1):
+            record_grading_duration(self.project.pk, 30)
+        self.assertEqual(660, get_estimated_grading_time(self.project.pk))
+
+        record_grading_duration(self.project.pk, 700)
+        self.assertEqual(30, get_estimated_grading_time(self.project.pk))
+        self._queue_submission()
+        self._check_queue(apply_async_mock, settings.FAST_QUEUE_TMPL)
+
+        # Enough slow submissions move the 90th percentile above the limit.
+        record_grading_duration(self.project.pk, 700)
+        self.assertEqual(700, get_estimated_grading_time(self.project.pk))
+        self._queue_submission()
+        self._check_queue(apply_async_mock, settings.SUBMISSION_QUEUE_TMPL)
+
+    def test_estimate_cached(self, *args):
+        obj_build.make_full_ag_test_command(self.ag_test_case, time_limit=20)
+        self.assertEqual(20, get_estimated_grading_time(self.project.pk))
+        with self.assertNumQueries(0):
+            self.assertEqual(20, get_estimated_grading_time(self.project.pk))
+
+    def test_estimate_cleared_when_tests_change(self, *args):
+        cmd = obj_build.make_full_ag_test_command(self.ag_test_case, time_limit=20)
+        for _ in range(MIN_OBSERVED_DURATIONS):
+            record_grading_duration(self.project.pk, 5)
+        self.assertEqual(5, get_estimated_grading_time(self.project.pk))
+
+        cmd.validate_and_update(time_limit=30)
+        self.assertEqual(30, get_estimated_grading_time(self.project.pk))
+
+        obj_build.make_mutation_test_suite(
+            self.project,
+            student_test_validity_check_command={
+                'cmd': 'true ${student_test_name}', 'time_limit': 2},
+            max_num_student_tests=10, max_concurrent_validity_checks=4)
+        self.assertEqual(36, get_estimated_grading_time(self.project.pk))
+
+        self.ag_test_case.delete()
+        self.assertEqual(6, get_estimated_grading_time(self.project.pk))
+
+    def test_deferred_suites_excluded(self, *args):
+        obj_build.make_full_ag_test_command(self.ag_test_case, time_limit=20)
+        deferred_case = obj_build.make_ag_test_case(
+            obj_build.make_ag_test_suite(self.project, deferred=True))
+        obj_build.make_full_ag_test_command(deferred_case, time_limit=90)
+        self.assertEqual(20, get_estimated_grading_time(self.project.pk))
+
+    def test_grading_duration_recorded(self, *args):
+        submission = obj_build.make_submission(group=obj_build.make_group(project=self.project))
+        with mock.patch(
+            'autograder.grading_tasks.tasks.grade_submission.record_grading_duration'
+        ) as record_mock:
+            tasks.grade_submission_task(submission.pk)
+
+        submission.refresh_from_db()
+        record_mock.assert_called_once_with(
+            self.project.pk,
+            (submission.non_deferred_grading_end_time
+             - submission.grading_start_time).total_seconds())
+
+    def _queue_submission(self) -> None:
+        obj_build.make_submission(
+            group=obj_build.make_group(project=self.project),
+            status=ag_models.Submission.GradingStatus.received)
+        with self.captureOnCommitCallbacks(execute=True):
+            tasks.queue_submissions()
+
+    def _check_queue(self, apply_async_mock: mock.Mock, queue_tmpl: str) -> None:
+        self.assertEqual(
+            queue_tmpl.format(self.project.pk), apply_async_mock.call_args.kwargs['queue'])
+
+
+@mock.patch('autograder.grading_tasks.tasks.queueing.grade_submission.apply_async')
+class QueueSubmissionsTestCase(UnitTestBase):
+    def setUp(self):
+        super().setUp()
+        self.project1 = obj_build.make_project()
+        self.project2 = obj_build.make_project()
+
+    def test_only_received_submissions_queued_oldest_first(self, apply_async_mock):
+        received = [
+            self._make_submission(self.project1),
+            self._make_submission(self.project2),
+            self._make_submission(self.project1),
+        ]
+        being_graded = self._make_submission(
+            self.project1, ag_models.Submission.GradingStatus.being_graded)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            tasks.queue_submissions()
+            # Nothing is sent until the transaction commits.
+            apply_async_mock.assert_not_called()
+        self.assertEqual(1, len(callbacks))
+
+        self.assertEqual(
+            [
+                mock.call([received[0].pk],
+                          queue=settings.FAST_QUEUE_TMPL.format(self.project1.pk),
+                          producer=mock.ANY),
+                mock.call([received[1].pk],
+                          queue=settings.FAST_QUEUE_TMPL.format(self.project2.pk),
+                          producer=mock.ANY),
+                mock.call([received[2].pk],
+                          queue=settings.FAST_QUEUE_TMPL.format(self.project1.pk),
+                          producer=mock.ANY),
+            ],
+            apply_async_mock.call_args_list
+        )
+
+        for submission in received:
+            submission.refresh_from_db()
+            self.assertEqual(ag_models.Submission.GradingStatus.queued, submission.status)
+
+        being_graded.refresh_from_db()
+        self.assertEqual(ag_models.Submission.GradingStatus.being_graded, being_graded.status)
+
+    def test_no_received_submissions(self, apply_async_mock):
+        self._make_submission(self.project1, ag_models.Submission.GradingStatus.finished_grading)
+        with self.captureOnCommitCallbacks(execute=True):
+            tasks.queue_submissions()
+
+        apply_async_mock.assert_not_called()
+
+    def test_unsent_submissions_returned_to_received_on_broker_error(self, apply_async_mock):
+        submissions = [self._make_submission(self.project1) for _ in range(3)]
+        apply_async_mock.side_effect = [None, Exception('Broker error')]
+
+        with self.assertRaises(Exception):
+            with self.captureOnCommitCallbacks(execute=True):
+                tasks.queue_submissions()
+
+        statuses = []
+        for submission in submissions:
+            submission.refresh_from_db()
+            statuses.append(submission.status)
+        self.assertEqual(
+            [ag_models.Submission.GradingStatus.queued,
+             ag_models.Submission.GradingStatus.received,
+             ag_models.Submission.GradingStatus.received],
+            statuses
+        )
+
+    @mock.patch('autograder.utils.retry.sleep', new=mock.Mock())
+    def test_return_to_received_retried_on_error(self, apply_async_mock):
+        submission = self._make_submission(self.project1)
+        apply_async_mock.side_effect = Exception('Broker error')
+
+        original_update = QuerySet.update
+        num_update_calls = 0
+
+        def update_fails_once(queryset, **kwargs):
+            nonlocal num_update_calls
+            num_update_calls += 1
+            if num_update_calls == 1:
+                raise Exception('Database error')
+            return original_update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', autospec=True, side_effect=update_fails_once):
+            with self.assertRaises(Exception):
+                with self.captureOnCommitCallbacks(execute=True):
+                    tasks.queue_submissions()
+
+        self.assertEqual(2, num_update_calls)
+        submission.refresh_from_db()
+        self.assertEqual(ag_models.Submission.GradingStatus.received, submission.status)
+
+    def _make_submission(
+        self, project: ag_models.Project,
+        status: ag_models.Submission.GradingStatus = ag_models.Submission.GradingStatus.received
+    ) -> ag_models.Submission:
+        return obj_build.make_submission(
+            group=obj_build.make_group(project=project), status=status)
+
+
+@tag('slow')
+@mock.patch('autograder.grading_tasks.tasks.queueing.grade_submission.apply_async')
+class QueueSubmissionsSkipLockedTestCase(TransactionUnitTestBase):
+    def test_locked_submissions_skipped(self, apply_async_mock):
+        project = obj_build.make_project()
+        locked = obj_build.make_submission(group=obj_build.make_group(project=project))
+        unlocked = obj_build.make_submission(group=obj_build.make_group(project=project))
+
+        row_locked = threading.Event()
+        release_lock = threading.Event()
+
+        def lock_submission():
+            with transaction.atomic():
+                ag_models.Submission.objects.select_for_update().get(pk=locked.pk)
+                row_locked.set()
+                release_lock.wait(timeout=30)
+            connection.close()
+
+        thread = threading.Thread(target=lock_submission)
+        thread.start()
+        try:
+            self.assertTrue(row_locked.wait(timeout=30))
+            # This would block until the lock is released without SKIP LOCKED.
+            tasks.queue_submissions()
+        finally:
+            release_lock.set()
+            thread.join()
+
+        apply_async_mock.assert_called_once_with(
+            [unlocked.pk], queue=mock.ANY, producer=mock.ANY)
+
+        locked.refresh_from_db()
+        self.assertEqual(ag_models.Submission.GradingStatus.received, locked.status)
+        unlocked.refresh_from_db()
+        self.assertEqual(ag_models.Submission.GradingStatus.queued, unlocked.status)
@@ -0,0 +1,151 @@
+import subprocess
+from unittest import mock
+
+from autograder_sandbox import SANDBOX_DOCKER_IMAGE
+from django.test import tag
+
+import autograder.core.models as ag_models
+import autograder.utils.testing.model_obj_builders as obj_build
+from autograder.grading_tasks import tasks
+from autograder.grading_tasks.tasks import sandbox_pool
+from autograder.grading_tasks.tasks.sandbox_pool import SandboxPool
+from autograder.utils.testing import UnitTestBase
+
+
+@tag('slow', 'sandbox')
+class SandboxPoolTestCase(UnitTestBase):
+    def setUp(self):
+        super().setUp()
+        self.pool = SandboxPool(1)
+        self.key = (SANDBOX_DOCKER_IMAGE, False)
+
+    def tearDown(self):
+        self.pool.shutdown()
+        super().tearDown()
+
+    def test_pool_size_zero_checkout_returns_none(self):
+        pool = SandboxPool(0)
+        self.assertIsNone(pool.checkout(
+            docker_image=SANDBOX_DOCKER_IMAGE, allow_network_access=False,
+            environment_variables={}))
+        self.assertEqual({}, pool.get_stats())
+
+    def test_checkout_hit(self):
+        self.pool.replenish(self.key)
+        self.assertEqual({'hits': 0, 'misses': 0, 'idle': 1}, self.pool.get_stats()[self.key])
+
+        with mock.patch.object(self.pool, '_replenish_in_background') as replenish_mock:
+            sandbox = self.pool.checkout(
+                docker_image=SANDBOX_DOCKER_IMAGE, allow_network_access=False,
+                environment_variables={'usernames': 'steve bob'})
+            replenish_mock.assert_called_once_with(self.key)
+
+        self.assertIsNotNone(sandbox)
+        self.assertEqual({'hits': 1, 'misses': 0, 'idle': 0}, self.pool.get_stats()[self.key])
+
+        with sandbox:
+            result = sandbox.run_command(['bash', '-c', 'printf "$usernames"'])
+            self.assertEqual(b'steve bob', result.stdout.read())
+
+        self.assertFalse(_container_exists(sandbox.name))
+
+    def test_checkout_miss(self):
+        with mock.patch.object(self.pool, '_replenish_in_background') as replenish_mock:
+            sandbox = self.pool.checkout(
+                docker_image=SANDBOX_DOCKER_IMAGE, allow_network_access=True,
+                environment_variables={})
+            replenish_mock.assert_called_once_with((SANDBOX_DOCKER_IMAGE, True))
+
+        self.assertIsNone(sandbox)
+        self.assertEqual(
+            {'hits': 0, 'misses': 1, 'idle': 0},
+            self.pool.get_stats()[(SANDBOX_DOCKER_IMAGE, True)])
+
+    def test_replenish_does_not_exceed_size(self):
+        self.pool.replenish(self.key)
+        self.pool.replenish(self.key)
+        self.assertEqual(1, self.pool.get_stats()[self.key]['idle'])
+
+    def test_shutdown_destroys_idle_sandboxes(self):
+        self.pool.replenish(self.key)
+        [sandbox] = self.pool._idle[self.key]
+        self.assertTrue(_container_exists(sandbox.name))
+
+        self.pool.shutdown()
+        self.assertFalse(_container_exists(sandbox.name))
+
+        self.pool.replenish(self.key)
+        self.assertEqual(0, self.pool.get_stats()[self.key]['idle'])
+
+    def test_max_idle_evicts_least_recently_used_key(self):
+        pool = SandboxPool(1, max_idle=2)
+        self.addCleanup(pool.shutdown)
+        keys = [(SANDBOX_DOCKER_IMAGE, False), (SANDBOX_DOCKER_IMAGE, True)]
+        for key in keys:
+            pool.replenish(key)
+
+        # Checking out a key marks it as the most recently used.
+        with mock.patch.object(pool, '_replenish_in_background'):
+            sandbox = pool.checkout(
+                docker_image=SANDBOX_DOCKER_IMAGE, allow_network_access=False,
+                environment_variables={})
+        with sandbox:
+            pass
+        pool.replenish(keys[0])
+        [least_recently_used] = pool._idle[keys[1]]
+
+        new_key = ('autograder-sandbox:nonexistent-tag', False)
+        with mock.patch.object(sandbox_pool._PooledSandbox, 'start'):
+            pool.replenish(new_key)
+
+        self.assertFalse(_container_exists(least_recently_used.name))
+        self.assertEqual({keys[0], new_key}, set(pool.get_stats()))
+        self.assertEqual(1, pool.get_stats()[new_key]['idle'])
+
+    def test_max_idle_reached_by_one_key(self):
+        pool = SandboxPool(2, max_idle=1)
+        self.addCleanup(pool.shutdown)
+        pool.replenish(self.key)
+        self.assertEqual(1, pool.get_stats()[self.key]['idle'])
+
+    def test_idle_ttl_evicts_unused_keys(self):
+        pool = SandboxPool(1, idle_ttl=60)
+        self.addCleanup(pool.shutdown)
+        with mock.patch.object(sandbox_pool.time, 'monotonic', return_value=1000):
+            pool.replenish(self.key)
+        [sandbox] = pool._idle[self.key]
+
+        with mock.patch.object(sandbox_pool.time, 'monotonic', return_value=1059):
+            pool.evict_expired()
+        self.assertTrue(_container_exists(sandbox.name))
+        self.assertEqual(1, pool.get_stats()[self.key]['idle'])
+
+        with mock.patch.object(sandbox_pool.time, 'monotonic', return_value=1060):
+            pool.evict_expired()
+        self.assertFalse(_container_exists(sandbox.name))
+        self.assertEqual({}, pool.get_stats())
+
+    @mock.patch('autograder.utils.retry.sleep')
+    def test_grade_suite_with_pooled_sandbox(self, *args):
+        submission = obj_build.make_submission()
+        suite = obj_build.make_ag_test_suite(submission.group.project)
+        case = obj_build.make_ag_test_case(suite)
+        cmd = obj_build.make_full_ag_test_command(case, cmd='bash -c "printf $usernames"')
+
+        key = (suite.sandbox_docker_image.tag, suite.allow_network_access)
+        self.pool.replenish(key)
+        with mock.patch('autograder.grading_tasks.tasks.grade_ag_test.get_sandbox_pool',
+                        return_value=self.pool):
+            tasks.grade_submission_task(submission.pk)
+
+        self.assertEqual(1, self.pool.get_stats()[key]['hits'])
+        res = ag_models.AGTestCommandResult.objects.get(ag_test_command=cmd)
+        self.assertEqual(' '.join(submission.group.member_names),
+                         open(res.stdout_filename).read())
+
+
+def _container_exists(name: str) -> bool:
+    return subprocess.run(
+        ['docker', 'inspect', name],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    ).returncode == 0
@@ -1213,6 +1213,26 @@ class UnlockedMutantHintsViewUnlockNewHintTestCase(_UnlockedHintSetUp):
             expected_response_status=status.HTTP_204_NO_CONTENT,
         )
 
+    def test_unlock_hint_mutant_added_after_grading_skipped(self) -> None:
+        # The kill matrix shows that the student tests were never run
+        # against mut1, so the hint is for mut2.
+        result = ag_models.MutationTestSuiteResult.objects.validate_and_create(
+            mutation_test_suite=self.mutation_test_suite,
+            submission=obj_build.make_submission(self.group1),
+            kill_matrix={
+                bug: {'test1': ag_models.MutantTestOutcome.not_exposed}
+                for bug in ['mut2', 'mut3_no_hints', 'mut4']
+            },
+        )
+        self.do_unlock_hint_test(
+            self.mutation_test_suite,
+            self.group1,
+            result=result,
+            expected_hint_text='some mut2 hint',
+            expected_hint_number=0,
+            expected_mutant_name='mut2',
+        )
+
     def test_staff_unlock_self_hint(self) -> None:
         self.course.staff.add(self.group1.members.first())
         self.do_unlock_hint_test(
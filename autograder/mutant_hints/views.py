@@ -379,11 +379,7 @@ class NumMutantHintsAvailableView(AGModelDetailView):
 
 
 def _get_first_undetected_bug(result: ag_models.MutationTestSuiteResult) -> str | None:
-    undetected_bugs = [
-        bug
-        for bug in result.mutation_test_suite.buggy_impl_names
-        if bug not in result.bugs_exposed
-    ]
+    undetected_bugs = result.get_undetected_bugs()
     return None if not undetected_bugs else undetected_bugs[0]
 
 
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-from typing import Iterable, List
+from typing import Iterable, Iterator, List
 
 from django.utils import timezone
 
 import autograder.core.models as ag_models
-from autograder.core.models.get_ultimate_submissions import get_ultimate_submission
+from autograder.core.models.get_ultimate_submissions import (
+    UltimateSubmissionResultFeedback, get_ultimate_submission)
 from autograder.core.submission_feedback import SubmissionResultFeedback
 
 
@@ -52,7 +53,26 @@ def serialize_ultimate_submission_results(
         ...
     ]
     """
-    results = []
+    return list(iter_serialized_ultimate_submission_results(
+        ultimate_submissions,
+        full_results=full_results,
+        include_handgrading=include_handgrading,
+        include_pending_extensions=include_pending_extensions
+    ))
+
+
+def iter_serialized_ultimate_submission_results(
+    ultimate_submissions: Iterable[SubmissionResultFeedback],
+    *, full_results: bool,
+    include_handgrading: bool = False,
+    include_pending_extensions: bool = False,
+) -> Iterator[dict]:
+    """
+    Like serialize_ultimate_submission_results, but lazily yields the
+    data for each user, consuming ultimate_submissions one item at a
+    time. Use this when the serialized data doesn't need to be held in
+    memory all at once (e.g., when writing it to a file).
+    """
     for submission_fdbk in ultimate_submissions:
         submission = submission_fdbk.submission
         group = submission.group
@@ -73,20 +93,15 @@ def serialize_ultimate_submission_results(
             }
 
             if username in submission.does_not_count_for:
-                user_ultimate_submission = get_ultimate_submission(
-                    group, group.members.get(username=username))
+                user_fdbk = _get_user_ultimate_submission_fdbk(
+                    submission_fdbk, group, username)
 
-                if user_ultimate_submission is None:
+                if user_fdbk is None:
                     continue
 
                 # NOTE: Do NOT overwrite submission_data
                 user_submission_data = get_submission_data_with_results(
-                    SubmissionResultFeedback(
-                        user_ultimate_submission,
-                        ag_models.FeedbackCategory.max,
-                        submission_fdbk.ag_test_preloader,
-                        submission_fdbk.mutation_test_suite_preloader
-                    ),
+                    user_fdbk,
                     full_results,
                     include_handgrading,
                     group=group
@@ -95,9 +110,31 @@ def serialize_ultimate_submission_results(
             else:
                 user_data['ultimate_submission'] = submission_data
 
-            results.append(user_data)
-
-    return results
+            yield user_data
+
+
+def _get_user_ultimate_submission_fdbk(
+    submission_fdbk: SubmissionResultFeedback,
+    group: ag_models.Group,
+    username: str
+) -> SubmissionResultFeedback | None:
+    # get_ultimate_submissions() selects the user's ultimate submission
+    # along with the group's, so we only need to query for it when
+    # given some other SubmissionResultFeedback.
+    if isinstance(submission_fdbk, UltimateSubmissionResultFeedback):
+        return submission_fdbk.user_ultimate_submissions[username]
+
+    user_ultimate_submission = get_ultimate_submission(
+        group, group.members.get(username=username))
+    if user_ultimate_submission is None:
+        return None
+
+    return SubmissionResultFeedback(
+        user_ultimate_submission,
+        ag_models.FeedbackCategory.max,
+        submission_fdbk.ag_test_preloader,
+        submission_fdbk.mutation_test_suite_preloader
+    )
 
 
 def get_submission_data_with_results(submission_fdbk: SubmissionResultFeedback,
@@ -3,7 +3,7 @@ from django.dispatch import receiver
 
 from autograder.core.caching import clear_submission_results_cache
 import autograder.core.models as ag_models
-from autograder.grading_tasks.tasks import register_project_queues
+from autograder.grading_tasks.tasks import clear_grading_time_estimates, register_project_queues
 
 
 @receiver(post_save, sender=ag_models.Project)
@@ -19,6 +19,7 @@ def on_project_created(sender, instance, created, **kwargs):
 
 @receiver(post_save, sender=ag_models.AGTestSuite)
 def on_ag_test_suite_save(sender, instance: ag_models.AGTestSuite, created, **kwargs):
+    clear_grading_time_estimates(instance.project_id)
     if not created:
         clear_submission_results_cache(instance.project_id)
 
@@ -26,10 +27,12 @@ def on_ag_test_suite_save(sender, instance: ag_models.AGTestSuite, created, **kw
 @receiver(post_delete, sender=ag_models.AGTestSuite)
 def on_ag_test_suite_delete(sender, instance: ag_models.AGTestSuite, *args, **kwargs):
     clear_submission_results_cache(instance.project_id)
+    clear_grading_time_estimates(instance.project_id)
 
 
 @receiver(post_save, sender=ag_models.AGTestCase)
 def on_ag_test_case_save(sender, instance: ag_models.AGTestCase, created, **kwargs):
+    clear_grading_time_estimates(instance.ag_test_suite.project_id)
     if not created:
         clear_submission_results_cache(instance.ag_test_suite.project_id)
 
@@ -37,10 +40,12 @@ def on_ag_test_case_save(sender, instance: ag_models.AGTestCase, created, **kwar
 @receiver(post_delete, sender=ag_models.AGTestCase)
 def on_ag_test_case_delete(sender, instance: ag_models.AGTestCase, *args, **kwargs):
     clear_submission_results_cache(instance.ag_test_suite.project_id)
+    clear_grading_time_estimates(instance.ag_test_suite.project_id)
 
 
 @receiver(post_save, sender=ag_models.AGTestCommand)
 def on_ag_test_command_save(sender, instance: ag_models.AGTestCommand, created, **kwargs):
+    clear_grading_time_estimates(instance.ag_test_case.ag_test_suite.project_id)
     if not created:
         clear_submission_results_cache(instance.ag_test_case.ag_test_suite.project_id)
 
@@ -48,10 +53,12 @@ def on_ag_test_command_save(sender, instance: ag_models.AGTestCommand, created,
 @receiver(post_delete, sender=ag_models.AGTestCommand)
 def on_ag_test_command_delete(sender, instance: ag_models.AGTestCommand, *args, **kwargs):
     clear_submission_results_cache(instance.ag_test_case.ag_test_suite.project_id)
+    clear_grading_time_estimates(instance.ag_test_case.ag_test_suite.project_id)
 
 
 @receiver(post_save, sender=ag_models.MutationTestSuite)
 def on_mutation_test_suite_save(sender, instance: ag_models.MutationTestSuite, created, **kwargs):
+    clear_grading_time_estimates(instance.project_id)
     if not created:
         clear_submission_results_cache(instance.project_id)
 
@@ -59,3 +66,4 @@ def on_mutation_test_suite_save(sender, instance: ag_models.MutationTestSuite, c
 @receiver(post_delete, sender=ag_models.MutationTestSuite)
 def on_mutation_test_suite_delete(sender, instance: ag_models.MutationTestSuite, *args, **kwargs):
     clear_submission_results_cache(instance.project_id)
+    clear_grading_time_estimates(instance.project_id)
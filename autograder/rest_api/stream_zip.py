@@ -0,0 +1,63 @@
+import io
+import zipfile
+from pathlib import Path
+from typing import Iterable, Iterator, List, Tuple
+
+# Files are copied into the archive this many bytes at a time.
+_CHUNK_SIZE = 1024 * 1024
+
+
+def stream_zip(files: Iterable[Tuple[str, Path]]) -> Iterator[bytes]:
+    """
+    Yields the bytes of a zip archive containing the given
+    (archive name, absolute path) pairs as the archive is written,
+    so that it can be used as the content of a StreamingHttpResponse.
+
+    Files are stored without compression, so each file is read and
+    sent in chunks of at most _CHUNK_SIZE bytes without ever holding
+    the whole archive (or a whole file) in memory or on disk.
+    """
+    buffer = _WriteBuffer()
+    # Since the buffer isn't seekable, ZipFile writes each member's
+    # size and CRC in a data descriptor after the member's data.
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as z:
+        for arcname, path in files:
+            info = zipfile.ZipInfo.from_file(path, arcname=arcname)
+            with open(path, 'rb') as src, z.open(info, 'w') as dest:
+                chunk = src.read(_CHUNK_SIZE)
+                while chunk:
+                    dest.write(chunk)
+                    yield from buffer.pop()
+                    chunk = src.read(_CHUNK_SIZE)
+
+            yield from buffer.pop()
+
+    # The central directory is written when the ZipFile is closed.
+    yield from buffer.pop()
+
+
+class _WriteBuffer(io.RawIOBase):
+    """
+    An unseekable, write-only file-like object that keeps the data
+    written to it until it's removed with pop().
+    """
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:  # type: ignore
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self) -> Iterator[bytes]:
+        """
+        Yields the data written since the last call to pop(),
+        if there is any, and clears it from the buffer.
+        """
+        if self._chunks:
+            data = b''.join(self._chunks)
+            self._chunks.clear()
+            yield data
@@ -1,3 +1,3 @@
 from .project_downloads import (
-    all_submission_files_task, all_submission_scores_task,
+    all_submission_files_task, all_submission_scores_task, get_all_submitted_files,
     ultimate_submission_files_task, ultimate_submission_scores_task)
@@ -1,12 +1,17 @@
 import csv
 import os
+import shutil
 import traceback
 import uuid
 import zipfile
-from typing import Sequence, Callable, Iterator, Tuple, List
+from pathlib import Path
+from typing import Sequence, Callable, Iterator, Tuple, List, Optional
 
+import celery
 from celery import shared_task
 from django.conf import settings
+from django.db.models import F, Value
+from django.db.models.functions import Concat
 
 import autograder.core.models as ag_models
 from autograder.core.models.get_ultimate_submissions import get_ultimate_submissions
@@ -14,14 +19,15 @@ import autograder.core.utils as core_ut
 from autograder import utils
 from autograder.core.submission_feedback import (
     SubmissionResultFeedback, AGTestPreLoader, MutationTestSuitePreLoader)
-from autograder.rest_api.views.submission_views.all_ultimate_submission_results_view import (
-    serialize_ultimate_submission_results)
+from autograder.core.submission_points import SubmissionPoints, SubmissionPointsCalculator
+from autograder.rest_api.serialize_ultimate_submission_results import (
+    iter_serialized_ultimate_submission_results)
 
 
 @shared_task(queue='project_downloads', acks_late=True)
 def all_submission_files_task(project_pk, task_pk, include_staff, *args, **kwargs):
-    _make_download_file_task_impl(project_pk, task_pk, include_staff,
-                                  _get_all_submissions, _make_submission_archive)
+    if not _update_cached_submission_archive(project_pk, task_pk, include_staff):
+        _make_sharded_download_file_task_impl(project_pk, task_pk, include_staff)
 
 
 def _get_all_submissions(
@@ -36,7 +42,8 @@ def _get_all_submissions(
             ag_test_loader,
             mutation_test_suite_loader
         )
-        for submission in ag_models.Submission.objects.filter(group__in=groups)
+        for submission in ag_models.Submission.objects.filter(
+            group__in=groups).select_related('group')
     ]
     return submissions, len(submissions)
 
@@ -49,30 +56,30 @@ def ultimate_submission_files_task(project_pk, task_pk, include_staff, *args, **
 
 @shared_task(queue='project_downloads', acks_late=True)
 def all_submission_scores_task(project_pk, task_pk, include_staff, *args, **kwargs):
-    def _get_all_finished_grading_submissions(
-            project: ag_models.Project, groups: Sequence[ag_models.Group]
-    ) -> Tuple[List[SubmissionResultFeedback], int]:
-        submissions = ag_models.get_submissions_with_results_queryset(
-            base_manager=ag_models.Submission.objects.filter(
-                group__in=groups,
-                status=ag_models.Submission.GradingStatus.finished_grading
-            )
-        )
-        ag_test_loader = AGTestPreLoader(project)
-        mutation_test_suite_loader = MutationTestSuitePreLoader(project)
-        fdbks = [
-            SubmissionResultFeedback(
-                submission,
-                ag_models.FeedbackCategory.max,
-                ag_test_loader,
-                mutation_test_suite_loader
-            )
-            for submission in submissions
-        ]
-        return fdbks, len(submissions)
+    _make_sharded_download_file_task_impl(project_pk, task_pk, include_staff)
 
-    _make_download_file_task_impl(project_pk, task_pk, include_staff,
-                                  _get_all_finished_grading_submissions, _make_scores_csv)
+
+def _get_all_finished_grading_submissions(
+        project: ag_models.Project, groups: Sequence[ag_models.Group]
+) -> Tuple[List[SubmissionResultFeedback], int]:
+    submissions = ag_models.get_submissions_with_results_queryset(
+        base_manager=ag_models.Submission.objects.filter(
+            group__in=groups,
+            status=ag_models.Submission.GradingStatus.finished_grading
+        )
+    )
+    ag_test_loader = AGTestPreLoader(project)
+    mutation_test_suite_loader = MutationTestSuitePreLoader(project)
+    fdbks = [
+        SubmissionResultFeedback(
+            submission,
+            ag_models.FeedbackCategory.max,
+            ag_test_loader,
+            mutation_test_suite_loader
+        )
+        for submission in submissions
+    ]
+    return fdbks, len(submissions)
 
 
 @shared_task(queue='project_downloads', acks_late=True)
@@ -87,33 +94,50 @@ GetSubmissionsFnType = Callable[[ag_models.Project, Sequence[ag_models.Group]],
                                 Tuple[Iterator[SubmissionResultFeedback], int]]
 
 
+# Ultimate submissions are loaded for this many groups at a time so that
+# the submissions (and their results) of every group in a large course
+# are never held in memory all at once.
+_ULTIMATE_SUBMISSIONS_CHUNK_SIZE = 100
+
+
 def _get_ultimate_submissions(
         project: ag_models.Project,
         groups: Sequence[ag_models.Group]) -> Tuple[Iterator[SubmissionResultFeedback], int]:
-    submissions = get_ultimate_submissions(
-        project, filter_groups=groups, ag_test_preloader=AGTestPreLoader(project))
-    return submissions, len(groups)
+    ag_test_preloader = AGTestPreLoader(project)
+
+    def _load_in_chunks() -> Iterator[SubmissionResultFeedback]:
+        for start in range(0, len(groups), _ULTIMATE_SUBMISSIONS_CHUNK_SIZE):
+            yield from get_ultimate_submissions(
+                project,
+                filter_groups=groups[start:start + _ULTIMATE_SUBMISSIONS_CHUNK_SIZE],
+                ag_test_preloader=ag_test_preloader)
+
+    return _load_in_chunks(), len(groups)
 
 
 # Given a task, an iterator of SubmissionResultFeedbacks,
-# the number of submissions that iterator will generate,
-# and a destination filename, create
-# a downloadable file with the given destination filename, updating
-# the task's progress field as the file is generated.
+# and a destination filename, create a downloadable file
+# with the given destination filename.
 MakeDownloadFnType = Callable[
-    [ag_models.DownloadTask, Iterator[SubmissionResultFeedback], int, str], None]
+    [ag_models.DownloadTask, Iterator[SubmissionResultFeedback], str], None]
 
 
 def _make_download_file_task_impl(project_pk, task_pk, include_staff,
                                   get_submissions_fn: GetSubmissionsFnType,
-                                  make_download_fn: MakeDownloadFnType):
+                                  make_download_fn: MakeDownloadFnType,
+                                  cache_filename: Optional[str] = None):
     task = ag_models.DownloadTask.objects.get(pk=task_pk)
     try:
         project = ag_models.Project.objects.get(pk=project_pk)
         groups = _get_groups(project, include_staff)
         submissions, num_submissions = get_submissions_fn(project, groups)
         result_filename = _make_download_result_filename(project, task)
-        make_download_fn(task, submissions, num_submissions, result_filename)
+        make_download_fn(
+            task,
+            _update_progress_while_iterating(task, submissions, num_submissions),
+            result_filename)
+        if cache_filename is not None:
+            _save_cached_submission_archive(result_filename, cache_filename)
         task.result_filename = result_filename
         task.progress = 100
         task.save()
@@ -123,6 +147,156 @@ def _make_download_file_task_impl(project_pk, task_pk, include_staff,
         task.save()
 
 
+# Downloads of all of a project's submissions are split into shards of
+# (at most) this many groups. Each shard is built into a partial file by
+# a separate task on the project_downloads queue, and the partial files
+# are then merged into the final result.
+_DOWNLOAD_SHARD_NUM_GROUPS = 200
+
+# Given the partial files built for each shard (in order) and a
+# destination filename, merge the partial files into the destination file.
+MergeDownloadShardsFnType = Callable[[Sequence[str], str], None]
+
+
+def _get_sharded_download_fns(
+    download_type: ag_models.DownloadType
+) -> Tuple[GetSubmissionsFnType, MakeDownloadFnType, MergeDownloadShardsFnType]:
+    if download_type == ag_models.DownloadType.all_submission_files:
+        return _get_all_submissions, _make_submission_archive, _merge_submission_archives
+    elif download_type == ag_models.DownloadType.all_scores:
+        return _get_all_finished_grading_submissions, _make_scores_csv, _merge_csvs
+    else:
+        assert False, f'Unexpected sharded download type: "{download_type}"'
+
+
+def _make_sharded_download_file_task_impl(project_pk, task_pk, include_staff):
+    """
+    Builds the download file for the task with primary key task_pk
+    using a chord of make_download_shard_task tasks (one per
+    _DOWNLOAD_SHARD_NUM_GROUPS groups) followed by
+    merge_download_shards_task. If there is only one shard, the file
+    is built by this task instead.
+    """
+    task = ag_models.DownloadTask.objects.get(pk=task_pk)
+    try:
+        project = ag_models.Project.objects.get(pk=project_pk)
+        groups = _get_groups(project, include_staff)
+        cache_filename = None
+        if task.download_type == ag_models.DownloadType.all_submission_files:
+            cache_filename = _get_cached_submission_archive_filename(project, include_staff)
+
+        if len(groups) <= _DOWNLOAD_SHARD_NUM_GROUPS:
+            get_submissions_fn, make_download_fn, _ = _get_sharded_download_fns(
+                task.download_type)
+            _make_download_file_task_impl(
+                project_pk, task_pk, include_staff, get_submissions_fn, make_download_fn,
+                cache_filename=cache_filename)
+            return
+
+        result_filename = _make_download_result_filename(project, task)
+        shards = [
+            groups[start:start + _DOWNLOAD_SHARD_NUM_GROUPS]
+            for start in range(0, len(groups), _DOWNLOAD_SHARD_NUM_GROUPS)
+        ]
+        shard_filenames = [
+            f'{result_filename}.shard{index}' for index in range(len(shards))
+        ]
+        # Progress is reported by the shards in proportion to their
+        # number of groups. The merge step sets it to 100.
+        shard_signatures = [
+            make_download_shard_task.s(
+                task_pk,
+                [group.pk for group in shard],
+                shard_filename,
+                (99 * len(shard)) // len(groups)
+            )
+            for shard, shard_filename in zip(shards, shard_filenames)
+        ]
+        callback = merge_download_shards_task.s(
+            task_pk, shard_filenames, result_filename, cache_filename
+        ).on_error(on_download_shards_error.s(task_pk, shard_filenames))
+        celery.chord(shard_signatures)(callback)
+    except Exception:
+        traceback.print_exc()
+        task.error_msg = traceback.format_exc()
+        task.save()
+
+
+@shared_task(queue='project_downloads', acks_late=True)
+def make_download_shard_task(task_pk: int, group_pks: List[int], dest_filename: str,
+                             max_progress: int):
+    """
+    Builds the partial download file for the groups with primary keys
+    group_pks, adding up to max_progress to the task's progress as
+    the file is built.
+    """
+    task = ag_models.DownloadTask.objects.select_related('project').get(pk=task_pk)
+    try:
+        get_submissions_fn, make_download_fn, _ = _get_sharded_download_fns(task.download_type)
+        groups_by_pk = task.project.groups.in_bulk(group_pks)
+        groups = [groups_by_pk[pk] for pk in group_pks]
+        submissions, num_submissions = get_submissions_fn(task.project, groups)
+        make_download_fn(
+            task,
+            _update_shard_progress_while_iterating(
+                task_pk, submissions, num_submissions, max_progress),
+            dest_filename)
+    except Exception:
+        traceback.print_exc()
+        _record_download_task_error(task_pk, traceback.format_exc())
+
+
+@shared_task(queue='project_downloads', acks_late=True)
+def merge_download_shards_task(shard_results, task_pk: int, shard_filenames: List[str],
+                               dest_filename: str, cache_filename: Optional[str] = None):
+    task = ag_models.DownloadTask.objects.get(pk=task_pk)
+    try:
+        if not task.has_error:
+            _, _, merge_fn = _get_sharded_download_fns(task.download_type)
+            merge_fn(shard_filenames, dest_filename)
+            if cache_filename is not None:
+                _save_cached_submission_archive(dest_filename, cache_filename)
+            task.result_filename = dest_filename
+            task.progress = 100
+            task.save()
+    except Exception:
+        traceback.print_exc()
+        task.error_msg = traceback.format_exc()
+        task.save()
+    finally:
+        _remove_shard_files(shard_filenames)
+
+
+@shared_task(queue='project_downloads', acks_late=True)
+def on_download_shards_error(request, exc, traceback, task_pk: int, shard_filenames: List[str]):
+    """
+    Called if the chord of make_download_shard_task tasks fails
+    (e.g., a shard task raised outside of its error handling or its
+    worker was killed), in which case merge_download_shards_task
+    is never run.
+    """
+    print(f'Error building download shards for task {task_pk}')
+    print(traceback)
+    print(exc)
+    try:
+        _record_download_task_error(
+            task_pk, f'Error building download shards: {exc}\n{traceback or ""}')
+    finally:
+        _remove_shard_files(shard_filenames)
+
+
+def _remove_shard_files(shard_filenames: Sequence[str]) -> None:
+    for filename in shard_filenames:
+        if os.path.exists(filename):
+            os.remove(filename)
+
+
+def _record_download_task_error(task_pk: int, error_msg: str) -> None:
+    # Several shards may record errors concurrently.
+    ag_models.DownloadTask.objects.filter(pk=task_pk).update(
+        error_msg=Concat('error_msg', Value(error_msg)))
+
+
 def _get_groups(project, include_staff) -> Sequence[ag_models.Group]:
     groups = project.groups.all()
     groups = filter(lambda group: group.submissions.count(), groups)
@@ -149,29 +323,142 @@ _PROGRESS_UPDATE_FREQUENCY = 50
 
 def _make_submission_archive(task: ag_models.DownloadTask,
                              submission_fdbks: Iterator[SubmissionResultFeedback],
-                             num_submissions, dest_filename):
+                             dest_filename: str):
     with open(dest_filename, 'wb') as archive:
         with zipfile.ZipFile(archive, 'w') as z:
-            for index, fdbk in enumerate(submission_fdbks):
-                submission = fdbk.submission
-                archive_dirname = ('_'.join(submission.group.member_names)
-                                   + '-' + submission.timestamp.isoformat())
-                with utils.ChangeDirectory(core_ut.get_submission_dir(submission)):
-                    for filename in submission.submitted_filenames:
-                        target_name = os.path.join(
-                            '{}_{}'.format(task.project.course.name, task.project.name),
-                            archive_dirname, filename)
-                        z.write(filename, arcname=target_name)
-
-                if index % _PROGRESS_UPDATE_FREQUENCY == 0:
-                    task.progress = (index / num_submissions) * 100
-                    task.save()
-                    print('Updated task {} progress: {}'.format(task.pk, task.progress))
+            _write_submitted_files(z, task.project, submission_fdbks)
+
+
+def _write_submitted_files(z: zipfile.ZipFile,
+                           project: ag_models.Project,
+                           submission_fdbks: Iterator[SubmissionResultFeedback]):
+    for fdbk in submission_fdbks:
+        submission = fdbk.submission
+        archive_dirname = _get_submission_archive_dirname(project, submission)
+        with utils.ChangeDirectory(core_ut.get_submission_dir(submission)):
+            for filename in submission.submitted_filenames:
+                z.write(filename, arcname=os.path.join(archive_dirname, filename))
+
+
+def get_all_submitted_files(project: ag_models.Project,
+                            include_staff: bool) -> List[Tuple[str, Path]]:
+    """
+    Returns (archive name, absolute path) pairs for every file submitted
+    to project, named the same way as in all_submission_files downloads.
+    """
+    groups = _get_groups(project, include_staff)
+    submissions = ag_models.Submission.objects.filter(
+        group__in=groups).select_related('group')
+    return [
+        (os.path.join(_get_submission_archive_dirname(project, submission), filename),
+         submission.get_file_abspath(filename))
+        for submission in submissions
+        for filename in submission.submitted_filenames
+    ]
+
+
+def _get_submission_archive_dirname(project: ag_models.Project,
+                                    submission: ag_models.Submission) -> str:
+    return os.path.join(
+        '{}_{}'.format(project.course.name, project.name),
+        '_'.join(submission.group.member_names) + '-' + submission.timestamp.isoformat())
+
+
+# Submitted files never change, so the archive built for a project's
+# all_submission_files download is kept (one per value of include_staff)
+# and reused by later downloads, which only need to append the files of
+# submissions made since the archive was built.
+def _get_cached_submission_archive_filename(project: ag_models.Project,
+                                            include_staff: bool) -> str:
+    cache_dir = os.path.join(settings.MEDIA_ROOT, 'project_downloads', 'cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    return os.path.join(
+        cache_dir,
+        '{}-{}-{}.zip'.format(
+            project.pk, ag_models.DownloadType.all_submission_files.value,
+            'include_staff' if include_staff else 'exclude_staff'))
+
+
+def _update_cached_submission_archive(project_pk, task_pk, include_staff) -> bool:
+    """
+    Builds the result of the all_submission_files task with primary
+    key task_pk by copying the project's cached archive and appending
+    the files of the submissions it doesn't contain. The result then
+    replaces the cached archive.
+
+    Returns False without modifying the task if there is no cached
+    archive or if the cached archive contains files that don't belong
+    in the download (e.g., because a submission was deleted or a
+    group's members changed). In that case, the archive must be built
+    from scratch.
+    """
+    task = ag_models.DownloadTask.objects.get(pk=task_pk)
+    try:
+        project = ag_models.Project.objects.select_related('course').get(pk=project_pk)
+        cache_filename = _get_cached_submission_archive_filename(project, include_staff)
+        if not os.path.exists(cache_filename):
+            return False
+
+        groups = _get_groups(project, include_staff)
+        submissions, _ = _get_all_submissions(project, groups)
+        submissions_by_dirname = {
+            _get_submission_archive_dirname(project, fdbk.submission): fdbk
+            for fdbk in submissions
+        }
+        with zipfile.ZipFile(cache_filename) as cached:
+            cached_dirnames = {os.path.dirname(name) for name in cached.namelist()}
+        if not cached_dirnames <= submissions_by_dirname.keys():
+            return False
+
+        new_submissions = [
+            fdbk for dirname, fdbk in submissions_by_dirname.items()
+            if dirname not in cached_dirnames
+        ]
+        result_filename = _make_download_result_filename(project, task)
+        shutil.copyfile(cache_filename, result_filename)
+        with zipfile.ZipFile(result_filename, 'a') as z:
+            _write_submitted_files(
+                z, project,
+                _update_progress_while_iterating(
+                    task, iter(new_submissions), len(new_submissions)))
+
+        _save_cached_submission_archive(result_filename, cache_filename)
+        task.result_filename = result_filename
+        task.progress = 100
+        task.save()
+    except Exception:
+        traceback.print_exc()
+        task.error_msg = traceback.format_exc()
+        task.save()
+
+    return True
+
+
+def _save_cached_submission_archive(result_filename: str, cache_filename: str):
+    # Download results are never modified after they're built, so the
+    # cached archive can share the result's data instead of copying it.
+    # The cached archive is replaced rather than overwritten so that
+    # tasks copying the old version aren't affected.
+    tmp_filename = '{}.{}'.format(cache_filename, uuid.uuid4().hex)
+    try:
+        os.link(result_filename, tmp_filename)
+    except OSError:
+        shutil.copyfile(result_filename, tmp_filename)
+    os.replace(tmp_filename, cache_filename)
+
+
+def _merge_submission_archives(shard_filenames: Sequence[str], dest_filename: str):
+    with zipfile.ZipFile(dest_filename, 'w') as merged:
+        for shard_filename in shard_filenames:
+            with zipfile.ZipFile(shard_filename) as shard:
+                for info in shard.infolist():
+                    with shard.open(info) as src, merged.open(info, 'w') as dest:
+                        shutil.copyfileobj(src, dest)
 
 
 def _make_scores_csv(task: ag_models.DownloadTask,
                      submission_fdbks: Iterator[SubmissionResultFeedback],
-                     num_submissions: int, dest_filename: str):
+                     dest_filename: str):
     with open(dest_filename, 'w', newline='') as csv_file:
         project = task.project  # type: ag_models.Project
 
@@ -188,34 +475,55 @@ def _make_scores_csv(task: ag_models.DownloadTask,
         writer = csv.DictWriter(csv_file, row_headers)
         writer.writeheader()
 
-        for progress_index, fdbk in enumerate(submission_fdbks):
+        ag_test_preloader = AGTestPreLoader(project)
+        mutation_test_suite_preloader = MutationTestSuitePreLoader(project)
+        # Computing only the points we need is much faster than
+        # serializing each submission's full feedback.
+        points_calculator = SubmissionPointsCalculator(
+            ag_models.FeedbackCategory.max, ag_test_preloader, mutation_test_suite_preloader)
+
+        for fdbk in submission_fdbks:
             submission = fdbk.submission
             row = {timestamp_header: submission.timestamp.isoformat()}
 
             for index, username in enumerate(submission.group.member_names):
                 row[user_tmpl.format(index + 1)] = username
 
-            row[total_header] = fdbk.total_points
-            row[total_possible_header] = fdbk.total_points_possible
+            points = points_calculator.get_points(submission)
+            row[total_header] = points.total_points
+            row[total_possible_header] = points.total_points_possible
 
-            row.update(_make_test_detail_columns(fdbk.to_dict()))
+            row.update(_make_test_detail_columns_from_points(
+                points, ag_test_preloader, mutation_test_suite_preloader))
 
             writer.writerow(row)
 
-            if progress_index % _PROGRESS_UPDATE_FREQUENCY == 0:
-                task.progress = (progress_index / num_submissions) * 100
-                task.save()
-                print('Updated task {} progress: {}'.format(task.pk, task.progress))
+
+def _merge_csvs(shard_filenames: Sequence[str], dest_filename: str):
+    """
+    Concatenates the rows of the CSV files in shard_filenames, which
+    must all have the same header row.
+    """
+    with open(dest_filename, 'w', newline='') as dest:
+        writer = csv.writer(dest)
+        for index, shard_filename in enumerate(shard_filenames):
+            with open(shard_filename, newline='') as shard:
+                reader = csv.reader(shard)
+                header = next(reader)
+                if index == 0:
+                    writer.writerow(header)
+                writer.writerows(reader)
 
 
 def _make_ultimate_submission_scores_csv(task: ag_models.DownloadTask,
                                          submission_fdbks: Iterator[SubmissionResultFeedback],
-                                         num_submissions: int, dest_filename: str):
+                                         dest_filename: str):
     project_has_handgrading = False
     if hasattr(task.project, 'handgrading_rubric'):
         project_has_handgrading = True
 
-    results = serialize_ultimate_submission_results(
+    # Rows are generated and written one submission at a time.
+    results = iter_serialized_ultimate_submission_results(
         submission_fdbks,
         full_results=True,
         include_handgrading=project_has_handgrading,
@@ -236,7 +544,7 @@ def _make_ultimate_submission_scores_csv(task: ag_models.DownloadTask,
         writer = csv.DictWriter(csv_file, headers)
         writer.writeheader()
 
-        for progress_index, result in enumerate(results):
+        for result in results:
             if result['ultimate_submission'] is None:
                 continue
 
@@ -260,10 +568,47 @@ def _make_ultimate_submission_scores_csv(task: ag_models.DownloadTask,
 
             writer.writerow(row)
 
-            if progress_index % _PROGRESS_UPDATE_FREQUENCY == 0:
-                task.progress = (progress_index / num_submissions) * 100
-                task.save()
-                print('Updated task {} progress: {}'.format(task.pk, task.progress))
+
+def _update_progress_while_iterating(
+        task: ag_models.DownloadTask,
+        submission_fdbks: Iterator[SubmissionResultFeedback],
+        num_submissions: int) -> Iterator[SubmissionResultFeedback]:
+    for progress_index, fdbk in enumerate(submission_fdbks):
+        if progress_index % _PROGRESS_UPDATE_FREQUENCY == 0:
+            task.progress = (progress_index / num_submissions) * 100
+            task.save()
+            print('Updated task {} progress: {}'.format(task.pk, task.progress))
+
+        yield fdbk
+
+
+def _update_shard_progress_while_iterating(
+        task_pk: int,
+        submission_fdbks: Iterator[SubmissionResultFeedback],
+        num_submissions: int,
+        max_progress: int) -> Iterator[SubmissionResultFeedback]:
+    """
+    Like _update_progress_while_iterating, but for one of several
+    shards of a download. The shard's share of the task's progress
+    (at most max_progress) is added to the task's progress field in
+    increments so that shards running concurrently don't overwrite
+    each other's progress.
+    """
+    progress_added = 0
+    for progress_index, fdbk in enumerate(submission_fdbks):
+        if progress_index % _PROGRESS_UPDATE_FREQUENCY == 0:
+            shard_progress = (max_progress * progress_index) // num_submissions
+            if shard_progress > progress_added:
+                ag_models.DownloadTask.objects.filter(pk=task_pk).update(
+                    progress=F('progress') + (shard_progress - progress_added))
+                progress_added = shard_progress
+                print('Updated task {} progress by {}'.format(task_pk, progress_added))
+
+        yield fdbk
+
+    if max_progress > progress_added:
+        ag_models.DownloadTask.objects.filter(pk=task_pk).update(
+            progress=F('progress') + (max_progress - progress_added))
 
 
 AG_SUITE_TOTAL_TMPL = '{} Total'
@@ -294,6 +639,34 @@ def _make_test_detail_headers(project: ag_models.Project):
     return headers
 
 
+def _make_test_detail_columns_from_points(
+        points: SubmissionPoints,
+        ag_test_preloader: AGTestPreLoader,
+        mutation_test_suite_preloader: MutationTestSuitePreLoader):
+    """
+    Like _make_test_detail_columns, but uses points computed with
+    max feedback instead of a serialized SubmissionResultFeedback.
+    """
+    row = {}
+    for suite_points in points.ag_test_suite_points:
+        suite_name = ag_test_preloader.get_ag_test_suite(suite_points.ag_test_suite_pk).name
+        row[AG_SUITE_TOTAL_TMPL.format(suite_name)] = suite_points.total_points
+        row[AG_SUITE_TOTAL_POSSIBLE_TMPL.format(suite_name)] = suite_points.total_points_possible
+
+        for case_points in suite_points.ag_test_case_points:
+            case_name = ag_test_preloader.get_ag_test_case(case_points.ag_test_case_pk).name
+            row[AG_TEST_HEADER_TMPL.format(suite_name, case_name)] = case_points.total_points
+
+    for mutation_suite_points in points.mutation_test_suite_points:
+        suite_name = mutation_test_suite_preloader.get_mutation_test_suite(
+            mutation_suite_points.mutation_test_suite_pk).name
+        row[MUTATION_SUITE_TOTAL_TMPL.format(suite_name)] = mutation_suite_points.total_points
+        row[MUTATION_SUITE_TOTAL_POSSIBLE_TMPL.format(suite_name)] = (
+            mutation_suite_points.total_points_possible)
+
+    return row
+
+
 def _make_test_detail_columns(submission_fdbk_dict: dict):
     row = {}
     for suite_fdbk in submission_fdbk_dict['ag_test_suite_results']:
@@ -5,7 +5,8 @@ from unittest import mock
 from django.utils import timezone
 
 import autograder.core.models as ag_models
-from autograder.core.models.get_ultimate_submissions import get_ultimate_submission
+from autograder.core.models.get_ultimate_submissions import (
+    get_ultimate_submission, get_ultimate_submissions)
 from autograder.core.submission_feedback import (
     update_denormalized_ag_test_results, AGTestPreLoader, SubmissionResultFeedback)
 from autograder.rest_api.serialize_ultimate_submission_results import (
@@ -330,6 +331,40 @@ class SerializeUltimateSubmissionResultsTestCase(UnitTestBase):
 
             mock_get_ultimate_submission.assert_called_once_with(group, doesnt_count_for_user)
 
+    def test_user_ultimate_submissions_selected_by_get_ultimate_submissions(self):
+        group = obj_build.make_group(project=self.project, num_members=3)
+        doesnt_count_for_username = group.member_names[0]
+        no_submissions_count_for_username = group.member_names[1]
+
+        first_submission = self._add_results_to_submission(
+            obj_build.make_finished_submission(group), results_correct=False)
+        first_submission.does_not_count_for = [no_submissions_count_for_username]
+        first_submission.save()
+
+        most_recent_submission = self._add_results_to_submission(
+            obj_build.make_finished_submission(group), results_correct=True)
+        most_recent_submission.does_not_count_for = [
+            doesnt_count_for_username, no_submissions_count_for_username]
+        most_recent_submission.save()
+
+        expected = serialize_ultimate_submission_results(
+            [SubmissionResultFeedback(
+                most_recent_submission, ag_models.FeedbackCategory.max,
+                self.ag_test_preloader)],
+            full_results=True
+        )
+        self.assertEqual(2, len(expected))
+
+        ultimate_submissions = get_ultimate_submissions(
+            self.project, filter_groups=None, ag_test_preloader=self.ag_test_preloader)
+        with mock.patch('autograder.rest_api.serialize_ultimate_submission_results'
+                        '.get_ultimate_submission') as mock_get_ultimate_submission:
+            actual = serialize_ultimate_submission_results(
+                ultimate_submissions, full_results=True)
+            mock_get_ultimate_submission.assert_not_called()
+
+        self.assertEqual(expected, actual)
+
     def test_group_has_user_no_submissions_count_for(self) -> None:
         self.assertEqual(ag_models.UltimateSubmissionPolicy.most_recent,
                          self.project.ultimate_submission_policy)
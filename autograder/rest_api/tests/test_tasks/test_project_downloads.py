@@ -8,6 +8,7 @@ from collections import OrderedDict
 from typing import Iterator, BinaryIO, Optional
 from unittest import mock
 
+from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
 from django.utils import timezone
@@ -17,11 +18,13 @@ from rest_framework.test import APIClient
 import autograder.core.models as ag_models
 import autograder.handgrading.models as hg_models
 import autograder.utils.testing.model_obj_builders as obj_build
+from autograder.core.models.get_ultimate_submissions import get_ultimate_submissions
 from autograder.core.submission_feedback import (
     update_denormalized_ag_test_results, SubmissionResultFeedback, AGTestPreLoader)
 from autograder.core.tests.test_submission_feedback.fdbk_getter_shortcuts import (
     get_submission_fdbk)
 from autograder.core.submission_feedback import MutationTestSuitePreLoader
+from autograder.rest_api.tasks import project_downloads
 from autograder.utils.testing import UnitTestBase
 
 
@@ -92,6 +95,81 @@ class DownloadSubmissionFilesTestCase(UnitTestBase):
             url, [self.group1_submission1, self.group1_submission2,
                   self.group2_submission1, self.staff_submission1])
 
+    @mock.patch('autograder.rest_api.tasks.project_downloads._DOWNLOAD_SHARD_NUM_GROUPS',
+                new=1)
+    def test_all_files_include_staff_built_in_shards(self):
+        self.test_all_files_include_staff()
+
+    def test_all_files_cached_archive_updated_with_new_submissions(self):
+        url = reverse('all-submission-files-task', kwargs={'pk': self.project.pk})
+        self.do_download_submissions_test(
+            url, [self.group1_submission1, self.group1_submission2, self.group2_submission1])
+
+        group2_submission2 = obj_build.make_finished_submission(
+            submitted_files=self.files[1:],
+            group=self.student_group2)
+        with mock.patch(
+            'autograder.rest_api.tasks.project_downloads._make_sharded_download_file_task_impl'
+        ) as mock_build_from_scratch:
+            self.do_download_submissions_test(
+                url, [self.group1_submission1, self.group1_submission2,
+                      self.group2_submission1, group2_submission2])
+            mock_build_from_scratch.assert_not_called()
+
+    def test_all_files_cached_archive_rebuilt_when_submission_deleted(self):
+        url = reverse('all-submission-files-task', kwargs={'pk': self.project.pk})
+        self.do_download_submissions_test(
+            url, [self.group1_submission1, self.group1_submission2, self.group2_submission1])
+
+        self.group1_submission1.delete()
+        self.do_download_submissions_test(
+            url, [self.group1_submission2, self.group2_submission1])
+
+    def test_all_files_cached_archive_separate_for_include_staff(self):
+        url = reverse('all-submission-files-task', kwargs={'pk': self.project.pk})
+        self.do_download_submissions_test(
+            url, [self.group1_submission1, self.group1_submission2, self.group2_submission1])
+        self.test_all_files_include_staff()
+
+    def test_stream_all_files(self):
+        self.do_stream_submissions_test(
+            reverse('all-submission-files-stream', kwargs={'pk': self.project.pk}),
+            [self.group1_submission1, self.group1_submission2, self.group2_submission1])
+
+    def test_stream_all_files_include_staff(self):
+        url = reverse('all-submission-files-stream', kwargs={'pk': self.project.pk})
+        url += '?include_staff=true'
+        self.do_stream_submissions_test(
+            url, [self.group1_submission1, self.group1_submission2,
+                  self.group2_submission1, self.staff_submission1])
+
+    def test_stream_all_files_no_submissions(self):
+        ag_models.Submission.objects.all().delete()
+        self.do_stream_submissions_test(
+            reverse('all-submission-files-stream', kwargs={'pk': self.project.pk}), [])
+
+    @mock.patch('autograder.rest_api.views.project_views.project_views'
+                '.MAX_STREAMED_SUBMITTED_FILES', new=2)
+    def test_stream_too_many_files_bad_request(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(
+            reverse('all-submission-files-stream', kwargs={'pk': self.project.pk}))
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertFalse(ag_models.DownloadTask.objects.exists())
+
+    def do_stream_submissions_test(self, url,
+                                   expected_submissions: Iterator[ag_models.Submission]):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(url)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual('application/zip', response['Content-Type'])
+
+        with tempfile.TemporaryFile() as result:
+            result.write(b''.join(response.streaming_content))
+            self._check_zip_content(result, self._get_expected_filenames(expected_submissions))
+
+        self.assertFalse(ag_models.DownloadTask.objects.exists())
+
     def test_ultimate_submission_files_include_staff(self):
         url = reverse('ultimate-submission-files-task', kwargs={'pk': self.project.pk})
         url += '?include_staff=true'
@@ -142,6 +220,10 @@ class DownloadSubmissionFilesTestCase(UnitTestBase):
             reverse('ultimate-submission-files-task', kwargs={'pk': self.project.pk}))
         self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
 
+        response = self.client.get(
+            reverse('all-submission-files-stream', kwargs={'pk': self.project.pk}))
+        self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
+
     def test_unfinished_and_error_submissions_ignored(self):
         self.client.force_authenticate(self.admin)
 
@@ -299,7 +381,7 @@ class DownloadAllUltimateSubmissionGradesTestCase(UnitTestBase):
         mock_serialize_ultimate_submission_results = mock.Mock(return_value=[])
 
         with mock.patch('autograder.rest_api.tasks.project_downloads'
-                        '.serialize_ultimate_submission_results',
+                        '.iter_serialized_ultimate_submission_results',
                         new=mock_serialize_ultimate_submission_results):
             self.client.force_authenticate(self.admin)
             self.client.post(self.url)
@@ -397,7 +479,7 @@ class DownloadAllUltimateSubmissionGradesTestCase(UnitTestBase):
         )
 
         with mock.patch('autograder.rest_api.tasks.project_downloads'
-                        '.serialize_ultimate_submission_results',
+                        '.iter_serialized_ultimate_submission_results',
                         new=mock_serialize_ultimate_submission_results):
             self.do_ultimate_submission_scores_csv_test(self.url, [])
 
@@ -505,6 +587,16 @@ class DownloadAllUltimateSubmissionGradesTestCase(UnitTestBase):
 
         self.do_ultimate_submission_scores_csv_test(self.url + '?include_staff=true', expected)
 
+    @mock.patch('autograder.rest_api.tasks.project_downloads._ULTIMATE_SUBMISSIONS_CHUNK_SIZE',
+                new=1)
+    def test_groups_loaded_in_chunks(self):
+        mock_get_ultimate_submissions = mock.Mock(wraps=get_ultimate_submissions)
+        with mock.patch('autograder.rest_api.tasks.project_downloads.get_ultimate_submissions',
+                        new=mock_get_ultimate_submissions):
+            self.test_include_staff()
+
+        self.assertEqual(2, mock_get_ultimate_submissions.call_count)
+
     def test_unfinished_and_error_submissions_ignored(self):
         unfinished_statuses = filter(
             lambda val: val != ag_models.Submission.GradingStatus.finished_grading,
@@ -908,6 +1000,64 @@ class DownloadAllSubmissionGradesTestCase(UnitTestBase):
             [self.group1_submission1_best, self.group1_submission2,
              self.group2_only_submission, self.staff_submission1])
 
+    @mock.patch('autograder.rest_api.tasks.project_downloads._DOWNLOAD_SHARD_NUM_GROUPS',
+                new=1)
+    def test_include_staff_all_scores_built_in_shards(self):
+        self.test_include_staff_all_scores()
+
+    @mock.patch('autograder.rest_api.tasks.project_downloads._DOWNLOAD_SHARD_NUM_GROUPS',
+                new=1)
+    def test_error_in_one_shard(self):
+        make_scores_csv = project_downloads._make_scores_csv
+        num_calls = 0
+
+        def _fail_second_shard(*args):
+            nonlocal num_calls
+            num_calls += 1
+            if num_calls == 2:
+                raise RuntimeError('Shard failed')
+            make_scores_csv(*args)
+
+        self.client.force_authenticate(self.admin)
+        with mock.patch('autograder.rest_api.tasks.project_downloads._make_scores_csv',
+                        new=_fail_second_shard):
+            response = self.client.post(
+                reverse('all-submission-scores-task', kwargs={'pk': self.project.pk}))
+
+        self.assertEqual(2, num_calls)
+        task = ag_models.DownloadTask.objects.get(pk=response.data['pk'])
+        self.assertIn('Shard failed', task.error_msg)
+        self.assertEqual('', task.result_filename)
+        self.assertNotEqual(100, task.progress)
+
+        downloads_dir = os.path.join(settings.MEDIA_ROOT, 'project_downloads')
+        self.assertEqual([], [filename for filename in os.listdir(downloads_dir)
+                              if '.shard' in filename])
+
+    def test_shard_chord_error_recorded_and_shard_files_removed(self):
+        task = ag_models.DownloadTask.objects.validate_and_create(
+            project=self.project, creator=self.admin,
+            download_type=ag_models.DownloadType.all_scores)
+
+        downloads_dir = os.path.join(settings.MEDIA_ROOT, 'project_downloads')
+        os.makedirs(downloads_dir, exist_ok=True)
+        shard_filenames = [
+            os.path.join(downloads_dir, f'scores.csv.shard{index}') for index in range(2)]
+        # The second shard never got far enough to create its file.
+        with open(shard_filenames[0], 'w') as f:
+            f.write('partial')
+
+        # The chord calls the error callback with the request and
+        # exception of the task that failed.
+        project_downloads.on_download_shards_error(
+            mock.Mock(), RuntimeError('Worker lost'), 'Traceback', task.pk, shard_filenames)
+
+        task.refresh_from_db()
+        self.assertTrue(task.has_error)
+        self.assertIn('Worker lost', task.error_msg)
+        self.assertEqual('', task.result_filename)
+        self.assertFalse(os.path.exists(shard_filenames[0]))
+
     def test_non_admin_permission_denied(self):
         [staff] = obj_build.make_staff_users(self.project.course, 1)
         self.client.force_authenticate(staff)
@@ -7,7 +7,9 @@ from urllib.parse import urlencode
 
 from django.contrib.auth.models import User
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.http import QueryDict
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
@@ -125,6 +127,34 @@ class ListSubmissionsTestCase(AGViewTestBase):
         self.do_permission_denied_get_test(
             self.client, guest_group.members.first(), submissions_url(guest_group))
 
+    def test_list_queued_submissions_positions_loaded_in_bulk(self):
+        group = obj_build.make_group(project=self.project, members_role=obj_build.UserRole.admin)
+        other_group = obj_build.make_group(project=self.project)
+        submissions = []
+        for i in range(5):
+            obj_build.make_submission(
+                group=other_group, status=ag_models.Submission.GradingStatus.queued)
+            submissions.append(obj_build.make_submission(
+                group=group, status=ag_models.Submission.GradingStatus.queued))
+
+        self.client.force_authenticate(group.members.first())
+        response = self.client.get(submissions_url(group))
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            [10, 8, 6, 4, 2],
+            [submission['position_in_queue'] for submission in response.data])
+
+        # The number of queries doesn't depend on the number of queued submissions.
+        num_queries = len(self._get_queries(group))
+        obj_build.make_submission(group=group, status=ag_models.Submission.GradingStatus.queued)
+        self.assertEqual(num_queries, len(self._get_queries(group)))
+
+    def _get_queries(self, group: ag_models.Group):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(submissions_url(group))
+            self.assertEqual(status.HTTP_200_OK, response.status_code)
+        return queries.captured_queries
+
     def _make_submissions(
         self, group: ag_models.Group, num_submissions=4
     ) -> List[ag_models.Submission]:
@@ -77,6 +77,9 @@ urlpatterns = [
 
     path('projects/<int:pk>/all_submission_files/', views.AllSubmittedFilesTaskView.as_view(),
          name='all-submission-files-task'),
+    path('projects/<int:pk>/all_submission_files/stream/',
+         views.AllSubmittedFilesStreamView.as_view(),
+         name='all-submission-files-stream'),
     path('projects/<int:pk>/ultimate_submission_files/',
          views.UltimateSubmissionSubmittedFilesTaskView.as_view(),
          name='ultimate-submission-files-task'),
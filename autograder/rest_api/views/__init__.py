@@ -26,12 +26,13 @@ from .project_views.instructor_file_views import (InstructorFileContentView,
                                                   InstructorFileDetailView,
                                                   ListCreateInstructorFileView,
                                                   RenameInstructorFileView)
-from .project_views.project_views import (AllScoresTaskView, AllSubmittedFilesTaskView,
-                                          ClearResultsCacheView, CopyProjectView,
-                                          DownloadTaskDetailView, DownloadTaskResultView,
-                                          ImportHandgradingRubricView, ListCreateProjectView,
-                                          ListDownloadTasksView, NumQueuedSubmissionsView,
-                                          ProjectDetailView, UltimateSubmissionScoresTaskView,
+from .project_views.project_views import (AllScoresTaskView, AllSubmittedFilesStreamView,
+                                          AllSubmittedFilesTaskView, ClearResultsCacheView,
+                                          CopyProjectView, DownloadTaskDetailView,
+                                          DownloadTaskResultView, ImportHandgradingRubricView,
+                                          ListCreateProjectView, ListDownloadTasksView,
+                                          NumQueuedSubmissionsView, ProjectDetailView,
+                                          UltimateSubmissionScoresTaskView,
                                           UltimateSubmissionSubmittedFilesTaskView)
 from .rerun_submissions_task_views import (CancelRerunSubmissionsTaskView,
                                            RerunSubmissionsTaskDetailView,
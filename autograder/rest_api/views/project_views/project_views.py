@@ -2,6 +2,7 @@ from pathlib import Path
 from typing import Optional
 
 from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from drf_composable_permissions.p import P
 from rest_framework import response, status
@@ -20,6 +21,7 @@ from autograder.rest_api.schema import (
     as_content_obj
 )
 from autograder.rest_api.serve_file import serve_file
+from autograder.rest_api.stream_zip import stream_zip
 from autograder.rest_api.views.ag_model_views import (
     AGModelAPIView, AGModelDetailView, NestedModelView, convert_django_validation_error,
     handle_object_does_not_exist_404
@@ -269,6 +271,39 @@ class AllSubmittedFilesTaskView(_DownloadViewBase):
     celery_task_func = api_tasks.all_submission_files_task
 
 
+# AllSubmittedFilesStreamView refuses to stream archives with more than
+# this many files. Those must be downloaded using AllSubmittedFilesTaskView.
+MAX_STREAMED_SUBMITTED_FILES = 5000
+
+
+class AllSubmittedFilesStreamView(AGModelAPIView):
+    schema = None
+
+    model_manager = ag_models.Project.objects
+    permission_classes = [ag_permissions.is_admin()]
+
+    def get(self, *args, **kwargs):
+        """
+        Streams a zip archive of the files submitted to this project
+        directly in the response instead of building it with a
+        download task. The archive has the same contents as the result
+        of an "all_submission_files" download task.
+        """
+        project = self.get_object()
+        include_staff = self.request.query_params.get('include_staff', None) == 'true'
+        files = api_tasks.get_all_submitted_files(project, include_staff)
+        if len(files) > MAX_STREAMED_SUBMITTED_FILES:
+            return response.Response(
+                data=f'This download has more than {MAX_STREAMED_SUBMITTED_FILES} files. '
+                     'Please use the all_submission_files download task instead.',
+                status=status.HTTP_400_BAD_REQUEST)
+
+        stream = StreamingHttpResponse(stream_zip(files), content_type='application/zip')
+        stream['Content-Disposition'] = (
+            f'attachment; filename={project.pk}-all_submission_files.zip')
+        return stream
+
+
 class UltimateSubmissionSubmittedFilesTaskView(_DownloadViewBase):
     download_type = ag_models.DownloadType.final_graded_submission_files
     celery_task_func = api_tasks.ultimate_submission_files_task
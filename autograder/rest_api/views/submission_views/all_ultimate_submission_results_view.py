@@ -141,7 +141,8 @@ class AllUltimateSubmissionResults(AGModelAPIView):
 
         ag_test_preloader = AGTestPreLoader(project)
         ultimate_submissions = get_ultimate_submissions(
-            project, filter_groups=page, ag_test_preloader=ag_test_preloader)
+            project, filter_groups=page, ag_test_preloader=ag_test_preloader,
+            defer_ag_test_results=not full_results)
 
         include_pending_extensions = (
             self.request.query_params.get('include_pending_extensions') == 'true')
@@ -90,7 +90,12 @@ class ListCreateSubmissionView(NestedModelView):
     parent_obj_field_name = 'group'
 
     def get(self, *args, **kwargs):
-        return self.do_list()
+        submissions = list(self.get_nested_manager().all())
+        ag_models.Submission.load_positions_in_queue(submissions)
+        return response.Response(
+            data=[self.serialize_object(submission) for submission in submissions],
+            status=status.HTTP_200_OK,
+        )
 
     def get_nested_manager(self):
         return super().get_nested_manager().defer('denormalized_ag_test_results')
@@ -295,8 +300,9 @@ class ListSubmissionsWithResults(AGModelAPIView):
                 return response.Response(status=status.HTTP_403_FORBIDDEN,
                                          data='Only admins can override feedback_category')
 
-        submissions_queryset = ag_models.get_submissions_with_results_queryset(
-            base_manager=group.submissions)
+        submissions_queryset = list(ag_models.get_submissions_with_results_queryset(
+            base_manager=group.submissions))
+        ag_models.Submission.load_positions_in_queue(submissions_queryset)
 
         ag_test_preloader = AGTestPreLoader(group.project)
         mutation_test_suite_preloader = MutationTestSuitePreLoader(group.project)
@@ -252,6 +252,24 @@ SANDBOX_IMAGE_REGISTRY_HOST = os.environ.get(
     'SANDBOX_IMAGE_REGISTRY_HOST', '127.0.0.1')
 SANDBOX_IMAGE_REGISTRY_PORT = os.environ.get('SANDBOX_IMAGE_REGISTRY_PORT', '5001')
 
+# The number of idle, already started sandboxes that each grader process
+# keeps for each combination of sandbox image and network access.
+# See autograder/grading_tasks/tasks/sandbox_pool.py
+SANDBOX_WARM_POOL_SIZE = int(os.environ.get('SANDBOX_WARM_POOL_SIZE', 0))
+# The maximum number of idle sandboxes each grader process keeps in
+# total, and the number of seconds after which the idle sandboxes for
+# an image that hasn't been used are destroyed.
+SANDBOX_WARM_POOL_MAX_IDLE = int(
+    os.environ.get('SANDBOX_WARM_POOL_MAX_IDLE', 2 * SANDBOX_WARM_POOL_SIZE))
+SANDBOX_WARM_POOL_IDLE_TTL = int(os.environ.get('SANDBOX_WARM_POOL_IDLE_TTL', 600))
+
+# When True, the command results in submissions' denormalized AG test
+# results are stored column-wise, which makes them considerably smaller
+# for projects with many commands. Results stored in either form can
+# always be read. See autograder/core/models/ag_test/ag_test_case_result.py
+COMPACT_DENORMALIZED_AG_TEST_RESULTS = (
+    os.environ.get('COMPACT_DENORMALIZED_AG_TEST_RESULTS', 'false').lower() == 'true')
+
 
 DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
 
@@ -3,7 +3,10 @@ mypy \
     autograder/core/caching.py \
     autograder/core/fields.py \
     autograder/core/constants.py \
+    autograder/core/diff.py \
     autograder/core/submission_feedback.py \
+    autograder/core/submission_points.py \
+    autograder/core/submission_scores.py \
     autograder/core/submission_email_receipts.py \
     autograder/core/utils.py \
     autograder/utils/testing/unit_test_base.py \